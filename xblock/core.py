@@ -1,12 +1,12 @@
 """
 Base classes for all XBlock-like objects. Used by all XBlock Runtimes.
 """
-import copy
 import functools
 import inspect
 import json
 import logging
 import warnings
+import weakref
 from collections import OrderedDict, defaultdict
 
 import importlib.resources
@@ -16,12 +16,27 @@ from webob import Response
 from xblock.exceptions import (
     DisallowedFileError,
     FieldDataDeprecationWarning,
+    FieldSizeLimitError,
     JsonHandlerError,
     KeyValueMultiSaveError,
+    NoSuchDefinition,
+    NoSuchUsage,
     XBlockSaveError,
 )
-from xblock.fields import Field, List, Reference, ReferenceList, Scope, String
-from xblock.internal import class_lazy
+from xblock.fields import (
+    EXPLICITLY_SET,
+    Dict,
+    Field,
+    LazyJSONContainer,
+    List,
+    Reference,
+    ReferenceList,
+    Scope,
+    String,
+    make_json_patch,
+    serialized_size,
+)
+from xblock.internal import BlockCache, class_lazy, uses_default_methods
 from xblock.plugin import Plugin
 from xblock.validation import Validation
 
@@ -37,6 +52,19 @@ __all__ = ['XBlock', 'XBlockAside']
 
 UNSET = object()
 
+# The JSON conversions of fields whose values are stored as they are, so that a JSON patch
+# between two values applies to the stored value too.
+_PATCHABLE_JSON_CONVERSIONS = frozenset([
+    (Dict.from_json, Dict.to_json),
+    (List.from_json, List.to_json),
+])
+
+# How many children XBlock.iter_children instantiates (or looks up the types of) at a time.
+CHILD_BATCH_SIZE = 100
+
+# How many of the children it has instantiated each XBlock keeps alive.
+CHILD_CACHE_SIZE = 100
+
 
 class _AutoNamedFieldsMetaclass(type):
     """
@@ -51,31 +79,138 @@ class _AutoNamedFieldsMetaclass(type):
 
         class MyBlock(XBlock):
             my_field = Field(name="my_field", ...)
+
+    It also builds the class's ``fields`` table and its per-scope index
+    (``_fields_by_scope``) when the class is created, reusing the tables of
+    base classes built by this metaclass.
     """
     def __new__(mcs, name, bases, attrs):
         """
         Ensure __name__ is set on all Field attributes, both on the new class and on its bases.
         """
-        def needs_name(obj):
-            """
-            Is this object a Field that hasn't had its name assigned yet?
-            """
-            return isinstance(obj, Field) and not obj.__name__
-
         # Iterate over the attrs before they're bound to the class
         # so that we don't accidentally trigger any __get__ methods
-        for attr_name, attr in attrs.items():
-            if needs_name(attr):
-                attr.__name__ = attr_name
+        declared = mcs._declared_fields(attrs)
+
+        cls = super().__new__(mcs, name, bases, attrs)
+        cls._declared_fields_table = declared
+
+        # The order of the table is kept as it was when it was built by
+        # inspecting the class: the fields of the bases first, then the
+        # class's other fields by name. Exported OLX lists fields in this order.
+        if len(bases) == 1 and isinstance(bases[0], _AutoNamedFieldsMetaclass):
+            # The common case: extend the single base's table.
+            fields = dict(bases[0].fields)
+            fields.update(sorted(declared.items()))
+        else:
+            # Walk the MRO from the top down, so that the most specific
+            # version of each field wins (as for method resolution).
+            # Mixins that don't use this metaclass may also include Fields,
+            # which get their names here.
+            fields = {}
+            members = {}
+            for base in reversed(cls.__mro__[1:]):
+                if isinstance(base, _AutoNamedFieldsMetaclass):
+                    fields.update(base.fields)
+                    members.update(base._declared_fields_table)
+                else:
+                    members.update(mcs._declared_fields(vars(base)))
+            members.update(declared)
+            fields.update(sorted(members.items()))
+
+        by_scope = defaultdict(list)
+        for field in fields.values():
+            by_scope[field.scope].append(field)
+
+        cls.fields = fields
+        cls._fields_by_scope = {scope: tuple(scope_fields) for scope, scope_fields in by_scope.items()}
+        return cls
+
+    @staticmethod
+    def _declared_fields(namespace):
+        """
+        Return the Fields in the class `namespace`, by attribute name, naming any that aren't named yet.
+        """
+        declared = {}
+        for attr_name, attr in namespace.items():
+            if isinstance(attr, Field):
+                if not attr.__name__:
+                    attr.__name__ = attr_name
+                declared[attr_name] = attr
+        return declared
 
-        # Iterate over all of the base classes, so that we can add
-        # names to any mixins that don't include this metaclass, but that
-        # do include Fields
-        for base in bases:
-            for attr_name, attr in inspect.getmembers(base, predicate=needs_name):
-                attr.__name__ = attr_name
 
-        return super().__new__(mcs, name, bases, attrs)
+class _FieldSerializer:
+    """
+    Converts the fields of one XBlock-like class to JSON-ready values in bulk.
+
+    One is compiled per class (see ``Blocklike._get_field_serializer``), using the
+    class's fields grouped by scope. Each operation looks up the block's
+    FieldData once, and checks whether fields are set without going through
+    :meth:`.Field.is_set_on` for fields that don't override it.
+    """
+    def __init__(self, fields, fields_by_scope):
+        self.fields = tuple(fields.values())
+        self.fields_by_scope = fields_by_scope
+        self.xml_fields = tuple(
+            (field_name, field) for field_name, field in fields.items()
+            if field_name not in ('children', 'parent', 'content')
+        )
+        self._custom_is_set_on = frozenset(
+            field for field in self.fields
+            if type(field).is_set_on is not Field.is_set_on
+        )
+
+    def _is_set_on(self, field, block, field_data):
+        """
+        Equivalent to ``field.is_set_on(block)``, given the block's `field_data`.
+        """
+        # pylint: disable=protected-access
+        if field in self._custom_is_set_on:
+            return field.is_set_on(block)
+        return (field in block._dirty_fields and field._is_dirty(block)) or field_data.has(block, field.name)
+
+    def any_set(self, block):
+        """
+        Return whether any field has a non-default value on `block`.
+        """
+        field_data = block._field_data  # pylint: disable=protected-access
+        return any(self._is_set_on(field, block, field_data) for field in self.fields)
+
+    def cached_to_json(self, block, fields):
+        """
+        Return a dict mapping the names of `fields` to the JSON form of their cached values on `block`.
+        """
+        cache = block._field_data_cache  # pylint: disable=protected-access
+        return {field.name: field.to_json(cache[field.name]) for field in fields}
+
+    def explicitly_set_to_json(self, block, scope):
+        """
+        Return a dict mapping the names of the fields of `scope` set on `block` to their JSON form.
+        """
+        field_data = block._field_data  # pylint: disable=protected-access
+        result = {}
+        for field in self.fields_by_scope.get(scope, ()):
+            if not self._is_set_on(field, block, field_data):
+                continue
+            try:
+                result[field.name] = field.read_json(block)
+            except TypeError as exception:
+                exception_message = (
+                    f"{exception}, Block={block.usage_key}, Field-name={field.name}"
+                )
+                raise TypeError(exception_message) from exception
+        return result
+
+    def exported_fields(self, block):
+        """
+        Return ``(field_name, field)`` pairs for the fields of `block` to export to XML, in order.
+        """
+        field_data = block._field_data  # pylint: disable=protected-access
+        return [
+            (field_name, field) for field_name, field in self.xml_fields
+            if field.force_export or self._is_set_on(field, block, field_data)
+        ]
 
 
 class Blocklike(metaclass=_AutoNamedFieldsMetaclass):
@@ -275,32 +410,21 @@ class Blocklike(metaclass=_AutoNamedFieldsMetaclass):
             combined.update(getattr(parent, "_services_requested", {}))
         return combined
 
-    @class_lazy
-    def fields(cls):  # pylint: disable=no-self-argument
+    # A dictionary mapping the attribute name to the Field object for all Field attributes of the class,
+    # and the same fields grouped by scope, both set by _AutoNamedFieldsMetaclass when the class is created.
+    fields = {}
+    _fields_by_scope = {}
+
+    @classmethod
+    def _get_field_serializer(cls):
         """
-        A dictionary mapping the attribute name to the Field object for all Field attributes of the class.
+        Return the :class:`_FieldSerializer` for the fields of this class, compiling it on first use.
         """
-        fields = {}
-        # Loop through all of the baseclasses of cls, in
-        # the order that methods are resolved (Method Resolution Order / mro)
-        # and find all of their defined fields.
-        #
-        # Only save the first such defined field (as expected for method resolution)
-
-        bases = cls.mro()  # pylint: disable=no-member
-        local = bases.pop(0)
-
-        # First, descend the MRO from the top down, updating the 'fields' dictionary
-        # so that the dictionary always has the most specific version of fields in it
-        for base in reversed(bases):
-            fields.update(getattr(base, 'fields', {}))
-
-        # For this class, loop through all attributes not named 'fields',
-        # find those of type Field, and save them to the 'fields' dict
-        for attr_name, attr_value in inspect.getmembers(local, lambda attr: isinstance(attr, Field)):
-            fields[attr_name] = attr_value
-
-        return fields
+        serializer = cls.__dict__.get('_compiled_field_serializer')
+        if serializer is None:
+            serializer = _FieldSerializer(cls.fields, cls._fields_by_scope)
+            cls._compiled_field_serializer = serializer
+        return serializer
 
     @classmethod
     def parse_xml(cls, node, runtime, keys):
@@ -319,8 +443,10 @@ class Blocklike(metaclass=_AutoNamedFieldsMetaclass):
 
         # The base implementation: child nodes become child blocks.
         # Or fields, if they belong to the right namespace.
+        child_nodes = []
         for child in node:
-            if child.tag is etree.Comment:
+            # Skip comments, processing instructions and unexpanded entities.
+            if not isinstance(child.tag, str):
                 continue
             qname = etree.QName(child)
             tag = qname.localname
@@ -329,7 +455,9 @@ class Blocklike(metaclass=_AutoNamedFieldsMetaclass):
             if namespace == XML_NAMESPACES["option"]:
                 cls._set_field_if_present(block, tag, child.text, child.attrib)
             else:
-                block.runtime.add_node_as_child(block, child)
+                child_nodes.append(child)
+        if child_nodes:
+            block.runtime.add_nodes_as_children(block, child_nodes)
 
         # Attributes become fields.
         for name, value in list(node.items()):  # lxml has no iteritems
@@ -518,32 +646,119 @@ class Blocklike(metaclass=_AutoNamedFieldsMetaclass):
         """
         Save all fields that are specified in `field_names`, even if they are not dirty.
         """
-        fields = [
-            self.fields[field_name]  # pylint: disable=unsubscriptable-object
-            for field_name in field_names
-        ]
-        fields_to_save_json = {}
-        for field in fields:
-            fields_to_save_json[field.name] = field.to_json(self._field_data_cache[field.name])
+        fields, fields_to_save_json = self._prepare_save(field_names)
+
+        field_data = self._field_data
+        patches = self._get_json_patches(fields, fields_to_save_json) if field_data.supports_json_patch else None
 
         try:
             # Throws KeyValueMultiSaveError if things go wrong
-            self._field_data.set_many(self, fields_to_save_json)
+            if patches:
+                field_data.patch_many(self, fields_to_save_json, patches)
+            else:
+                field_data.set_many(self, fields_to_save_json)
         except KeyValueMultiSaveError as save_error:
-            saved_fields = [field for field in fields
-                            if field.name in save_error.saved_field_names]
-            for field in saved_fields:
-                # should only find one corresponding field
-                fields.remove(field)
-                # if the field was dirty, delete from dirty fields
-                self._reset_dirty_field(field)
-            msg = f'Error saving fields {save_error.saved_field_names}'
-            raise XBlockSaveError(saved_fields, fields, msg)  # pylint: disable= raise-missing-from
+            raise self._partial_save_error(fields, save_error.saved_field_names)
 
         # Remove all dirty fields, since the save was successful
         for field in fields:
             self._reset_dirty_field(field)
 
+    def _prepare_save(self, field_names):
+        """
+        Return the fields named in `field_names`, and a dict of their JSON values to save by name.
+
+        Raises :class:`~xblock.exceptions.FieldSizeLimitError` if they can't be saved.
+        """
+        fields = [
+            self.fields[field_name]
+            for field_name in field_names
+        ]
+        fields_to_save_json = self._get_field_serializer().cached_to_json(self, fields)
+        self._check_field_sizes(fields, fields_to_save_json)
+        return fields, fields_to_save_json
+
+    def _partial_save_error(self, fields, saved_field_names):
+        """
+        Mark the fields named in `saved_field_names` as saved, and return an
+        :class:`~xblock.exceptions.XBlockSaveError` for the save of `fields` which failed part way.
+        """
+        saved_fields = [field for field in fields
+                        if field.name in saved_field_names]
+        unsaved_fields = list(fields)
+        for field in saved_fields:
+            # should only find one corresponding field
+            unsaved_fields.remove(field)
+            # if the field was dirty, delete from dirty fields
+            self._reset_dirty_field(field)
+        msg = f'Error saving fields {saved_field_names}'
+        return XBlockSaveError(saved_fields, unsaved_fields, msg)
+
+    def _get_json_patches(self, fields, fields_json):
+        """
+        Return JSON patches from the values of `fields` when they were read to `fields_json`, by field name.
+
+        Only fields whose value was read and then changed in place have a
+        baseline to patch from, and only those whose values are stored as they
+        are (plain Dict and List fields) can be patched. A patch is only returned
+        if it is smaller than the field's new value.
+        """
+        patches = {}
+        for field in fields:
+            baseline = self._dirty_fields.get(field, EXPLICITLY_SET)
+            if baseline is EXPLICITLY_SET or isinstance(baseline, LazyJSONContainer):
+                continue
+            if (type(field).from_json, type(field).to_json) not in _PATCHABLE_JSON_CONVERSIONS:
+                continue
+            old_json = field.to_json(baseline)
+            new_json = fields_json[field.name]
+            if not isinstance(old_json, (dict, list)) or not isinstance(new_json, (dict, list)):
+                continue
+            patch = make_json_patch(old_json, new_json)
+            if serialized_size(patch) < serialized_size(new_json):
+                patches[field.name] = patch
+        return patches
+
+    def _check_field_sizes(self, fields, fields_json):
+        """
+        Account for the serialized size of `fields_json`, which is about to be saved.
+
+        Fields may declare ``soft_size_limit`` and ``hard_size_limit`` runtime options,
+        in bytes of JSON. Going over a soft limit logs a warning, and going over a hard
+        limit raises :class:`~xblock.exceptions.FieldSizeLimitError` before anything is
+        saved. If the runtime provides a ``field-size`` service, the sizes of all saved
+        fields are also reported to it, which may apply limits of its own.
+        """
+        size_service = self.runtime.service(self, 'field-size')
+        if size_service is not None:
+            sized_fields = fields
+        else:
+            sized_fields = [
+                field for field in fields
+                if 'soft_size_limit' in field.runtime_options or 'hard_size_limit' in field.runtime_options
+            ]
+            if not sized_fields:
+                return
+
+        sizes = {field.name: serialized_size(fields_json[field.name]) for field in sized_fields}
+        for field in sized_fields:
+            size = sizes[field.name]
+            hard_limit = field.runtime_options.get('hard_size_limit')
+            if hard_limit is not None and size > hard_limit:
+                raise FieldSizeLimitError(
+                    [], fields,
+                    f"Field {field.name} of {self.usage_key} is {size} bytes, over its limit of {hard_limit}"
+                )
+            soft_limit = field.runtime_options.get('soft_size_limit')
+            if soft_limit is not None and size > soft_limit:
+                logging.warning(
+                    "Field %s of %s is %d bytes, over its soft limit of %d",
+                    field.name, self.usage_key, size, soft_limit,
+                )
+
+        if size_service is not None:
+            size_service.record_save(self, sizes)
+
     def _get_fields_to_save(self):
         """
         Get an xblock's dirty fields.
@@ -564,7 +779,7 @@ class Blocklike(metaclass=_AutoNamedFieldsMetaclass):
         Resets dirty field value with the value from the field data cache.
         """
         if field in self._dirty_fields:
-            self._dirty_fields[field] = copy.deepcopy(
+            self._dirty_fields[field] = field._dirty_baseline(  # pylint: disable=protected-access
                 self._field_data_cache[field.name]
             )
 
@@ -582,17 +797,7 @@ class Blocklike(metaclass=_AutoNamedFieldsMetaclass):
             values, for all fields of the given scope that have been
             explicitly set on this block.
         """
-        result = {}
-        for field in self.fields.values():
-            if field.scope == scope and field.is_set_on(self):
-                try:
-                    result[field.name] = field.read_json(self)
-                except TypeError as exception:
-                    exception_message = (
-                        f"{exception}, Block={self.usage_key}, Field-name={field.name}"
-                    )
-                    raise TypeError(exception_message) from exception
-        return result
+        return self._get_field_serializer().explicitly_set_to_json(self, scope)
 
     def add_xml_to_node(self, node):
         """
@@ -604,11 +809,8 @@ class Blocklike(metaclass=_AutoNamedFieldsMetaclass):
         node.set('xblock-family', self.entry_point)
 
         # Set node attributes based on our fields.
-        for field_name, field in list(self.fields.items()):
-            if field_name in ('children', 'parent', 'content'):
-                continue
-            if field.is_set_on(self) or field.force_export:
-                self._add_field(node, field_name, field)
+        for field_name, field in self._get_field_serializer().exported_fields(self):
+            self._add_field(node, field_name, field)
 
         # A content field becomes text content.
         text = self.xml_text_content()
@@ -625,7 +827,7 @@ class Blocklike(metaclass=_AutoNamedFieldsMetaclass):
         """
         What is the text content for this block's XML node?
         """
-        if 'content' in self.fields and self.content:  # pylint: disable=unsupported-membership-test
+        if 'content' in self.fields and self.content:
             return self.content
         else:
             return None
@@ -660,6 +862,8 @@ class Blocklike(metaclass=_AutoNamedFieldsMetaclass):
 
 # All Blocklike objects use the field-data service.
 Blocklike.needs('field-data')(Blocklike)
+# ... and report the size of the fields they save, if the runtime keeps track of it.
+Blocklike.wants('field-size')(Blocklike)
 
 
 class XBlockMixin(Blocklike):
@@ -776,8 +980,10 @@ class XBlock(Plugin, Blocklike, metaclass=_HasChildrenMetaclass):
 
         # The base implementation: child nodes become child blocks.
         # Or fields, if they belong to the right namespace.
+        child_nodes = []
         for child in node:
-            if child.tag is etree.Comment:
+            # Skip comments, processing instructions and unexpanded entities.
+            if not isinstance(child.tag, str):
                 continue
             qname = etree.QName(child)
             tag = qname.localname
@@ -786,7 +992,9 @@ class XBlock(Plugin, Blocklike, metaclass=_HasChildrenMetaclass):
             if namespace == XML_NAMESPACES["option"]:
                 cls._set_field_if_present(block, tag, child.text, child.attrib)
             else:
-                block.runtime.add_node_as_child(block, child)
+                child_nodes.append(child)
+        if child_nodes:
+            block.runtime.add_nodes_as_children(block, child_nodes)
 
         # Attributes become fields.
         for name, value in list(node.items()):  # lxml has no iteritems
@@ -829,12 +1037,11 @@ class XBlock(Plugin, Blocklike, metaclass=_HasChildrenMetaclass):
         # A cache of the parent block, retrieved from .parent
         self._parent_block = None
         self._parent_block_id = None
-        self._child_cache = {}
+        self._child_cache = BlockCache(CHILD_CACHE_SIZE)
 
         for_parent = kwargs.pop('for_parent', None)
         if for_parent is not None:
-            self._parent_block = for_parent
-            self._parent_block_id = for_parent.scope_ids.usage_id
+            self._cache_parent(for_parent)
 
         # Provide backwards compatibility for external access through _field_data
         super().__init__(runtime=runtime, scope_ids=scope_ids, field_data=field_data, *args, **kwargs)
@@ -877,34 +1084,155 @@ class XBlock(Plugin, Blocklike, metaclass=_HasChildrenMetaclass):
             else:
                 self._parent_block = None
             self._parent_block_id = self.parent
-        return self._parent_block
+        return self._cached_parent()
+
+    def _cache_parent(self, parent):
+        """Remember the block `parent` as the parent of this block."""
+        # The parent caches this block as a child, so only refer back to it weakly.
+        self._parent_block = weakref.ref(parent)
+        self._parent_block_id = parent.scope_ids.usage_id
+
+    def _cached_parent(self):
+        """Return the cached parent block, or None if there isn't one or it has been freed."""
+        parent = self._parent_block
+        if isinstance(parent, weakref.ref):
+            parent = parent()
+        return parent
 
     @property
     def has_cached_parent(self):
         """Return whether this block has a cached parent block."""
-        return self.parent is not None and self._parent_block_id == self.parent
+        if self.parent is None or self._parent_block_id != self.parent:
+            return False
+        return self._cached_parent() is not None
 
     def get_child(self, usage_id):
         """Return the child identified by ``usage_id``."""
-        if usage_id in self._child_cache:
-            return self._child_cache[usage_id]
+        child_block = self._child_cache.get(usage_id)
+        if child_block is not None:
+            return child_block
 
         child_block = self.runtime.get_block(usage_id, for_parent=self)
         self._child_cache[usage_id] = child_block
         return child_block
 
-    def get_children(self, usage_id_filter=None):
+    def get_children(self, usage_id_filter=None, lazy=False):
         """
         Return instantiated XBlocks for each of this blocks ``children``.
+
+        If `lazy` is True, children which haven't been instantiated yet are
+        returned as :class:`XBlockProxy` objects, which know their usage id and
+        block type, and only instantiate the child (as :meth:`get_child` does)
+        when any other attribute is used.
         """
         if not self.has_children:
             return []
 
-        return [
-            self.get_child(usage_id)
-            for usage_id in self.children
+        usage_ids = [
+            usage_id for usage_id in self.children
             if usage_id_filter is None or usage_id_filter(usage_id)
         ]
+        if lazy:
+            return self._get_child_proxies(usage_ids)
+        return self._load_children(usage_ids)
+
+    def iter_children(self, start=0, stop=None, type_filter=None):
+        """
+        Iterate over the instantiated children in ``children[start:stop]``.
+
+        If `type_filter` is given, as a block type or a collection of them, only
+        children of those types are counted and returned, so `start` and `stop`
+        index the matching children. Children outside the window aren't
+        instantiated; those inside it are instantiated a batch at a time as the
+        iteration reaches them.
+        """
+        if start < 0 or (stop is not None and stop < 0):
+            raise ValueError("iter_children doesn't support negative indices")
+        if isinstance(type_filter, str):
+            type_filter = {type_filter}
+        elif type_filter is not None:
+            type_filter = set(type_filter)
+        if not self.has_children:
+            return iter(())
+        return self._iter_children(start, stop, type_filter)
+
+    def _iter_children(self, start, stop, type_filter):
+        """
+        Generate the children for :meth:`iter_children`.
+        """
+        usage_ids = self.children
+        if type_filter is None:
+            usage_ids = usage_ids[start:stop]
+            start, stop = 0, None
+
+        position = 0
+        for offset in range(0, len(usage_ids), CHILD_BATCH_SIZE):
+            batch = usage_ids[offset:offset + CHILD_BATCH_SIZE]
+            if type_filter is not None:
+                _, block_types = self._get_child_types(batch)
+                batch = [usage_id for usage_id, block_type in zip(batch, block_types) if block_type in type_filter]
+            first = max(start - position, 0)
+            last = len(batch) if stop is None else min(stop - position, len(batch))
+            position += len(batch)
+            if first < last:
+                yield from self._load_children(batch[first:last])
+            if stop is not None and position >= stop:
+                return
+
+    def _load_children(self, usage_ids):
+        """
+        Return the child for each of `usage_ids`, instantiating uncached ones together.
+        """
+        if not uses_default_methods(self, XBlock, 'get_child'):
+            return [self.get_child(usage_id) for usage_id in usage_ids]
+
+        children = {}
+        for usage_id in usage_ids:
+            child_block = self._child_cache.get(usage_id)
+            if child_block is not None:
+                children[usage_id] = child_block
+        missing = list(dict.fromkeys(usage_id for usage_id in usage_ids if usage_id not in children))
+        if missing:
+            # Construct the uncached children together; each is cached as get_child() would.
+            for usage_id, child_block in zip(missing, self.runtime.get_blocks(missing, for_parent=self)):
+                self._child_cache[usage_id] = children[usage_id] = child_block
+        return [children[usage_id] for usage_id in usage_ids]
+
+    def _get_child_types(self, usage_ids):
+        """
+        Return the definition ids and block types of `usage_ids`, looked up in bulk.
+        """
+        id_reader = self.runtime.id_reader
+        def_ids = id_reader.get_definition_ids(usage_ids)
+        try:
+            return def_ids, id_reader.get_block_types(def_ids)
+        except NoSuchDefinition:
+            raise NoSuchUsage(repr(usage_ids))  # pylint: disable= raise-missing-from
+
+    def _get_child_proxies(self, usage_ids):
+        """
+        Return the cached child, or an :class:`XBlockProxy` for it, for each of `usage_ids`.
+
+        The proxies load their block with :meth:`get_child`, through the
+        runtime's ``get_block``. A runtime which overrides ``get_block`` or
+        ``get_blocks`` may not find its blocks through its ``id_reader``, so its
+        children are instantiated straight away instead.
+        """
+        if not self.runtime._uses_default('get_block', 'get_blocks'):  # pylint: disable=protected-access
+            return self._load_children(usage_ids)
+        children = {}
+        for usage_id in usage_ids:
+            child_block = self._child_cache.get(usage_id)
+            if child_block is not None:
+                children[usage_id] = child_block
+        missing = list(dict.fromkeys(usage_id for usage_id in usage_ids if usage_id not in children))
+        if missing:
+            def_ids, block_types = self._get_child_types(missing)
+            children.update(
+                (usage_id, XBlockProxy(usage_id, def_id, block_type, self.get_child))
+                for usage_id, def_id, block_type in zip(missing, def_ids, block_types)
+            )
+        return [children[usage_id] for usage_id in usage_ids]
 
     def clear_child_cache(self):
         """
@@ -917,8 +1245,7 @@ class XBlock(Plugin, Blocklike, metaclass=_HasChildrenMetaclass):
         Add children to etree.Element `node`.
         """
         if self.has_children:
-            for child_id in self.children:
-                child = self.runtime.get_block(child_id)
+            for child in self.runtime.get_blocks(self.children):
                 self.runtime.add_block_as_child_node(child, node)
 
     @classmethod
@@ -989,6 +1316,70 @@ class XBlock(Plugin, Blocklike, metaclass=_HasChildrenMetaclass):
         return getattr(self, "display_name", None) or self.usage_key.block_id.replace("_", " ")
 
 
+class XBlockProxy:
+    """
+    Stands in for an XBlock which hasn't been instantiated yet.
+
+    The proxy knows the block's `usage_id`, `def_id` and `block_type`. Using
+    any other attribute instantiates the block, by calling `loader` with the
+    usage id, and passes the attribute through to it, as do comparisons,
+    hashing, ``repr`` and ``isinstance`` checks. Code which needs the block
+    itself should call :meth:`load`.
+    """
+    __slots__ = ('usage_id', 'def_id', 'block_type', '_loader', '_block')
+
+    def __init__(self, usage_id, def_id, block_type, loader):
+        object.__setattr__(self, 'usage_id', usage_id)
+        object.__setattr__(self, 'def_id', def_id)
+        object.__setattr__(self, 'block_type', block_type)
+        object.__setattr__(self, '_loader', loader)
+        object.__setattr__(self, '_block', None)
+
+    @property
+    def is_loaded(self):
+        """Whether the block has been instantiated."""
+        return self._block is not None
+
+    def load(self):
+        """Return the block, instantiating it on first use."""
+        if self._block is None:
+            object.__setattr__(self, '_block', self._loader(self.usage_id))
+        return self._block
+
+    def __getattr__(self, name):
+        # Only called for attributes the proxy doesn't have. Slots which aren't
+        # set yet (e.g. while copying) mustn't recurse through load().
+        if name in XBlockProxy.__slots__ or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def __setattr__(self, name, value):
+        if name in XBlockProxy.__slots__:
+            raise AttributeError(f"Can't set {name} of an XBlockProxy")
+        setattr(self.load(), name, value)
+
+    def __delattr__(self, name):
+        if name in XBlockProxy.__slots__:
+            raise AttributeError(f"Can't delete {name} of an XBlockProxy")
+        delattr(self.load(), name)
+
+    @property
+    def __class__(self):
+        # Makes isinstance() checks see the block's class. type() is still XBlockProxy.
+        return type(self.load())
+
+    def __eq__(self, other):
+        if isinstance(other, XBlockProxy):
+            other = other.load()
+        return self.load() == other
+
+    def __hash__(self):
+        return hash(self.load())
+
+    def __repr__(self):
+        return repr(self.load())
+
+
 class XBlockAside(Plugin, Blocklike):
     """
     Base class for XBlock-like objects that are rendered alongside :class:`.XBlock` views.
@@ -1075,4 +1466,4 @@ class XBlockAside(Plugin, Blocklike):
         If all of the aside's data is empty or a default value, then the aside shouldn't
         be serialized as XML at all.
         """
-        return any(field.is_set_on(self) for field in self.fields.values())
+        return self._get_field_serializer().any_set(self)
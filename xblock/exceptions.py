@@ -36,6 +36,14 @@ class XBlockSaveError(Exception):
         self.dirty_fields = dirty_fields
 
 
+class FieldSizeLimitError(XBlockSaveError):
+    """
+    Raised when saving an XBlock would store fields larger than their hard size limit.
+
+    None of the fields are saved, so all of them are left in `dirty_fields`.
+    """
+
+
 class KeyValueMultiSaveError(Exception):
     """
     Raised to indicated an error in saving multiple fields in a KeyValueStore
@@ -53,6 +61,44 @@ class KeyValueMultiSaveError(Exception):
         self.saved_field_names = saved_field_names
 
 
+class KeyValueMultiBlockSaveError(Exception):
+    """
+    Raised to indicate an error in saving the fields of multiple blocks together
+    """
+    def __init__(self, saved_field_names):
+        """
+        Create a new KeyValueMultiBlockSaveError
+
+        `saved_field_names` - a dict mapping each block which wasn't fully saved
+        to an iterable of the names of its fields that were successfully saved
+        before the exception occurred. All of the fields of the other blocks
+        were saved.
+        """
+        # Exception is an old-style class, so can't use super
+        Exception.__init__(self)
+
+        self.saved_field_names = saved_field_names
+
+
+class XBlockMultiSaveError(Exception):
+    """
+    Raised to indicate an error in saving some of several XBlocks
+    """
+    def __init__(self, errors, message=None):
+        """
+        Create a new XBlockMultiSaveError
+
+        `errors` - a dict mapping each block which wasn't fully saved to
+        an :class:`XBlockSaveError` with its saved and dirty fields. The
+        other blocks were saved.
+        """
+        # Exception is an old-style class, so can't use super
+        Exception.__init__(self)
+
+        self.message = message
+        self.errors = errors
+
+
 class InvalidScopeError(Exception):
     """
     Raised to indicated that operating on the supplied scope isn't allowed by a KeyValueStore
@@ -0,0 +1,202 @@
+"""
+Export many blocks to compressed OLX files, in a pool of worker processes.
+
+Run with ``python -m xblock.export --runtime-factory package.module:factory [options] usage_id [usage_id ...]``.
+"""
+import argparse
+from collections import namedtuple
+import concurrent.futures
+import gzip
+import importlib
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+
+class ExportResult(namedtuple('ExportResult', 'usage_id path seconds peak_memory size error')):
+    """
+    The export of one block by :func:`export_blocks`.
+
+    `seconds` is the time taken, `peak_memory` the peak memory allocated in
+    Python while exporting, in bytes, if memory was traced (else None), and
+    `size` the size of the compressed file. `error` is None, or a description
+    of the exception which failed the export.
+    """
+
+
+def _make_export_runtime(runtime_factory, block_types):
+    """Make a runtime with `runtime_factory`, and warm it up for `block_types`."""
+    runtime = runtime_factory()
+    runtime.warm_up(block_types)
+    return runtime
+
+
+# The runtime of an export worker process, made by _init_export_worker.
+_EXPORT_RUNTIME = None
+
+
+def _init_export_worker(runtime_factory, block_types):
+    """Make and warm up the runtime used by _export_block_in_worker in this worker process."""
+    global _EXPORT_RUNTIME  # pylint: disable=global-statement
+    _EXPORT_RUNTIME = _make_export_runtime(runtime_factory, block_types)
+
+
+def _export_block_in_worker(*args):
+    """Run :func:`_export_block` with the runtime of this worker process."""
+    return _export_block(_EXPORT_RUNTIME, *args)
+
+
+def _export_block(runtime, usage_id, path, pretty_print, compresslevel, trace_memory):
+    """
+    Export `usage_id` to the gzipped file `path` with `runtime`, returning an ExportResult.
+
+    The file is written under a temporary name, and only renamed to `path`
+    once the export succeeds. With `trace_memory`, the peak memory allocated
+    in Python is measured with ``tracemalloc``, which slows the export down.
+    """
+    if trace_memory:
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+    temp_path = path + '.tmp'
+    start = time.perf_counter()
+    error = None
+    try:
+        with open(temp_path, 'wb') as raw_output:
+            with gzip.GzipFile(path, 'wb', compresslevel, raw_output) as output:
+                runtime.export_to_xml(runtime.get_block(usage_id), output, pretty_print=pretty_print, streaming=True)
+        os.replace(temp_path, path)
+    except Exception as exc:  # pylint: disable=broad-except
+        error = f"{type(exc).__name__}: {exc}"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    seconds = time.perf_counter() - start
+    peak_memory = None
+    if trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        if not tracing:
+            tracemalloc.stop()
+    size = 0 if error else os.path.getsize(path)
+    return ExportResult(usage_id, path, seconds, peak_memory, size, error)
+
+
+def output_names(usage_ids):
+    """
+    Return a file name for the export of each of `usage_ids`, made from the id and unique among them.
+    """
+    names = []
+    used = set()
+    for usage_id in usage_ids:
+        base = re.sub(r'[^\w.-]+', '_', str(usage_id)).strip('_') or 'block'
+        name = base
+        suffix = 1
+        while name in used:
+            suffix += 1
+            name = f"{base}-{suffix}"
+        used.add(name)
+        names.append(name + '.xml.gz')
+    return names
+
+
+def export_blocks(usage_ids, output_dir, runtime_factory, processes=None, pretty_print=False, compresslevel=6,
+                  block_types=None, trace_memory=False):
+    """
+    Export each of `usage_ids` to a gzipped OLX file in `output_dir`, yielding an :class:`ExportResult` for each.
+
+    The exports are done by `processes` worker processes (or in this process,
+    if `processes` is 0), each with a runtime made by calling
+    `runtime_factory`, which must be picklable, and warmed up for
+    `block_types` (all the installed types by default) with
+    :meth:`.Runtime.warm_up`. The blocks are exported with
+    :meth:`.Runtime.export_to_xml` in streaming mode, compactly unless
+    `pretty_print`. With `trace_memory`, the peak memory of each export is
+    measured too. Results are yielded in the order of `usage_ids`; an export
+    which fails gives a result with an `error` rather than stopping the others,
+    and leaves no file.
+    """
+    usage_ids = list(usage_ids)
+    paths = [os.path.join(output_dir, name) for name in output_names(usage_ids)]
+    os.makedirs(output_dir, exist_ok=True)
+
+    if processes == 0:
+        runtime = _make_export_runtime(runtime_factory, block_types)
+        for usage_id, path in zip(usage_ids, paths):
+            yield _export_block(runtime, usage_id, path, pretty_print, compresslevel, trace_memory)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(
+        processes, initializer=_init_export_worker, initargs=(runtime_factory, block_types)
+    ) as executor:
+        futures = [
+            executor.submit(_export_block_in_worker, usage_id, path, pretty_print, compresslevel, trace_memory)
+            for usage_id, path in zip(usage_ids, paths)
+        ]
+        for future in futures:
+            yield future.result()
+
+
+def import_callable(path):
+    """Return the callable named by `path`, as ``package.module:name``."""
+    module_name, _, name = path.partition(':')
+    if not name:
+        raise ValueError(f"{path!r} isn't of the form package.module:name")
+    return getattr(importlib.import_module(module_name), name)
+
+
+def main(argv=None):
+    """
+    Export blocks from the command line, printing the time and size of each export, and its peak memory if traced.
+
+    Returns 1 if any export failed, else 0.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('usage_ids', nargs='*', help="usage ids of the blocks to export")
+    parser.add_argument('--usage-ids-file', help="file listing more usage ids, one per line")
+    parser.add_argument(
+        '--runtime-factory', required=True,
+        help="package.module:name of a callable returning the runtime to export with",
+    )
+    parser.add_argument('--output-dir', default='.', help="directory to write the .xml.gz files to")
+    parser.add_argument('--processes', type=int, default=None, help="number of worker processes (0 for none)")
+    parser.add_argument('--pretty', action='store_true', help="indent the XML")
+    parser.add_argument('--compress-level', type=int, default=6, help="gzip compression level, from 1 to 9")
+    parser.add_argument('--block-types', nargs='*', help="block types to warm up (default: all installed)")
+    parser.add_argument(
+        '--trace-memory', action='store_true', help="measure the peak memory of each export (slower)",
+    )
+    args = parser.parse_args(argv)
+
+    usage_ids = list(args.usage_ids)
+    if args.usage_ids_file:
+        with open(args.usage_ids_file, encoding='utf-8') as usage_ids_file:
+            usage_ids.extend(line.strip() for line in usage_ids_file if line.strip())
+    if not usage_ids:
+        parser.error("no usage ids to export")
+
+    failed = 0
+    start = time.perf_counter()
+    results = export_blocks(
+        usage_ids, args.output_dir, import_callable(args.runtime_factory), processes=args.processes,
+        pretty_print=args.pretty, compresslevel=args.compress_level, block_types=args.block_types,
+        trace_memory=args.trace_memory,
+    )
+    for result in results:
+        if result.error:
+            failed += 1
+            print(f"{result.usage_id}: failed after {result.seconds * 1000:.3f} ms: {result.error}")
+        else:
+            peak_memory = '' if result.peak_memory is None else f" peak memory {result.peak_memory / 2 ** 20:.3f} MiB,"
+            print(
+                f"{result.usage_id}: {result.seconds * 1000:.3f} ms,{peak_memory}"
+                f" {result.size / 2 ** 10:.1f} KiB to {result.path}"
+            )
+    print(f"Exported {len(usage_ids) - failed} of {len(usage_ids)} blocks in {time.perf_counter() - start:.3f} s")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,7 +9,7 @@ import copy
 from abc import ABCMeta, abstractmethod
 from collections import defaultdict
 
-from xblock.exceptions import InvalidScopeError
+from xblock.exceptions import InvalidScopeError, KeyValueMultiBlockSaveError, KeyValueMultiSaveError
 
 
 class FieldData(metaclass=ABCMeta):
@@ -87,6 +87,51 @@ class FieldData(metaclass=ABCMeta):
         for key, value in update_dict.items():
             self.set(block, key, value)
 
+    def set_many_blocks(self, block_updates):
+        """
+        Update fields on many XBlocks together.
+
+        Implementations which can write the fields of several blocks in one
+        operation should override this. The default implementation calls
+        `set_many` for each block, carrying on past blocks which fail with
+        :class:`~xblock.exceptions.KeyValueMultiSaveError`.
+
+        :param block_updates: pairs of a block and a map of its field names to their new values
+        :type block_updates: list of (:class:`~xblock.core.XBlock`, dict)
+        :raises KeyValueMultiBlockSaveError: if some of the blocks weren't fully saved
+        """
+        failed = {}
+        for block, update_dict in block_updates:
+            try:
+                self.set_many(block, update_dict)
+            except KeyValueMultiSaveError as save_error:
+                failed[block] = save_error.saved_field_names
+        if failed:
+            raise KeyValueMultiBlockSaveError(failed)
+
+    # Whether patch_many can apply JSON patches more cheaply than set_many writes whole values.
+    supports_json_patch = False
+
+    def patch_many(self, block, update_dict, patches):  # pylint: disable=unused-argument
+        """
+        Update many fields on an XBlock simultaneously, given patches for some of them.
+
+        `patches` maps some of the field names in `update_dict` to JSON patches
+        (see :func:`~xblock.fields.make_json_patch`) from their previously
+        stored values to their new ones. Implementations which set
+        `supports_json_patch` may apply those patches instead of writing the
+        whole values, which are still provided, e.g. for fields they hold no
+        value for. This default implementation ignores the patches.
+
+        :param block: the block to update
+        :type block: :class:`~xblock.core.XBlock`
+        :param update_dict: A map of field names to their new values
+        :type update_dict: dict
+        :param patches: A map of field names to JSON patches
+        :type patches: dict
+        """
+        self.set_many(block, update_dict)
+
     def default(self, block, name):
         """
         Get the default value for this field which may depend on context or may just be the field's global
@@ -165,6 +210,44 @@ class SplitFieldData(FieldData):
         for field_data, new_update_dict in update_dicts.items():
             field_data.set_many(block, new_update_dict)
 
+    def set_many_blocks(self, block_updates):
+        split_updates = defaultdict(list)
+        for block, update_dict in block_updates:
+            update_dicts = defaultdict(dict)
+            for key, value in update_dict.items():
+                update_dicts[self._field_data(block, key)][key] = value
+            for field_data, new_update_dict in update_dicts.items():
+                split_updates[field_data].append((block, new_update_dict))
+
+        saved = defaultdict(set)
+        failed = set()
+        for field_data, new_block_updates in split_updates.items():
+            try:
+                field_data.set_many_blocks(new_block_updates)
+                saved_here = {}
+            except KeyValueMultiBlockSaveError as save_error:
+                saved_here = save_error.saved_field_names
+            for block, new_update_dict in new_block_updates:
+                if block in saved_here:
+                    failed.add(block)
+                    saved[block].update(saved_here[block])
+                else:
+                    saved[block].update(new_update_dict)
+        if failed:
+            raise KeyValueMultiBlockSaveError({block: saved[block] for block in failed})
+
+    @property
+    def supports_json_patch(self):
+        return any(getattr(field_data, 'supports_json_patch', False) for field_data in self._scope_mappings.values())
+
+    def patch_many(self, block, update_dict, patches):
+        update_dicts = defaultdict(dict)
+        for key, value in update_dict.items():
+            update_dicts[self._field_data(block, key)][key] = value
+        for field_data, new_update_dict in update_dicts.items():
+            new_patches = {key: patch for key, patch in patches.items() if key in new_update_dict}
+            field_data.patch_many(block, new_update_dict, new_patches)
+
     def delete(self, block, name):
         self._field_data(block, name).delete(block, name)
 
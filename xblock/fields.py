@@ -5,10 +5,11 @@ The hosting runtime application decides what actual storage mechanism to use
 for each scope.
 
 """
-from collections import namedtuple
+from collections import Counter, defaultdict, namedtuple
 import copy
 import datetime
 import hashlib
+import io
 import itertools
 import json
 import logging
@@ -23,6 +24,7 @@ import pytz
 import yaml
 from pytz import UTC
 
+from xblock.internal import xml_parser
 from xblock.scorable import Score
 
 log = logging.getLogger(__name__)
@@ -34,6 +36,7 @@ __all__ = [
     'Field',
     'Boolean', 'Dict', 'Float', 'Integer', 'List', 'Set', 'String', 'XMLString',
     "Date", "DateTime", "Timedelta", "RelativeTime", "ScoreField", "ListScoreField",
+    "Blob", "BlobRef",
 ]
 
 
@@ -49,6 +52,58 @@ class ModifyingEnforceTypeWarning(DeprecationWarning):
     """
 
 
+class _ShadowTypeEnforcement:
+    """
+    Process-wide settings and counters for the type checks made on fields without ``enforce_type``.
+
+    See :func:`configure_shadow_type_enforcement`.
+    """
+    def __init__(self):
+        self.enabled = True
+        self.sample_every = 1
+        self.aggregate = False
+        self.counts = defaultdict(Counter)
+
+
+_SHADOW_TYPE_ENFORCEMENT = _ShadowTypeEnforcement()
+
+
+def configure_shadow_type_enforcement(enabled=True, sample_every=1, aggregate=False):
+    """
+    Configure the shadow type checks made when setting fields that don't have ``enforce_type``.
+
+    By default, every set calls the field's `enforce_type` and issues a
+    :class:`FailingEnforceTypeWarning` or :class:`ModifyingEnforceTypeWarning` when
+    enforcing the type would have failed or changed the value. That helps migrating
+    fields to ``enforce_type=True``, but costs time on every set in production.
+
+    Arguments:
+        enabled (bool): whether to make the checks at all.
+        sample_every (int): check only one in every `sample_every` sets of each field.
+        aggregate (bool): instead of issuing warnings, count checks and their
+            outcomes, to be read with :func:`shadow_type_enforcement_counts`.
+    """
+    if sample_every < 1:
+        raise ValueError(f"sample_every must be at least 1, not {sample_every!r}")
+    _SHADOW_TYPE_ENFORCEMENT.enabled = enabled
+    _SHADOW_TYPE_ENFORCEMENT.sample_every = sample_every
+    _SHADOW_TYPE_ENFORCEMENT.aggregate = aggregate
+
+
+def shadow_type_enforcement_counts(reset=False):
+    """
+    Return the counts collected while shadow type checks are aggregated.
+
+    Returns:
+        dict: maps ``(field_class_name, field_name)`` to a dict with the number of
+        values ``checked``, and how many of them were ``failing`` or ``modifying``.
+    """
+    counts = {key: dict(counter) for key, counter in _SHADOW_TYPE_ENFORCEMENT.counts.items()}
+    if reset:
+        _SHADOW_TYPE_ENFORCEMENT.counts.clear()
+    return counts
+
+
 class Sentinel:
     """
     Class for implementing sentinel objects (only equal to themselves).
@@ -309,6 +364,12 @@ class Field:
         force_export: if set, the field value will be exported to XML even if normal
             export conditions are not met (i.e. the field has no explicit value set)
 
+        lazy: if set, container values read from the field data are decoded on
+            first access to each of their items rather than all at once, and
+            are tracked for in-place changes instead of being deep-copied to
+            detect them (default: False). Only :class:`.Dict` and
+            :class:`.List` fields currently decode lazily.
+
         kwargs: optional runtime-specific options/metadata. Will be stored as
             runtime_options.
 
@@ -317,16 +378,19 @@ class Field:
     _default = None
     # Indicates if a field's None value should be sent to the XML representation.
     none_to_xml = False
+    # Number of sets seen while shadow type checks are sampled.
+    _shadow_enforce_type_sets = 0
 
     __name__ = None
 
     # We're OK redefining built-in `help`
     def __init__(self, help=None, default=UNSET, scope=Scope.content,  # pylint:disable=redefined-builtin
                  display_name=None, values=None, enforce_type=False,
-                 xml_node=False, force_export=False, **kwargs):
+                 xml_node=False, force_export=False, lazy=False, **kwargs):
         self.warned = False
         self.help = help
         self._enable_enforce_type = enforce_type
+        self.lazy = lazy
         if default is not UNSET:
             if default is UNIQUE_ID:
                 self._default = UNIQUE_ID
@@ -429,7 +493,19 @@ class Field:
         # Deep copy the value being marked as dirty, so that there
         # is a baseline to check against when saving later
         if self not in xblock._dirty_fields:
-            xblock._dirty_fields[self] = copy.deepcopy(value)
+            xblock._dirty_fields[self] = self._dirty_baseline(value)
+
+    def _dirty_baseline(self, value):
+        """
+        Return the baseline that `value` is compared against to decide whether it needs saving.
+
+        Lazily decoded containers track their own modifications, so they serve as
+        their own baseline instead of being deep-copied.
+        """
+        if isinstance(value, LazyJSONContainer):
+            value.mark_clean()
+            return value
+        return copy.deepcopy(value)
 
     def _is_dirty(self, xblock):
         """
@@ -440,7 +516,12 @@ class Field:
             return False
 
         baseline = xblock._dirty_fields[self]
-        return baseline is EXPLICITLY_SET or xblock._field_data_cache[self.name] != baseline
+        if baseline is EXPLICITLY_SET:
+            return True
+        value = xblock._field_data_cache[self.name]
+        if isinstance(baseline, LazyJSONContainer) and value is baseline:
+            return baseline.modified
+        return value != baseline
 
     def _is_lazy(self, value):
         """
@@ -457,25 +538,45 @@ class Field:
         To aid with migration, enable the warnings with:
             warnings.simplefilter("always", FailingEnforceTypeWarning)
             warnings.simplefilter("always", ModifyingEnforceTypeWarning)
+
+        The check on fields without enforce_type can be disabled, sampled or
+        counted instead with `configure_shadow_type_enforcement`.
         """
         if self._enable_enforce_type:
             return self.enforce_type(value)
 
+        shadowing = _SHADOW_TYPE_ENFORCEMENT
+        if not shadowing.enabled:
+            return value
+        if shadowing.sample_every > 1:
+            self._shadow_enforce_type_sets += 1
+            if self._shadow_enforce_type_sets % shadowing.sample_every:
+                return value
+        if shadowing.aggregate:
+            counts = shadowing.counts[(self.__class__.__name__, self.name)]
+            counts['checked'] += 1
+
         try:
             new_value = self.enforce_type(value)
         except:  # pylint: disable=bare-except
-            message = "The value {!r} could not be enforced ({})".format(
-                value, traceback.format_exc().splitlines()[-1])
-            warnings.warn(message, FailingEnforceTypeWarning, stacklevel=3)
+            if shadowing.aggregate:
+                counts['failing'] += 1
+            else:
+                message = "The value {!r} could not be enforced ({})".format(
+                    value, traceback.format_exc().splitlines()[-1])
+                warnings.warn(message, FailingEnforceTypeWarning, stacklevel=3)
         else:
             try:
                 equal = value == new_value
             except TypeError:
                 equal = False
             if not equal:
-                message = "The value {!r} would be enforced to {!r}".format(
-                    value, new_value)
-                warnings.warn(message, ModifyingEnforceTypeWarning, stacklevel=3)
+                if shadowing.aggregate:
+                    counts['modifying'] += 1
+                else:
+                    message = "The value {!r} would be enforced to {!r}".format(
+                        value, new_value)
+                    warnings.warn(message, ModifyingEnforceTypeWarning, stacklevel=3)
 
         return value
 
@@ -523,7 +624,10 @@ class Field:
         value = self._get_cached_value(xblock)
         if value is NO_CACHE_VALUE:
             if field_data.has(xblock, self.name):
-                value = self.from_json(field_data.get(xblock, self.name))
+                if self.lazy:
+                    value = self._lazy_from_json(field_data.get(xblock, self.name))
+                else:
+                    value = self.from_json(field_data.get(xblock, self.name))
             elif self.name not in NO_GENERATED_DEFAULTS:
                 # Cache default value
                 value = self._get_default_value_to_cache(xblock)
@@ -627,6 +731,15 @@ class Field:
         self._warn_deprecated_outside_JSONField()
         return value
 
+    def _lazy_from_json(self, value):
+        """
+        Return value as a native python type whose decoding may be deferred until it is used.
+
+        Called instead of `from_json` for fields declared with ``lazy=True``. Field types
+        that can't decode lazily just decode eagerly.
+        """
+        return self.from_json(value)
+
     def to_string(self, value):
         """
         Return a JSON serialized string representation of the value.
@@ -785,6 +898,428 @@ class Boolean(JSONField):
     enforce_type = from_json
 
 
+class LazyJSONContainer:
+    """
+    Mixin for the containers returned by fields declared with ``lazy=True``.
+
+    A lazy container holds the raw JSON payload read from the field data, and
+    only wraps a nested container when it is first accessed. Every nested
+    container shares its `root` with the container it was read from, so that a
+    change anywhere in the structure marks the whole value as modified.
+    """
+    def __init__(self, raw, root=None):
+        super().__init__(raw)
+        self._root = self if root is None else root
+        self._modified = False
+
+    def _wrap(self, value):
+        """Return `value`, wrapped in a lazy container if it is a raw JSON container."""
+        value_type = type(value)
+        if value_type is dict:
+            return LazyJSONDict(value, self._root)
+        if value_type is list:
+            return LazyJSONList(value, self._root)
+        return value
+
+    def _touch(self):
+        """Record that the value has been changed in place."""
+        self._root._modified = True  # pylint: disable=protected-access
+
+    @property
+    def modified(self):
+        """Whether the value has been changed in place since it was read or last saved."""
+        return self._root._modified  # pylint: disable=protected-access
+
+    def mark_clean(self):
+        """Forget any in-place changes, e.g. once the value has been saved."""
+        self._root._modified = False  # pylint: disable=protected-access
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(to_plain_json(self), memo)
+
+    def __reduce__(self):
+        return (type(to_plain_json(self)), (to_plain_json(self),))
+
+
+class LazyJSONDict(LazyJSONContainer, dict):
+    """
+    A dict whose nested containers are wrapped on first access. See :class:`.LazyJSONContainer`.
+    """
+    def _wrap_all(self):
+        """Wrap every nested container, before handing out a view of them."""
+        for key, value in dict.items(self):
+            wrapped = self._wrap(value)
+            if wrapped is not value:
+                dict.__setitem__(self, key, wrapped)
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        wrapped = self._wrap(value)
+        if wrapped is not value:
+            dict.__setitem__(self, key, wrapped)
+        return wrapped
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    # Overriding __iter__ and keys() makes dict(value) and {**value} copy
+    # through __getitem__, which wraps, instead of reading the raw values.
+    def __iter__(self):
+        return dict.__iter__(self)
+
+    def keys(self):
+        return dict.keys(self)
+
+    def values(self):
+        self._wrap_all()
+        return dict.values(self)
+
+    def items(self):
+        self._wrap_all()
+        return dict.items(self)
+
+    def copy(self):
+        self._wrap_all()
+        return dict(self)
+
+    def __or__(self, other):
+        self._wrap_all()
+        return dict.__or__(self, other)
+
+    def __setitem__(self, key, value):
+        self._touch()
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._touch()
+        dict.__delitem__(self, key)
+
+    def __ior__(self, other):
+        self._touch()
+        return dict.__ior__(self, other)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *args):
+        if key in self:
+            self._touch()
+            return dict.pop(self, key)
+        return dict.pop(self, key, *args)
+
+    def popitem(self):
+        self._touch()
+        key, value = dict.popitem(self)
+        return key, self._wrap(value)
+
+    def update(self, *args, **kwargs):
+        self._touch()
+        dict.update(self, *args, **kwargs)
+
+    def clear(self):
+        self._touch()
+        dict.clear(self)
+
+
+class LazyJSONList(LazyJSONContainer, list):
+    """
+    A list whose nested containers are wrapped on first access. See :class:`.LazyJSONContainer`.
+    """
+    def _wrap_all(self):
+        """Wrap every nested container, before handing out a copy of them."""
+        for index, value in enumerate(list.__iter__(self)):
+            wrapped = self._wrap(value)
+            if wrapped is not value:
+                list.__setitem__(self, index, wrapped)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            self._wrap_all()
+            return list.__getitem__(self, index)
+        value = list.__getitem__(self, index)
+        wrapped = self._wrap(value)
+        if wrapped is not value:
+            list.__setitem__(self, index, wrapped)
+        return wrapped
+
+    def __iter__(self):
+        index = 0
+        while index < len(self):
+            yield self[index]
+            index += 1
+
+    def __reversed__(self):
+        self._wrap_all()
+        return list.__reversed__(self)
+
+    def copy(self):
+        self._wrap_all()
+        return list(list.__iter__(self))
+
+    def __add__(self, other):
+        self._wrap_all()
+        return list.__add__(self, other)
+
+    def __mul__(self, count):
+        self._wrap_all()
+        return list.__mul__(self, count)
+
+    __rmul__ = __mul__
+
+    def __setitem__(self, index, value):
+        self._touch()
+        list.__setitem__(self, index, value)
+
+    def __delitem__(self, index):
+        self._touch()
+        list.__delitem__(self, index)
+
+    def __iadd__(self, other):
+        self._touch()
+        return list.__iadd__(self, other)
+
+    def __imul__(self, count):
+        self._touch()
+        return list.__imul__(self, count)
+
+    def append(self, value):
+        self._touch()
+        list.append(self, value)
+
+    def extend(self, values):
+        self._touch()
+        list.extend(self, values)
+
+    def insert(self, index, value):
+        self._touch()
+        list.insert(self, index, value)
+
+    def remove(self, value):
+        self._touch()
+        list.remove(self, value)
+
+    def pop(self, index=-1):
+        self._touch()
+        return self._wrap(list.pop(self, index))
+
+    def clear(self):
+        self._touch()
+        list.clear(self)
+
+    def sort(self, *args, **kwargs):
+        self._touch()
+        list.sort(self, *args, **kwargs)
+
+    def reverse(self):
+        self._touch()
+        list.reverse(self)
+
+
+class IndexedList(list):
+    """
+    A list which answers ``in`` from a set of its items.
+
+    The set is built by the first membership test, kept up to date by
+    :meth:`append` and :meth:`extend`, and dropped by any other change. Lists
+    with unhashable items fall back to scanning.
+    """
+    __slots__ = ('_index',)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._index = None
+
+    def __contains__(self, value):
+        if self._index is None:
+            try:
+                self._index = set(list.__iter__(self))
+            except TypeError:
+                return list.__contains__(self, value)
+        try:
+            return value in self._index
+        except TypeError:
+            return list.__contains__(self, value)
+
+    def _drop_index(self):
+        """Forget the index, after a change it can't follow."""
+        self._index = None
+
+    def append(self, value):
+        list.append(self, value)
+        if self._index is not None:
+            try:
+                self._index.add(value)
+            except TypeError:
+                self._index = None
+
+    def extend(self, values):
+        start = len(self)
+        list.extend(self, values)
+        if self._index is not None:
+            try:
+                self._index.update(list.__getitem__(self, slice(start, None)))
+            except TypeError:
+                self._index = None
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __setitem__(self, index, value):
+        self._drop_index()
+        list.__setitem__(self, index, value)
+
+    def __delitem__(self, index):
+        self._drop_index()
+        list.__delitem__(self, index)
+
+    def __imul__(self, count):
+        self._drop_index()
+        return list.__imul__(self, count)
+
+    def insert(self, index, value):
+        self._drop_index()
+        list.insert(self, index, value)
+
+    def remove(self, value):
+        self._drop_index()
+        list.remove(self, value)
+
+    def pop(self, index=-1):
+        self._drop_index()
+        return list.pop(self, index)
+
+    def clear(self):
+        self._drop_index()
+        list.clear(self)
+
+    def __deepcopy__(self, memo):
+        return IndexedList(copy.deepcopy(list(self), memo))
+
+    def __reduce__(self):
+        return (IndexedList, (list(self),))
+
+
+def to_plain_json(value):
+    """
+    Return `value` with any lazy containers replaced by plain dicts and lists.
+
+    Nested values that were never accessed are still raw, and are reused as-is.
+    """
+    if isinstance(value, LazyJSONDict):
+        return {key: to_plain_json(item) for key, item in dict.items(value)}
+    if isinstance(value, LazyJSONList):
+        return [to_plain_json(item) for item in list.__iter__(value)]
+    return value
+
+
+def _json_size_default(value):
+    """Stand in for values that `json` can't serialize, when measuring serialized sizes."""
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+def serialized_size(value):
+    """
+    Return the size in bytes of `value`, as returned by a field's `to_json`, when serialized as JSON.
+
+    Values that aren't JSON-serializable, such as the sets of :class:`.Set` fields,
+    are measured as lists or as their string representation.
+    """
+    serialized = json.dumps(to_plain_json(value), default=_json_size_default, ensure_ascii=False, separators=(',', ':'))
+    return len(serialized.encode('utf-8'))
+
+
+def _json_pointer(path, token):
+    """Return the JSON pointer `path` extended with the reference `token`."""
+    return path + '/' + str(token).replace('~', '~0').replace('/', '~1')
+
+
+def make_json_patch(old, new, path=''):
+    """
+    Return a JSON patch (RFC 6902): a list of operations which turns the JSON value `old` into `new`.
+
+    Only ``add``, ``remove`` and ``replace`` operations are used. Dicts are
+    compared key by key, and lists index by index, so appending to a list or
+    changing a nested value makes a small patch; other changes to a list may
+    not be the smallest possible.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        patch = [{'op': 'remove', 'path': _json_pointer(path, key)} for key in old if key not in new]
+        for key, value in new.items():
+            if key in old:
+                patch.extend(make_json_patch(old[key], value, _json_pointer(path, key)))
+            else:
+                patch.append({'op': 'add', 'path': _json_pointer(path, key), 'value': value})
+        return patch
+    if isinstance(old, list) and isinstance(new, list):
+        patch = []
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            patch.extend(make_json_patch(old_item, new_item, _json_pointer(path, index)))
+        patch.extend(
+            {'op': 'remove', 'path': _json_pointer(path, index)}
+            for index in range(len(old) - 1, len(new) - 1, -1)
+        )
+        patch.extend(
+            {'op': 'add', 'path': _json_pointer(path, index), 'value': new[index]}
+            for index in range(len(old), len(new))
+        )
+        return patch
+    if type(old) is not type(new) or old != new:
+        return [{'op': 'replace', 'path': path, 'value': new}]
+    return []
+
+
+def apply_json_patch(document, patch):
+    """
+    Apply the JSON patch `patch`, as made by :func:`make_json_patch`, to `document`.
+
+    The containers in `document` are changed in place. Returns the patched
+    document, which is a new value if the patch replaces the whole of it.
+    Raises ValueError if an operation is unsupported or doesn't fit `document`.
+    """
+    for operation in patch:
+        op, path = operation['op'], operation['path']
+        if op not in ('add', 'remove', 'replace'):
+            raise ValueError(f"Unsupported JSON patch operation {op!r}")
+        if path == '':
+            if op == 'remove':
+                raise ValueError("Can't remove the whole document")
+            document = copy.deepcopy(operation['value'])
+            continue
+
+        *parents, last = [token.replace('~1', '/').replace('~0', '~') for token in path.split('/')[1:]]
+        try:
+            target = document
+            for token in parents:
+                target = target[int(token)] if isinstance(target, list) else target[token]
+            if isinstance(target, list):
+                index = len(target) if last == '-' else int(last)
+                if index < 0:
+                    raise IndexError(index)
+                if op == 'add':
+                    if index > len(target):
+                        raise IndexError(index)
+                    target.insert(index, copy.deepcopy(operation['value']))
+                elif op == 'remove':
+                    del target[index]
+                else:
+                    target[index] = copy.deepcopy(operation['value'])
+            else:
+                if op != 'add' and last not in target:
+                    raise KeyError(last)
+                if op == 'remove':
+                    del target[last]
+                else:
+                    target[last] = copy.deepcopy(operation['value'])
+        except (IndexError, KeyError, TypeError, ValueError) as error:
+            raise ValueError(f"Can't apply JSON patch operation {operation!r}: {error!r}") from error
+    return document
+
+
 class Dict(JSONField):
     """
     A field class for representing a Python dict.
@@ -802,6 +1337,15 @@ class Dict(JSONField):
 
     enforce_type = from_json
 
+    def _lazy_from_json(self, value):
+        value = self.from_json(value)
+        if type(value) is dict:  # pylint: disable=unidiomatic-typecheck
+            return LazyJSONDict(value)
+        return value
+
+    def to_json(self, value):
+        return to_plain_json(value)
+
     def to_string(self, value):
         """
         In python3, json.dumps() cannot sort keys of different types,
@@ -832,6 +1376,15 @@ class List(JSONField):
 
     enforce_type = from_json
 
+    def _lazy_from_json(self, value):
+        value = self.from_json(value)
+        if type(value) is list:  # pylint: disable=unidiomatic-typecheck
+            return LazyJSONList(value)
+        return value
+
+    def to_json(self, value):
+        return to_plain_json(value)
+
 
 class Set(JSONField):
     """
@@ -943,7 +1496,7 @@ class XMLString(String):
 
     def enforce_type(self, value):
         if value is not None:
-            etree.XML(value)
+            etree.XML(value, xml_parser())
         return value
 
 
@@ -1302,6 +1855,23 @@ class ReferenceList(List):
     # this could define from_json and to_json as list comprehensions calling from/to_json on the list elements,
     # but since Reference doesn't stipulate a definition for from/to, that seems unnecessary at this time.
 
+    def __get__(self, xblock, xblock_class):
+        """
+        Return the list of references as an :class:`IndexedList`, so that testing
+        whether a reference is in it doesn't scan the whole list.
+        """
+        value = super().__get__(xblock, xblock_class)
+        if type(value) is list:  # pylint: disable=unidiomatic-typecheck
+            value = IndexedList(value)
+            self._set_cached_value(xblock, value)
+        return value
+
+    def to_json(self, value):
+        value = super().to_json(value)
+        if isinstance(value, IndexedList):
+            return list(value)
+        return value
+
 
 class ReferenceValueDict(Dict):
     """
@@ -1375,6 +1945,167 @@ class ListScoreField(ScoreField, List):
         raise TypeError(f"Value must be a list of Scores. Got {type(value)}")
 
     enforce_type = from_json
+    # Scores are decoded from their items, so they can't be left raw.
+    _lazy_from_json = from_json
+
+
+class BlobRef:
+    """
+    A reference to a content-addressed blob stored outside of the field data.
+
+    Only `digest` (e.g. ``"sha256:<hex>"``) is kept in the KVS. The content is
+    fetched from `store` (the runtime's ``blob`` service) on demand: nothing is
+    opened until `open`, `read` or `buffer` is called.
+
+    A reference made with `content` (bytes, a str or a binary file-like object)
+    rather than a digest is pending: the content is only written to `store`
+    when `digest` is first needed, which is when the block holding it is
+    saved. Until then, bytes and str content is read from memory, and
+    references are compared and hashed by that content (or by identity, for
+    file-like content).
+    """
+
+    def __init__(self, digest, store=None, content=None):
+        self._digest = digest
+        self.store = store
+        self._content = content
+        self._buffer = None
+
+    @property
+    def digest(self):
+        """The digest naming the content, which stores the content first if it is pending."""
+        if self._digest is None:
+            self._digest = self._get_store().put(self._content).digest
+            self._content = None
+        return self._digest
+
+    @property
+    def pending(self):
+        """Whether the content hasn't been written to the store yet."""
+        return self._digest is None
+
+    def _pending_bytes(self):
+        """Return the pending content, if it is held in memory, as bytes, else None."""
+        if not self.pending or not isinstance(self._content, (str, bytes, bytearray, memoryview)):
+            return None
+        if isinstance(self._content, str):
+            return self._content.encode('utf-8')
+        return bytes(self._content)
+
+    def _get_store(self):
+        """Return the store holding this blob's content."""
+        if self.store is None:
+            raise ValueError(f"{self!r} is not bound to a blob store")
+        return self.store
+
+    @property
+    def size(self):
+        """The length of the content, in bytes."""
+        content = self._pending_bytes()
+        if content is not None:
+            return len(content)
+        return self._get_store().size(self.digest)
+
+    def open(self):
+        """Open the content as a binary file. The caller must close it."""
+        content = self._pending_bytes()
+        if content is not None:
+            return io.BytesIO(content)
+        return self._get_store().open(self.digest)
+
+    def read(self):
+        """Return the whole content as bytes."""
+        with self.open() as blob_file:
+            return blob_file.read()
+
+    def buffer(self):
+        """
+        Return a read-only buffer over the content, memory-mapped by the store
+        if it can be.
+
+        The buffer is opened on first use and shared by later calls until
+        `close` is called.
+        """
+        if self._buffer is None:
+            content = self._pending_bytes()
+            self._buffer = self._get_store().mmap(self.digest) if content is None else content
+        return self._buffer
+
+    def close(self):
+        """Release the buffer returned by `buffer`, if any."""
+        if self._buffer is not None and hasattr(self._buffer, 'close'):
+            self._buffer.close()
+        self._buffer = None
+
+    def __bytes__(self):
+        return self.read()
+
+    def __eq__(self, other):
+        if other is self:
+            return True
+        if not isinstance(other, BlobRef):
+            return NotImplemented
+        if self.pending or other.pending:
+            # Comparing mustn't write pending content to the store, which only saving does.
+            content = self._pending_bytes()
+            return content is not None and content == other._pending_bytes()
+        return self.digest == other.digest
+
+    def __hash__(self):
+        if self.pending:
+            content = self._pending_bytes()
+            return hash(content) if content is not None else object.__hash__(self)
+        return hash(self.digest)
+
+    def __repr__(self):
+        if self.pending:
+            return "BlobRef(<pending>)"
+        return f"BlobRef({self.digest!r})"
+
+
+class Blob(JSONField):
+    """
+    A field for large binary or text payloads, stored out-of-line.
+
+    Setting the field to bytes, a str (stored as UTF-8) or a binary file-like
+    object gives it a pending `BlobRef` to that content, which is written to
+    the runtime's ``blob`` service, which must be declared with
+    ``XBlock.needs('blob')``, when the block is saved. Only the blob's digest is
+    saved in the field data, so saving, copying and exporting the block never
+    handle the content itself, and blocks which are never saved leave no blob.
+
+    `xblock.reference.plugins.LocalBlobService` is a reference implementation
+    of the service backed by a local directory.
+    """
+
+    MUTABLE = False
+    _DIGEST_RE = re.compile(r'^[a-z0-9]+:[0-9a-f]+$')
+
+    def from_json(self, value):
+        if value is None or isinstance(value, BlobRef):
+            return value
+        if isinstance(value, str) and self._DIGEST_RE.match(value):
+            return BlobRef(value)
+        raise TypeError(f"Value stored in a Blob field must be a blob digest, found {value!r}")
+
+    def to_json(self, value):
+        value = self.from_json(value)
+        return None if value is None else value.digest
+
+    enforce_type = from_json
+
+    def __get__(self, xblock, xblock_class):
+        value = super().__get__(xblock, xblock_class)
+        if isinstance(value, BlobRef) and value.store is None:
+            value.store = xblock.runtime.service(xblock, 'blob')
+        return value
+
+    def __set__(self, xblock, value):
+        if value is not None and not isinstance(value, BlobRef):
+            if not isinstance(value, (str, bytes, bytearray, memoryview)) and not hasattr(value, 'read'):
+                raise TypeError(f"Can't store a {type(value).__name__} as a blob")
+            value = BlobRef(None, xblock.runtime.service(xblock, 'blob'), content=value)
+        super().__set__(xblock, value)
 
 
 def scope_key(instance, xblock):
@@ -2,6 +2,11 @@
 Internal machinery used to make building XBlock family base classes easier.
 """
 import functools
+import threading
+import weakref
+from collections import OrderedDict
+
+from lxml import etree
 
 
 class LazyClassProperty:
@@ -27,3 +32,109 @@ class LazyClassProperty:
 
 
 class_lazy = LazyClassProperty  # pylint: disable=invalid-name
+
+
+def uses_default_methods(instance, cls, *names):
+    """
+    Return whether `instance` uses the methods `names` of `cls`, rather than overriding them.
+
+    Methods replaced on `instance` itself (e.g. by ``mock.patch.object``) count as overridden.
+    """
+    return all(getattr(getattr(instance, name), '__func__', None) is getattr(cls, name) for name in names)
+
+
+_MISSING = object()
+
+
+class BlockCache:
+    """
+    A cache of blocks by key, which keeps the `max_size` most recently used blocks
+    alive, and only weak references to the others.
+
+    A block that is evicted can still be returned while something else keeps it
+    alive, so that evicting it doesn't create a second instance of a block that
+    is in use. Values that can't be weakly referenced are only kept while they
+    are among the most recently used. If `max_size` is None, every block is kept.
+    """
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self._recent = OrderedDict()
+        self._weak = weakref.WeakValueDictionary()
+
+    def get(self, key, default=None):
+        """Return the block cached for `key`, or `default`, marking it as recently used."""
+        value = self._recent.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._weak.get(key, _MISSING)
+            if value is _MISSING:
+                return default
+        self._keep(key, value)
+        return value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        try:
+            self._weak[key] = value
+        except TypeError:
+            self._weak.pop(key, None)
+        self._keep(key, value)
+
+    def __contains__(self, key):
+        return key in self._recent or key in self._weak
+
+    def __len__(self):
+        return len(self._recent.keys() | self._weak.keys())
+
+    def _keep(self, key, value):
+        """Keep `value` alive as the most recently used block."""
+        self._recent[key] = value
+        self._recent.move_to_end(key)
+        if self.max_size is not None:
+            while len(self._recent) > self.max_size:
+                self._recent.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove `key` from the cache, returning its block or `default`."""
+        value = self._recent.pop(key, _MISSING)
+        weak_value = self._weak.pop(key, _MISSING)
+        if value is _MISSING:
+            value = weak_value
+        return default if value is _MISSING else value
+
+    def clear(self):
+        """Remove every block from the cache."""
+        self._recent.clear()
+        self._weak.clear()
+
+
+# The options of the lxml parsers of OLX: no network access and no expansion of
+# entities, which untrusted OLX could abuse, and no limit on the depth of the
+# tree or the size of text, which the largest courses go over.
+XML_PARSER_OPTIONS = {'resolve_entities': False, 'no_network': True, 'huge_tree': True}
+
+
+# The parsers made by xml_parser in each thread, by their options.
+_XML_PARSERS = threading.local()
+
+
+def xml_parser(options=None):
+    """
+    Return the ``lxml.etree.XMLParser`` with `options` (``XML_PARSER_OPTIONS`` by default).
+
+    Each parser is made once per thread, and shared by every caller in that
+    thread with the same options, as lxml parsers can't be used by several
+    threads at once.
+    """
+    key = tuple(sorted((XML_PARSER_OPTIONS if options is None else options).items()))
+    parsers = getattr(_XML_PARSERS, 'parsers', None)
+    if parsers is None:
+        parsers = _XML_PARSERS.parsers = {}
+    parser = parsers.get(key)
+    if parser is None:
+        parser = parsers[key] = etree.XMLParser(**dict(key))
+    return parser
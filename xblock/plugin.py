@@ -181,6 +181,22 @@ class Plugin:
 
         return PLUGIN_CACHE[key]
 
+    @classmethod
+    def available_identifiers(cls):
+        """Return the sorted identifiers of all the available plugins, without loading them.
+
+        This includes identifiers which are only provided by the ``overrides``
+        entry point group of the plugin's `entry_point` (e.g. ``xblock.v1.overrides``),
+        and those of temporary plugins from `register_temp_plugin`.
+        """
+        identifiers = {
+            entry_point.name.lower()
+            for group in (f'{cls.entry_point}.overrides', cls.entry_point)
+            for entry_point in importlib.metadata.entry_points(group=group)
+        }
+        identifiers.update(identifier.lower() for identifier, _ in iter(cls.extra_entry_points))
+        return sorted(identifiers)
+
     @classmethod
     def load_classes(cls, fail_silently=True):
         """Load all the classes for a plugin.
@@ -6,6 +6,12 @@ The README file in this directory contains much more information.
 
 Much of this still needs to be organized.
 """
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+
 try:
     from django.core.exceptions import ImproperlyConfigured
 except ImportError:
@@ -26,7 +32,7 @@ except ImproperlyConfigured:
     print("Warning! Django is not correctly configured.")
     djpyfs = None  # pylint: disable=invalid-name
 
-from xblock.fields import Field, NO_CACHE_VALUE
+from xblock.fields import BlobRef, Field, NO_CACHE_VALUE
 from xblock.fields import scope_key
 
 #  Finished services
@@ -200,3 +206,116 @@ class FSService(Service):
 
     def __repr__(self):
         return "File system object"
+
+
+class LocalBlobService(Service):
+    """
+    A content-addressed blob store in a local directory, for `Blob` fields.
+
+    Blobs are named by a digest of their content, so storing the same content
+    twice keeps one copy, and a stored blob never changes. Content is written
+    to a temporary file and renamed into place, so readers never see partial
+    blobs. Blobs which are no longer referenced are not removed.
+
+    Blob files are given `file_mode` (readable by everyone by default), so that
+    other users of the directory, such as a web server, can read them.
+    """
+    CHUNK_SIZE = 1024 * 1024
+    _HEX_RE = re.compile(r'^[0-9a-f]+$')
+
+    def __init__(self, root, algorithm='sha256', file_mode=0o644, **kwargs):
+        super().__init__(**kwargs)
+        self.root = root
+        self.algorithm = algorithm
+        self.file_mode = file_mode
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, digest):
+        """
+        Return the path of the file holding the blob named `digest`.
+        """
+        algorithm, _, hexdigest = digest.partition(':')
+        if algorithm != self.algorithm or len(hexdigest) < 3 or not self._HEX_RE.match(hexdigest):
+            raise ValueError(f"Invalid {self.algorithm} blob digest: {digest!r}")
+        return os.path.join(self.root, algorithm, hexdigest[:2], hexdigest[2:])
+
+    def _chunks(self, data):
+        """
+        Yield the content of `data` (bytes-like, str or binary file) in chunks.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            yield data
+            return
+        if not hasattr(data, 'read'):
+            raise TypeError(f"Can't store a {type(data).__name__} as a blob")
+        while True:
+            chunk = data.read(self.CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    @public()
+    def put(self, data):
+        """
+        Store `data` (bytes-like, str or a binary file-like object), and return
+        a `BlobRef` to it.
+        """
+        hasher = hashlib.new(self.algorithm)
+        fd, temp_path = tempfile.mkstemp(dir=self.root, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in self._chunks(data):
+                    hasher.update(chunk)
+                    temp_file.write(chunk)
+            digest = f"{self.algorithm}:{hasher.hexdigest()}"
+            path = self.path(digest)
+            if os.path.exists(path):
+                os.remove(temp_path)
+            else:
+                # mkstemp makes files only readable by their owner.
+                os.chmod(temp_path, self.file_mode)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return BlobRef(digest, self)
+
+    @public()
+    def exists(self, digest):
+        """
+        Return whether the blob named `digest` is stored.
+        """
+        return os.path.exists(self.path(digest))
+
+    @public()
+    def size(self, digest):
+        """
+        Return the size, in bytes, of the blob named `digest`.
+        """
+        return os.path.getsize(self.path(digest))
+
+    @public()
+    def open(self, digest):
+        """
+        Open the blob named `digest` as a binary file.
+        """
+        return open(self.path(digest), 'rb')
+
+    @public()
+    def mmap(self, digest):
+        """
+        Return a read-only memory map of the blob named `digest`.
+
+        Empty blobs can't be mapped, so they are returned as empty bytes.
+        """
+        with self.open(digest) as blob_file:
+            if os.fstat(blob_file.fileno()).st_size == 0:
+                return b''
+            return mmap.mmap(blob_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __repr__(self):
+        return f"LocalBlobService({self.root!r})"
@@ -2,15 +2,20 @@
 Machinery to make the common case easy when building new runtimes
 """
 from abc import ABCMeta, abstractmethod
-from collections import namedtuple
+import bisect
+from collections import defaultdict, deque, namedtuple
+import concurrent.futures
 import functools
 import gettext
-from io import BytesIO, StringIO
+from io import BufferedRandom, BufferedReader, BytesIO, FileIO, StringIO, UnsupportedOperation
 import importlib
 import itertools
 import json
 import logging
+import mmap
+import os
 import re
+import time
 import warnings
 
 from lxml import etree
@@ -18,10 +23,16 @@ import markupsafe
 
 from web_fragments.fragment import Fragment
 
-from xblock.core import XBlock, XBlockAside, XML_NAMESPACES
+from xblock.core import CHILD_BATCH_SIZE, XBlock, XBlockAside, XML_NAMESPACES
 from xblock.fields import Field, BlockScope, Scope, ScopeIds, UserScope
 from xblock.field_data import FieldData
+from xblock.internal import BlockCache, XML_PARSER_OPTIONS, uses_default_methods, xml_parser
+from xblock.plugin import PluginMissingError
+from xblock.structure import BlockQuery, BlockStructure
 from xblock.exceptions import (
+    FieldSizeLimitError,
+    KeyValueMultiBlockSaveError,
+    KeyValueMultiSaveError,
     NoSuchViewError,
     NoSuchHandlerError,
     NoSuchServiceError,
@@ -29,6 +40,8 @@ from xblock.exceptions import (
     NoSuchDefinition,
     FieldDataDeprecationWarning,
     UserIdDeprecationWarning,
+    XBlockMultiSaveError,
+    XBlockSaveError,
 )
 
 log = logging.getLogger(__name__)
@@ -83,6 +96,26 @@ class KeyValueStore(metaclass=ABCMeta):
         for key, value in update_dict.items():
             self.set(key, value)
 
+    # Whether patch_many applies JSON patches instead of writing whole values.
+    supports_json_patch = False
+
+    def patch_many(self, update_dict, patch_dict):  # pylint: disable=unused-argument
+        """
+        Like `set_many`, given `patch_dict`, which maps some of the keys in `update_dict`
+        to JSON patches (see :func:`~xblock.fields.make_json_patch`) from their stored
+        values to their new ones.
+
+        Stores which set `supports_json_patch` should apply those patches (e.g. with
+        :func:`~xblock.fields.apply_json_patch`, or natively) instead of writing the
+        whole values, which cuts write amplification for large mutable values. They
+        may still write the whole value of a key, e.g. if they hold no value for it.
+        The default implementation writes all the values with `set_many`.
+
+        :update_dict: keys and their new values
+        :patch_dict: keys and patches from their stored values to their new ones
+        """
+        self.set_many(update_dict)
+
 
 class DictKeyValueStore(KeyValueStore):
     """
@@ -108,6 +141,230 @@ class DictKeyValueStore(KeyValueStore):
         return key in self.db_dict
 
 
+class _FieldIndex:
+    """
+    The values of one field indexed by an :class:`IndexedKeyValueStore`, by block scope id.
+    """
+    def __init__(self):
+        self.values = {}
+        # Value -> block scope ids (as dict keys, to keep them in order), for hashable values.
+        self.by_value = defaultdict(dict)
+        # Kind of value -> (sorted values, block scope ids in the same order), for range lookups.
+        self.ordered = {}
+
+    @staticmethod
+    def range_kind(value):
+        """Return the kind of values that `value` can be ordered with, or None."""
+        if isinstance(value, (int, float)):
+            return None if value != value else 'number'  # pylint: disable=comparison-with-itself
+        if isinstance(value, str):
+            return 'str'
+        return None
+
+    def add(self, block_id, value):
+        """Record that block `block_id` has `value`."""
+        self.remove(block_id)
+        self.values[block_id] = value
+        try:
+            self.by_value[value][block_id] = None
+        except TypeError:
+            pass
+        kind = self.range_kind(value)
+        if kind is not None:
+            values, block_ids = self.ordered.setdefault(kind, ([], []))
+            position = bisect.bisect_right(values, value)
+            values.insert(position, value)
+            block_ids.insert(position, block_id)
+
+    def remove(self, block_id):
+        """Forget the value of block `block_id`."""
+        if block_id not in self.values:
+            return
+        value = self.values.pop(block_id)
+        try:
+            block_ids = self.by_value.get(value)
+        except TypeError:
+            block_ids = None
+        if block_ids is not None:
+            block_ids.pop(block_id, None)
+            if not block_ids:
+                del self.by_value[value]
+        kind = self.range_kind(value)
+        if kind is not None:
+            values, block_ids = self.ordered[kind]
+            start = bisect.bisect_left(values, value)
+            end = bisect.bisect_right(values, value)
+            position = start + block_ids[start:end].index(block_id)
+            del values[position]
+            del block_ids[position]
+
+    def equal_to(self, value):
+        """Return the ids of the blocks whose value is `value`."""
+        try:
+            return list(self.by_value.get(value, ()))
+        except TypeError:
+            return [block_id for block_id, block_value in self.values.items() if block_value == value]
+
+    def between(self, low, high, include_high):
+        """Return the ids of the blocks whose value is between `low` and `high`, in order of value."""
+        kind = self.range_kind(low if low is not None else high)
+        if kind is None or kind not in self.ordered:
+            return []
+        values, block_ids = self.ordered[kind]
+        start = 0 if low is None else bisect.bisect_left(values, low)
+        if high is None:
+            end = len(values)
+        elif include_high:
+            end = bisect.bisect_right(values, high)
+        else:
+            end = bisect.bisect_left(values, high)
+        return block_ids[start:end]
+
+
+class IndexedKeyValueStore(KeyValueStore):
+    """
+    A `KeyValueStore` that wraps another, and keeps indexes of the values written
+    to some ``Scope.content`` and ``Scope.settings`` fields.
+
+    The indexes answer :meth:`find` (equality) and :meth:`find_range` lookups
+    without loading any block. They return block scope ids: usage ids for
+    ``Scope.settings`` fields, and definition ids for ``Scope.content`` fields.
+    Values are indexed as stored, i.e. as returned by the field's ``to_json``.
+
+    Arguments:
+        kvs (KeyValueStore): the store to read from and write to.
+        fields: the fields to index. :meth:`indexed_fields` returns the fields of
+            some block classes that are declared with the ``indexed=True``
+            runtime option.
+        items: (key, value) pairs that are already in `kvs`, to index them.
+    """
+    INDEXED_SCOPES = (Scope.content, Scope.settings)
+
+    def __init__(self, kvs, fields, items=()):
+        self.kvs = kvs
+        self._indexes = {
+            (field.scope, field.name): _FieldIndex()
+            for field in fields
+            if field.scope in self.INDEXED_SCOPES
+        }
+        for key, value in items:
+            self._index(key, value)
+
+    @classmethod
+    def indexed_fields(cls, block_classes):
+        """
+        Return the fields of `block_classes` declared with the ``indexed=True`` runtime option.
+        """
+        return [
+            field
+            for block_class in block_classes
+            for field in block_class.fields.values()
+            if field.runtime_options.get('indexed') and field.scope in cls.INDEXED_SCOPES
+        ]
+
+    def _index(self, key, value):
+        """Update the indexes for `key` having been set to `value`."""
+        index = self._indexes.get((key.scope, key.field_name))
+        if index is not None:
+            index.add(key.block_scope_id, value)
+
+    def _unindex(self, key):
+        """Update the indexes for `key` having been deleted."""
+        index = self._indexes.get((key.scope, key.field_name))
+        if index is not None:
+            index.remove(key.block_scope_id)
+
+    def _reindex(self, keys):
+        """Update the indexes for `keys` from what `kvs` holds, e.g. after a partly failed write."""
+        for key in keys:
+            if (key.scope, key.field_name) in self._indexes:
+                if self.kvs.has(key):
+                    self._index(key, self.kvs.get(key))
+                else:
+                    self._unindex(key)
+
+    def get(self, key):
+        return self.kvs.get(key)
+
+    def has(self, key):
+        return self.kvs.has(key)
+
+    def default(self, key):
+        return self.kvs.default(key)
+
+    def set(self, key, value):
+        self.kvs.set(key, value)
+        self._index(key, value)
+
+    def delete(self, key):
+        self.kvs.delete(key)
+        self._unindex(key)
+
+    def set_many(self, update_dict):
+        try:
+            self.kvs.set_many(update_dict)
+        except KeyValueMultiSaveError:
+            self._reindex(update_dict)
+            raise
+        for key, value in update_dict.items():
+            self._index(key, value)
+
+    @property
+    def supports_json_patch(self):
+        return getattr(self.kvs, 'supports_json_patch', False)
+
+    def patch_many(self, update_dict, patch_dict):
+        try:
+            self.kvs.patch_many(update_dict, patch_dict)
+        except KeyValueMultiSaveError:
+            self._reindex(update_dict)
+            raise
+        for key, value in update_dict.items():
+            self._index(key, value)
+
+    def _field_indexes(self, field_name, scope):
+        """Return the indexes of the fields called `field_name` (in `scope`, if given)."""
+        indexes = [
+            index for (index_scope, name), index in self._indexes.items()
+            if name == field_name and (scope is None or index_scope == scope)
+        ]
+        if not indexes:
+            raise KeyError(f"Field {field_name!r} isn't indexed")
+        return indexes
+
+    def find(self, field_name, value, scope=None):
+        """
+        Return the block scope ids of the blocks whose field `field_name` is `value`.
+
+        Raises:
+            KeyError: if the field isn't indexed.
+        """
+        return [
+            block_id
+            for index in self._field_indexes(field_name, scope)
+            for block_id in index.equal_to(value)
+        ]
+
+    def find_range(self, field_name, low=None, high=None, scope=None, include_high=False):
+        """
+        Return the block scope ids of the blocks whose field `field_name` is at
+        least `low` and below `high` (or up to `high`, if `include_high`).
+
+        Either bound can be None. Numbers are only compared with numbers, and
+        strings (such as stored dates) with strings. Ids are in order of value.
+
+        Raises:
+            KeyError: if the field isn't indexed.
+        """
+        if low is None and high is None:
+            raise ValueError("find_range needs a low or a high bound")
+        return [
+            block_id
+            for index in self._field_indexes(field_name, scope)
+            for block_id in index.between(low, high, include_high)
+        ]
+
+
 class KvsFieldData(FieldData):
     """
     An interface mapping value access that uses field names to one
@@ -224,6 +481,61 @@ class KvsFieldData(FieldData):
 
         self._kvs.set_many(updated_dict)
 
+    def set_many_blocks(self, block_updates):
+        """Update the underlying model with the values for all the blocks, in one `set_many` call."""
+        updated_dict = {}
+        key_owners = {}
+        for block, update_dict in block_updates:
+            for name, value in update_dict.items():
+                key = self._key(block, name)
+                updated_dict[key] = value
+                key_owners[key] = (block, name)
+
+        try:
+            self._kvs.set_many(updated_dict)
+        except KeyValueMultiSaveError as save_error:
+            raise KeyValueMultiBlockSaveError(  # pylint: disable=raise-missing-from
+                self._saved_field_names_by_block(block_updates, key_owners, save_error.saved_field_names)
+            )
+
+    @staticmethod
+    def _saved_field_names_by_block(block_updates, key_owners, saved):
+        """
+        Return the names of the saved fields of each of the blocks in `block_updates` which wasn't fully saved.
+
+        `saved` lists the keys, or field names, which the KeyValueStore saved. Field names
+        are only attributed to a block if no other block in the batch has a field of that name.
+        """
+        name_owners = defaultdict(list)
+        for block, update_dict in block_updates:
+            for name in update_dict:
+                name_owners[name].append(block)
+
+        saved_names = defaultdict(set)
+        for saved_item in saved:
+            if saved_item in key_owners:
+                block, name = key_owners[saved_item]
+                saved_names[block].add(name)
+            elif len(name_owners.get(saved_item, ())) == 1:
+                saved_names[name_owners[saved_item][0]].add(saved_item)
+
+        return {
+            block: saved_names[block]
+            for block, update_dict in block_updates
+            if saved_names[block] != set(update_dict)
+        }
+
+    @property
+    def supports_json_patch(self):
+        return self._kvs.supports_json_patch
+
+    def patch_many(self, block, update_dict, patches):
+        """Update the underlying model, patching the values of the fields in `patches`."""
+        self._kvs.patch_many(
+            {self._key(block, key): value for key, value in update_dict.items()},
+            {self._key(block, key): patch for key, patch in patches.items()},
+        )
+
     def default(self, block, name):
         """
         Ask the kvs for the default (default implementation which other classes may override).
@@ -292,6 +604,34 @@ class IdReader(metaclass=ABCMeta):
         """
         raise NotImplementedError()
 
+    def get_definition_ids(self, usage_ids):
+        """Retrieve the definitions that several usages are derived from.
+
+        IdReaders which can look up many usages at once should override this;
+        the default implementation calls `get_definition_id` for each usage.
+
+        Args:
+            usage_ids: The ids of the usages to query
+
+        Returns:
+            A list of the `definition_id` of each usage, in the same order
+        """
+        return [self.get_definition_id(usage_id) for usage_id in usage_ids]
+
+    def get_block_types(self, def_ids):
+        """Retrieve the block_types of several definitions
+
+        IdReaders which can look up many definitions at once should override
+        this; the default implementation calls `get_block_type` for each one.
+
+        Args:
+            def_ids: The ids of the definitions to query
+
+        Returns:
+            A list of the `block_type` of each definition, in the same order
+        """
+        return [self.get_block_type(def_id) for def_id in def_ids]
+
     @abstractmethod
     def get_aside_type_from_usage(self, aside_id):
         """
@@ -517,7 +857,7 @@ class Runtime(metaclass=ABCMeta):
     # Construction
     def __init__(
             self, id_reader, id_generator, field_data=None, mixins=(),
-            services=None, default_class=None, select=None
+            services=None, default_class=None, select=None, identity_map_size=0
     ):
         """
         Arguments:
@@ -544,6 +884,12 @@ class Runtime(metaclass=ABCMeta):
                 when calling :meth:`.XBlock.load_class` or :meth:`.XBlockAside.load_class`
                 to resolve a `block_type`.
 
+            identity_map_size (int): If not 0, :meth:`get_block` and :meth:`get_blocks`
+                return the same instance each time a block is requested for the same
+                user, keeping up to this many of the most recently requested blocks
+                in :attr:`identity_map`. Blocks that are still in use elsewhere are
+                returned even once they have been evicted.
+
         """
         self.id_reader = id_reader
         self._services = services or {}
@@ -569,6 +915,11 @@ class Runtime(metaclass=ABCMeta):
 
         self.id_generator = id_generator
 
+        # The blocks returned by get_block(s), by usage id and user id.
+        self.identity_map = BlockCache(identity_map_size) if identity_map_size else None
+        # The structures of the trees under root usage ids, for query().
+        self.block_structures = {}
+
     # Block operations
 
     @property
@@ -649,21 +1000,97 @@ class Runtime(metaclass=ABCMeta):
             *args, **kwargs
         )
 
+    def _uses_default(self, *names):
+        """Return whether this runtime uses the :class:`Runtime` methods `names`, rather than overriding them."""
+        return uses_default_methods(self, Runtime, *names)
+
     def get_block(self, usage_id, for_parent=None):
         """
         Create an XBlock instance in this runtime.
 
-        The `usage_id` is used to find the XBlock class and data.
-        """
+        The `usage_id` is used to find the XBlock class and data. If this
+        runtime has an :attr:`identity_map`, a block already returned for the
+        same user is returned again, with `for_parent` (if given) as its
+        parent block. A block registered by a lazy parse is
+        parsed first.
+        """
+        if self._lazy_blocks:
+            self.parse_lazy_blocks([usage_id])
+        user_id = self.user_id
+        if self.identity_map is not None:
+            block = self.identity_map.get((usage_id, user_id))
+            if block is not None:
+                if for_parent is not None:
+                    block._cache_parent(for_parent)  # pylint: disable=protected-access
+                return block
+
         def_id = self.id_reader.get_definition_id(usage_id)
         try:
             block_type = self.id_reader.get_block_type(def_id)
         except NoSuchDefinition:
             raise NoSuchUsage(repr(usage_id))  # pylint: disable= raise-missing-from
-        keys = ScopeIds(self.user_id, block_type, def_id, usage_id)
+        keys = ScopeIds(user_id, block_type, def_id, usage_id)
         block = self.construct_xblock(block_type, keys, for_parent=for_parent)
+        if self.identity_map is not None:
+            self.identity_map[(usage_id, user_id)] = block
         return block
 
+    def get_blocks(self, usage_ids, for_parent=None):
+        """
+        Create XBlock instances for each of `usage_ids` in this runtime, in the same order.
+
+        This is equivalent to calling :meth:`get_block` for each usage id, but
+        looks up their definitions and block types in bulk through the
+        `id_reader`. Runtimes which override :meth:`get_block` get it called
+        for each usage id instead.
+        """
+        usage_ids = list(usage_ids)
+        if not self._uses_default('get_block'):
+            return [self.get_block(usage_id, for_parent=for_parent) for usage_id in usage_ids]
+        if not usage_ids:
+            return []
+        if self._lazy_blocks:
+            self.parse_lazy_blocks(usage_ids)
+
+        user_id = self.user_id
+        if self.identity_map is None:
+            return self._construct_blocks(usage_ids, user_id, for_parent)
+
+        blocks = {}
+        for usage_id in usage_ids:
+            block = self.identity_map.get((usage_id, user_id))
+            if block is not None:
+                if for_parent is not None:
+                    block._cache_parent(for_parent)  # pylint: disable=protected-access
+                blocks[usage_id] = block
+        missing = list(dict.fromkeys(usage_id for usage_id in usage_ids if usage_id not in blocks))
+        if missing:
+            for usage_id, block in zip(missing, self._construct_blocks(missing, user_id, for_parent)):
+                self.identity_map[(usage_id, user_id)] = blocks[usage_id] = block
+        return [blocks[usage_id] for usage_id in usage_ids]
+
+    def _construct_blocks(self, usage_ids, user_id, for_parent):
+        """
+        Construct a new block for each of `usage_ids`, looking up their definitions and types in bulk.
+        """
+        def_ids = self.id_reader.get_definition_ids(usage_ids)
+        try:
+            block_types = self.id_reader.get_block_types(def_ids)
+        except NoSuchDefinition:
+            raise NoSuchUsage(repr(usage_ids))  # pylint: disable= raise-missing-from
+        return [
+            self.construct_xblock(block_type, ScopeIds(user_id, block_type, def_id, usage_id), for_parent=for_parent)
+            for usage_id, def_id, block_type in zip(usage_ids, def_ids, block_types)
+        ]
+
+    def clear_identity_map(self):
+        """
+        Forget the blocks in the :attr:`identity_map`, e.g. at the end of a request,
+        so that the next :meth:`get_block` constructs them again.
+        """
+        if self.identity_map is not None:
+            self.identity_map.clear()
+
     def get_aside(self, aside_usage_id):
         """
         Create an XBlockAside in this runtime.
@@ -679,6 +1106,122 @@ class Runtime(metaclass=ABCMeta):
         block = self.create_aside(aside_type, keys)
         return block
 
+    # Search indexing
+
+    def iter_index_dictionaries(self, root_usage_id, chunk_size=100, processes=None, runtime_factory=None):
+        """
+        Yield ``(usage_id, index_dictionary)`` for `root_usage_id` and every block under it, breadth first.
+
+        Blocks are instantiated `chunk_size` at a time with :meth:`get_blocks`,
+        and dropped once they are indexed, so that only usage ids are kept for
+        the whole tree.
+
+        To spread the work over `processes` worker processes, also pass
+        `runtime_factory`: a picklable callable which returns a runtime with the
+        same blocks in each worker. The :meth:`block_structure` of the tree is
+        read first, then chunks of it are indexed by the workers; the results are
+        yielded in the same order as without workers. The blocks of a lazy parse
+        are all parsed and saved first, so that the workers can read them.
+        """
+        if processes:
+            if runtime_factory is None:
+                raise ValueError("Indexing in worker processes needs a runtime_factory")
+            yield from self._iter_index_dictionaries_in_pool(root_usage_id, chunk_size, processes, runtime_factory)
+            return
+
+        seen = {root_usage_id}
+        queue = deque([root_usage_id])
+        while queue:
+            batch = [queue.popleft() for _ in range(min(chunk_size, len(queue)))]
+            for block in self.get_blocks(batch):
+                yield block.scope_ids.usage_id, block.index_dictionary()
+                for child_id in (block.children if block.has_children else ()):
+                    if child_id not in seen:
+                        seen.add(child_id)
+                        queue.append(child_id)
+
+    def _iter_index_dictionaries_in_pool(self, root_usage_id, chunk_size, processes, runtime_factory):
+        """
+        Yield what :meth:`iter_index_dictionaries` does, indexing chunks of blocks in a process pool.
+        """
+        self.parse_lazy_blocks()
+        usage_ids = self.block_structure(root_usage_id).usage_ids
+        chunks = (usage_ids[start:start + chunk_size] for start in range(0, len(usage_ids), chunk_size))
+        with concurrent.futures.ProcessPoolExecutor(
+            processes, initializer=_init_worker, initargs=(runtime_factory,)
+        ) as executor:
+            # Keep a couple of chunks per worker in flight, so that results don't pile up.
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_index_chunk, chunk))
+                if len(pending) >= 2 * processes:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    # Warming up
+
+    def warm_up(self, block_types=None, aside_types=None):
+        """
+        Prepare XBlock and XBlockAside classes before they are first needed.
+
+        For each type this selects and loads the class through the plugin
+        cache, mixes it with this runtime's mixins (XBlocks only), and computes
+        the class attributes otherwise built lazily on first use. Call it once
+        per worker process, e.g. from a server's post-fork hook, so that the
+        first requests don't pay for it.
+
+        Arguments:
+            block_types (list of str): the XBlock types to prepare. Defaults to
+                all the installed XBlock types.
+            aside_types (list of str): the XBlockAside types to prepare. Defaults
+                to all the installed XBlockAside types.
+
+        Returns:
+            A dict mapping each family's entry point (``XBlock.entry_point`` and
+            ``XBlockAside.entry_point``) to a dict of the seconds spent on each
+            type. Types which fail to load are logged and left out.
+        """
+        if block_types is None:
+            block_types = XBlock.available_identifiers()
+        if aside_types is None:
+            aside_types = XBlockAside.available_identifiers()
+
+        timings = {XBlock.entry_point: {}, XBlockAside.entry_point: {}}
+        for family, types, load in (
+            (XBlock, block_types, lambda block_type: self.mixologist.mix(self.load_block_type(block_type))),
+            (XBlockAside, aside_types, self.load_aside_type),
+        ):
+            for block_type in types:
+                start = time.perf_counter()
+                try:
+                    self._warm_up_class(load(block_type))
+                except Exception:  # pylint: disable=broad-except
+                    log.warning('Unable to warm up %s %r', family.__name__, block_type, exc_info=True)
+                    continue
+                timings[family.entry_point][block_type] = time.perf_counter() - start
+
+        log.info(
+            'Warmed up %d XBlock and %d XBlockAside types in %.3fs',
+            len(timings[XBlock.entry_point]), len(timings[XBlockAside.entry_point]),
+            sum(sum(family_timings.values()) for family_timings in timings.values()),
+        )
+        return timings
+
+    def _warm_up_class(self, cls):
+        """
+        Compute the lazily built class attributes of `cls`, a mixed XBlock class or an XBlockAside class.
+
+        Runtimes can extend this with their own per-class preparation, such as compiling templates.
+        """
+        # pylint: disable=pointless-statement, protected-access
+        cls._combined_services
+        cls._get_field_serializer()
+        if issubclass(cls, XBlockAside):
+            cls._combined_asides
+        else:
+            cls._class_tags
+
     # Saving field data changes
 
     def save_block(self, block):
@@ -694,27 +1237,425 @@ class Runtime(metaclass=ABCMeta):
         once, so such implementations cannot persist changes on a field-by-field
         basis.)
 
+        The default implementation forgets the :attr:`block_structures` in which
+        `block` had other children, so runtimes overriding it should call it too.
+
         :param block: the block being saved
         :type block: :class:`~xblock.core.XBlock`
         """
         # Implementing this is optional.
+        if self.block_structures:
+            self._forget_changed_structures(block)
+
+    def _forget_changed_structures(self, block):
+        """Forget the :attr:`block_structures` which don't list the children that `block` has now."""
+        usage_id = block.scope_ids.usage_id
+        children = list(block.children) if getattr(block, 'has_children', False) else []
+        for root_id, structure in list(self.block_structures.items()):
+            if usage_id in structure and structure.children(usage_id) != children:
+                del self.block_structures[root_id]
+
+    def save_blocks(self, blocks):
+        """
+        Save the dirty fields of all of `blocks`, writing those which share a
+        FieldData together (see :meth:`.FieldData.set_many_blocks`).
+
+        This is equivalent to calling ``save()`` on each block, but lets field
+        data implementations write all the changes in one operation. As with
+        ``save()``, :meth:`save_block` is called for each block which was saved.
+
+        :param blocks: the blocks to save
+        :type blocks: list of :class:`~xblock.core.XBlock`
+        :raises XBlockMultiSaveError: if some of the blocks weren't fully saved,
+            with an :class:`~xblock.exceptions.XBlockSaveError` for each of them.
+            The other blocks are saved.
+        """
+        # pylint: disable=protected-access
+        blocks = list(blocks)
+        errors = {}
+        saved_blocks = []
+        batches = {}
+        for block in blocks:
+            if not block._dirty_fields:
+                continue
+            field_names = block._get_fields_to_save()
+            if not field_names:
+                saved_blocks.append(block)
+                continue
+            try:
+                fields, fields_json = block._prepare_save(field_names)
+            except XBlockSaveError as save_error:
+                errors[block] = save_error
+                continue
+            field_data = block._field_data
+            batch = batches.setdefault(id(field_data), (field_data, [], {}))
+            batch[1].append((block, fields_json))
+            batch[2][block] = fields
+
+        for field_data, block_updates, block_fields in batches.values():
+            try:
+                field_data.set_many_blocks(block_updates)
+                failed = {}
+            except KeyValueMultiBlockSaveError as save_error:
+                failed = save_error.saved_field_names
+            for block, fields in block_fields.items():
+                if block in failed:
+                    errors[block] = block._partial_save_error(fields, failed[block])
+                    continue
+                for field in fields:
+                    block._reset_dirty_field(field)
+                saved_blocks.append(block)
+
+        for block in saved_blocks:
+            self.save_block(block)
+        if errors:
+            raise XBlockMultiSaveError(errors, f'Error saving {len(errors)} of {len(blocks)} blocks')
 
     # Parsing XML
 
-    def parse_xml_string(self, xml):
-        """Parse a string of XML, returning a usage id."""
+    #: The options of the ``lxml.etree.XMLParser`` which parses OLX, by default
+    #: ``XML_PARSER_OPTIONS`` from ``xblock.internal``. A runtime whose blocks
+    #: don't depend on whitespace between elements can add
+    #: ``remove_blank_text=True``, for instance.
+    xml_parser_options = XML_PARSER_OPTIONS
+
+    #: The size from which :meth:`parse_xml_file` memory-maps the files it parses.
+    XML_MMAP_THRESHOLD = 2 ** 20
+
+    @property
+    def xml_parser(self):
+        """The ``lxml.etree.XMLParser`` made with :attr:`xml_parser_options`, shared by all runtimes in this thread."""
+        return xml_parser(self.xml_parser_options)
+
+    def parse_xml_string(self, xml, streaming=False, lazy=False):
+        """
+        Parse a string of XML, returning a usage id. `streaming` and `lazy` are as for :meth:`parse_xml_file`.
+
+        Bytes are parsed as they are, without being wrapped in a file.
+        """
+        _check_parse_mode(streaming=streaming, lazy=lazy)
+        if lazy:
+            if isinstance(xml, bytes):
+                return self._register_lazy_blocks(etree.fromstring(xml, self.xml_parser))
+            return self.parse_xml_file(StringIO(xml), lazy=True)
+        if streaming:
+            if isinstance(xml, bytes):
+                return self._usage_id_from_stream(BytesIO(xml))
+            # iterparse only reads bytes, so the text is encoded whatever encoding it declares.
+            return self._usage_id_from_stream(BytesIO(xml.encode('utf-8')), encoding='utf-8')
         if isinstance(xml, bytes):
-            io_type = BytesIO
-        else:
-            io_type = StringIO
-        return self.parse_xml_file(io_type(xml))
+            return self._usage_id_from_node(etree.fromstring(xml, self.xml_parser), None)
+        return self.parse_xml_file(StringIO(xml))
+
+    def _parse_xml_root(self, fileobj):
+        """
+        Parse the open XML file `fileobj` with :attr:`xml_parser`, returning its root element.
 
-    def parse_xml_file(self, fileobj):
-        """Parse an open XML file, returning a usage id."""
-        root = etree.parse(fileobj).getroot()
+        A file of at least ``XML_MMAP_THRESHOLD`` bytes, read from its start, is
+        memory-mapped and parsed from the mapping, so that it isn't read into
+        Python buffers first. Only plain binary files are mapped: any other
+        file object, such as a decompressing ``gzip.GzipFile``, may have a
+        descriptor whose bytes aren't the ones it reads.
+        """
+        raw = fileobj.raw if isinstance(fileobj, (BufferedReader, BufferedRandom)) else fileobj
+        mappable = isinstance(raw, FileIO)
+        try:
+            fileno = fileobj.fileno()
+            mappable = mappable and fileobj.tell() == 0 and os.fstat(fileno).st_size >= self.XML_MMAP_THRESHOLD
+        except (AttributeError, OSError, UnsupportedOperation):
+            mappable = False
+        if not mappable:
+            return etree.parse(fileobj, self.xml_parser).getroot()
+        with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+            return etree.fromstring(mapped, self.xml_parser)
+
+    def parse_xml_file(self, fileobj, streaming=False, processes=None, runtime_factory=None, split_depth=1,
+                       lazy=False):
+        """
+        Parse an open XML file, returning a usage id.
+
+        With `streaming`, blocks are created while the file, opened in binary
+        mode, is read, by :meth:`_usage_id_from_stream`, instead of once the
+        whole document is parsed.
+
+        To parse the subtrees at `split_depth` (the children of the root
+        element by default) in `processes` worker processes, also pass
+        `runtime_factory`, as for :meth:`iter_index_dictionaries`. See
+        :meth:`_parse_subtrees_in_pool`.
+
+        With `lazy`, only the usage ids of the blocks are created, and each
+        block is parsed and saved when it is first got from this runtime. See
+        :meth:`_register_lazy_blocks`.
+        """
+        _check_parse_mode(streaming=streaming, processes=processes, lazy=lazy)
+        if processes:
+            if runtime_factory is None:
+                raise ValueError("Parsing in worker processes needs a runtime_factory")
+            root = self._parse_xml_root(fileobj)
+            return self._parse_subtrees_in_pool(root, processes, runtime_factory, split_depth)
+        if streaming:
+            return self._usage_id_from_stream(fileobj)
+        root = self._parse_xml_root(fileobj)
+        if lazy:
+            return self._register_lazy_blocks(root)
         usage_id = self._usage_id_from_node(root, None)
         return usage_id
 
+    # Set by _register_lazy_blocks: a dict from the usage ids of the blocks
+    # which haven't been parsed yet to their element, the usage id of their
+    # parent and their ScopeIds, and a dict from the elements of those blocks
+    # (but the roots) to their usage ids, for the parse of their parent.
+    _lazy_blocks = None
+    _lazy_usage_ids = None
+
+    def _register_lazy_blocks(self, root):
+        """
+        Create the usage ids of the block element `root` and the blocks under it, returning the usage id of `root`.
+
+        The blocks are parsed from their elements, which are kept until then,
+        by :meth:`parse_lazy_blocks`, which :meth:`get_block` and
+        :meth:`get_blocks` call for the blocks they are asked for. The parse of
+        a block uses the usage ids created here for its child elements, rather
+        than parsing them too.
+
+        Only the child elements of blocks which use the default
+        :meth:`.XBlock.parse_xml` are registered, and none if this runtime
+        overrides :meth:`add_node_as_child` or :meth:`add_nodes_as_children`.
+        The blocks under other blocks get their usage ids when their parent is
+        parsed. Once every block is parsed, the ids and saved data are the same
+        as parsing the whole document at once, but for the ids under blocks
+        with their own ``parse_xml``, which are created later.
+        """
+        registers_children = self._uses_default('add_node_as_child', 'add_nodes_as_children')
+        if self._lazy_blocks is None:
+            self._lazy_blocks = {}
+            self._lazy_usage_ids = {}
+        # Whether the blocks of each block type get their child elements as they are.
+        parses_by_default = {}
+        root_id = None
+        stack = [(root, None)]
+        while stack:
+            node, parent_id = stack.pop()
+            block_type = node.tag
+            def_id = self.id_generator.create_definition(block_type)
+            usage_id = self.id_generator.create_usage(def_id)
+            self._lazy_blocks[usage_id] = (node, parent_id, ScopeIds(None, block_type, def_id, usage_id))
+            if parent_id is None:
+                root_id = usage_id
+            else:
+                self._lazy_usage_ids[node] = usage_id
+            if not registers_children:
+                continue
+            if block_type not in parses_by_default:
+                block_class = self.mixologist.mix(self.load_block_type(block_type))
+                parses_by_default[block_type] = block_class.has_children and _parses_xml_by_default(block_class)
+            if parses_by_default[block_type]:
+                stack.extend((child, usage_id) for child in reversed(node) if self._may_be_child_block(child))
+        return root_id
+
+    def parse_lazy_blocks(self, usage_ids=None):
+        """
+        Parse and save the blocks of `usage_ids` (by default, all of them) registered by a lazy parse.
+
+        The usage ids which aren't of blocks waiting to be parsed are ignored.
+        Blocks are parsed in the order of `usage_ids`, or in document order.
+        """
+        if not self._lazy_blocks:
+            return
+        if usage_ids is None:
+            usage_ids = list(self._lazy_blocks)
+        for usage_id in usage_ids:
+            if usage_id in self._lazy_blocks:
+                # Only forget the element once the block is parsed, so that a failed parse can be retried.
+                self._block_from_node(*self._lazy_blocks[usage_id])
+                del self._lazy_blocks[usage_id]
+
+    # Set by _parse_subtrees_in_pool: a dict from the elements parsed in worker
+    # processes to the futures of their parsed subtrees.
+    _pool_subtrees = None
+
+    def _parse_subtrees_in_pool(self, root, processes, runtime_factory, split_depth):
+        """
+        Parse the element `root` like :meth:`_usage_id_from_node`, parsing its subtrees at `split_depth` in a pool.
+
+        Each worker process makes a runtime with `runtime_factory`, and parses a
+        subtree with usage ids, definition ids and field data of its own, which
+        only record what the parse creates and saves. The subtrees are then
+        parsed in this process as usual, but for those already parsed in a
+        worker: what the worker recorded is replayed in place of parsing them,
+        creating the ids with :attr:`id_generator` and saving the blocks through
+        this runtime, in the same order as the parse does. This gives the same
+        ids and saved blocks as parsing the whole document here, as long as the
+        ``parse_xml`` of the blocks only depends on their element.
+
+        Only the subtrees under blocks which use the default
+        :meth:`.XBlock.parse_xml`, and so get their child elements as they are,
+        are parsed in the pool, and none if this runtime overrides
+        :meth:`add_node_as_child` or :meth:`add_nodes_as_children`.
+
+        The blocks of an earlier lazy parse are parsed first, so that they
+        create their ids before the ones replayed from the pool.
+        """
+        self.parse_lazy_blocks()
+        if not self._uses_default('add_node_as_child', 'add_nodes_as_children'):
+            return self._usage_id_from_node(root, None)
+
+        default_parse = {}
+
+        def parses_by_default(node):
+            """Return whether `node` is the element of a block which uses the default parse_xml."""
+            if node.tag not in default_parse:
+                try:
+                    block_class = self.mixologist.mix(self.load_block_type(node.tag))
+                except PluginMissingError:
+                    default_parse[node.tag] = False
+                else:
+                    default_parse[node.tag] = _parses_xml_by_default(block_class)
+            return default_parse[node.tag]
+
+        level = [root]
+        for _ in range(split_depth):
+            level = [
+                child for node in level if isinstance(node.tag, str) and parses_by_default(node)
+                for child in node if self._may_be_child_block(child)
+            ]
+
+        with concurrent.futures.ProcessPoolExecutor(
+            processes, initializer=_init_parse_worker, initargs=(runtime_factory,)
+        ) as executor:
+            self._pool_subtrees = {
+                node: executor.submit(_parse_subtree, etree.tostring(node, with_tail=False)) for node in level
+            }
+            try:
+                return self._usage_id_from_node(root, None)
+            finally:
+                for future in self._pool_subtrees.values():
+                    future.cancel()
+                self._pool_subtrees = None
+
+    def _may_be_child_block(self, node):
+        """Return whether the child element `node` may be parsed as a block by the default parse_xml."""
+        if not isinstance(node.tag, str) or etree.QName(node).namespace == XML_NAMESPACES["option"]:
+            return False
+        xblock_family = node.get('xblock-family')
+        return not (xblock_family and issubclass(self._family_id_to_superclass(xblock_family), XBlockAside))
+
+    def _replay_subtree(self, parsed, parent_id):
+        """
+        Create the ids and save the blocks of a subtree parsed by :func:`_parse_subtree`, returning its usage id.
+
+        The fields which the worker saved are set on new blocks, and saved with
+        ``save()``, and those it deleted are deleted, in the same order.
+        """
+        usage_id, id_calls, changes = parsed
+        ids = {_PARENT_PLACEHOLDER: parent_id}
+        for method, args, created in id_calls:
+            real = getattr(self.id_generator, method)(*[ids.get(arg, arg) for arg in args])
+            if method == 'create_aside':
+                ids.update(zip(created, real))
+            else:
+                ids[created] = real
+
+        for is_aside, block_type, def_id, block_usage_id, values, deleted in changes:
+            keys = ScopeIds(None, block_type, ids[def_id], ids[block_usage_id])
+            if is_aside:
+                block_class = self.load_aside_type(block_type)
+            else:
+                block_class = self.mixologist.mix(self.load_block_type(block_type))
+            block = self.construct_xblock_from_class(block_class, keys)
+            # What the worker did to the fields of the block, with the JSON values it saved.
+            for name in deleted:
+                delattr(block, name)
+            for name, value in _replace_placeholders(values, ids).items():
+                setattr(block, name, block.fields[name].from_json(value))
+            block.save()
+        return ids[usage_id]
+
+    def _usage_id_from_stream(self, fileobj, encoding=None):
+        """
+        Create the blocks of an XML file as it is read, returning the usage id of the root block.
+
+        The file is read with ``etree.iterparse``. Each block is created and
+        saved when its element ends, and the element is then removed from the
+        tree, so that only the elements of the enclosing blocks are kept in
+        memory. Usage ids are allocated in the same order as by
+        :meth:`_usage_id_from_node`, so both give the same blocks.
+
+        Only the children of blocks which have children and use the default
+        :meth:`.XBlock.parse_xml` are streamed this way: ``parse_xml`` then gets
+        the element of the block without its child blocks, whose usage ids are
+        added to ``children`` afterwards. Any other block gets its whole element
+        passed to :meth:`_usage_id_from_node`, and so to its own ``parse_xml``.
+        The same goes for every block if this runtime overrides
+        :meth:`add_node_as_child` or :meth:`add_nodes_as_children`.
+
+        If the file is invalid, the blocks which ended before the error are
+        already saved. `encoding`, if given, overrides the encoding declared by
+        the file.
+        """
+        streams_children = self._uses_default('add_node_as_child', 'add_nodes_as_children')
+        # One entry per open element: a _StreamedBlock for the blocks whose
+        # children are streamed, and a _STREAM_* marker for the other elements.
+        open_elements = []
+        root_id = None
+        events = etree.iterparse(fileobj, events=('start', 'end'), encoding=encoding, **self.xml_parser_options)
+        for event, node in events:
+            if event == 'start':
+                parent = open_elements[-1] if open_elements else None
+                if open_elements and not isinstance(parent, _StreamedBlock):
+                    entry = _STREAM_INNER
+                elif parent is None:
+                    entry = self._stream_block_entry(node, streams_children)
+                else:
+                    xblock_family = node.attrib.pop('xblock-family', None)
+                    if xblock_family and issubclass(self._family_id_to_superclass(xblock_family), XBlockAside):
+                        entry = _STREAM_ASIDE
+                    elif etree.QName(node).namespace == XML_NAMESPACES["option"]:
+                        entry = _STREAM_KEPT
+                    else:
+                        entry = self._stream_block_entry(node, streams_children)
+                open_elements.append(entry)
+                continue
+
+            entry = open_elements.pop()
+            if entry is _STREAM_INNER or entry is _STREAM_KEPT:
+                continue
+            parent = open_elements[-1] if open_elements else None
+            if entry is _STREAM_ASIDE:
+                self._aside_from_xml(node, parent.keys.def_id, parent.keys.usage_id)
+            else:
+                parent_id = parent.keys.usage_id if parent else None
+                if entry is _STREAM_WHOLE:
+                    usage_id = self._usage_id_from_node(node, parent_id)
+                else:
+                    usage_id = entry.keys.usage_id
+                    block = entry.block_class.parse_xml(node, self, entry.keys)
+                    block.children.extend(entry.child_ids)
+                    block.parent = parent_id
+                    block.save()
+                if parent is None:
+                    root_id = usage_id
+                else:
+                    parent.child_ids.append(usage_id)
+            if parent is not None:
+                node.getparent().remove(node)
+        return root_id
+
+    def _stream_block_entry(self, node, streams_children):
+        """
+        Return the :meth:`_usage_id_from_stream` entry of the block element `node`, which has just started.
+        """
+        if not streams_children:
+            return _STREAM_WHOLE
+        block_type = node.tag
+        block_class = self.mixologist.mix(self.load_block_type(block_type))
+        if not block_class.has_children or not _parses_xml_by_default(block_class):
+            return _STREAM_WHOLE
+        node.attrib.pop('xblock-family', None)
+        def_id = self.id_generator.create_definition(block_type)
+        usage_id = self.id_generator.create_usage(def_id)
+        return _StreamedBlock(ScopeIds(None, block_type, def_id, usage_id), block_class)
+
     def _usage_id_from_node(self, node, parent_id):
         """Create a new usage id from an XML dom node.
 
@@ -722,14 +1663,24 @@ class Runtime(metaclass=ABCMeta):
             node (lxml.etree.Element): The DOM node to interpret.
             parent_id: The usage ID of the parent block
         """
+        if self._pool_subtrees and node in self._pool_subtrees:
+            return self._replay_subtree(self._pool_subtrees.pop(node).result(), parent_id)
+        if self._lazy_usage_ids and node in self._lazy_usage_ids:
+            # Registered by _register_lazy_blocks, and parsed on its own.
+            return self._lazy_usage_ids.pop(node)
         block_type = node.tag
-        # remove xblock-family from elements
-        node.attrib.pop('xblock-family', None)
         # TODO: a way for this node to be a usage to an existing definition?
         def_id = self.id_generator.create_definition(block_type)
         usage_id = self.id_generator.create_usage(def_id)
-        keys = ScopeIds(None, block_type, def_id, usage_id)
-        block_class = self.mixologist.mix(self.load_block_type(block_type))
+        self._block_from_node(node, parent_id, ScopeIds(None, block_type, def_id, usage_id))
+        return usage_id
+
+    def _block_from_node(self, node, parent_id, keys):
+        """Parse and save the block with `keys` from the XML dom node `node`, and its asides."""
+        def_id, usage_id = keys.def_id, keys.usage_id
+        # remove xblock-family from elements
+        node.attrib.pop('xblock-family', None)
+        block_class = self.mixologist.mix(self.load_block_type(keys.block_type))
         # pull the asides out of the xml payload
         aside_children = []
         for child in node.iterchildren():
@@ -746,7 +1697,6 @@ class Runtime(metaclass=ABCMeta):
         block = block_class.parse_xml(node, self, keys)
         block.parent = parent_id
         block.save()
-        return usage_id
 
     def _aside_from_xml(self, node, block_def_id, block_usage_id):
         """
@@ -767,22 +1717,117 @@ class Runtime(metaclass=ABCMeta):
         usage_id = self._usage_id_from_node(node, block.scope_ids.usage_id)
         block.children.append(usage_id)
 
+    def add_nodes_as_children(self, block, nodes):
+        """
+        Called by XBlock.parse_xml to treat child nodes as child blocks.
+
+        The child blocks are all parsed before their usage ids are added to
+        ``block.children`` together. Runtimes which override
+        :meth:`add_node_as_child` get it called for each node instead.
+        """
+        if not self._uses_default('add_node_as_child'):
+            for node in nodes:
+                self.add_node_as_child(block, node)
+            return
+        parent_id = block.scope_ids.usage_id
+        usage_ids = [self._usage_id_from_node(node, parent_id) for node in nodes]
+        block.children.extend(usage_ids)
+
     # Exporting XML
 
-    def export_to_xml(self, block, xmlfile):
+    def export_to_xml(self, block, xmlfile, pretty_print=True, streaming=False):
         """
         Export the block to XML, writing the XML to `xmlfile`.
+
+        Without `pretty_print`, the XML is written compactly, without
+        indentation. With `streaming`, it is written while the blocks are
+        visited, by :meth:`_export_to_xmlfile`, instead of once the whole tree
+        is built.
         """
+        if streaming:
+            self._export_to_xmlfile(block, xmlfile, pretty_print)
+            return
         root = etree.Element("unknown_root", nsmap=XML_NAMESPACES)
         tree = etree.ElementTree(root)
         block.add_xml_to_node(root)
-        # write asides as children
+        root.extend(self._aside_nodes(block))
+        tree.write(xmlfile, xml_declaration=True, pretty_print=pretty_print, encoding='utf-8')
+
+    def _aside_nodes(self, block):
+        """Return the XML elements of the asides of `block` which need to be exported."""
+        aside_nodes = []
         for aside in self.get_asides(block):
             if aside.needs_serialization():
                 aside_node = etree.Element("unknown_root", nsmap=XML_NAMESPACES)
                 aside.add_xml_to_node(aside_node)
-                block.append(aside_node)
-        tree.write(xmlfile, xml_declaration=True, pretty_print=True, encoding='utf-8')
+                aside_nodes.append(aside_node)
+        return aside_nodes
+
+    def _export_to_xmlfile(self, block, xmlfile, pretty_print):
+        """
+        Export `block` to XML as its blocks are visited, writing to `xmlfile` with ``etree.xmlfile``.
+
+        Blocks which use the default :meth:`.XBlock.add_xml_to_node` have their
+        own element written first. Their children are then loaded
+        ``CHILD_BATCH_SIZE`` at a time, written in turn and dropped, so that
+        only a batch of blocks per level of the tree is kept in memory. Any other block is
+        written from the whole element built by its ``add_xml_to_node``, and so
+        is every block if this runtime overrides :meth:`add_block_as_child_node`.
+
+        The XML is the same as the one :meth:`export_to_xml` writes, but for the
+        order of the namespace declarations of the root element, empty elements
+        in a namespace, which are written with an end tag, and the final
+        newline.
+        """
+        indent = 0 if pretty_print else None
+        with etree.xmlfile(xmlfile, encoding='UTF-8') as xmlwriter:
+            xmlwriter.write_declaration()
+            root = etree.Element("unknown_root", nsmap=XML_NAMESPACES)
+            if not self._uses_default('add_block_as_child_node'):
+                block.add_xml_to_node(root)
+                root.extend(self._aside_nodes(block))
+                _write_xml_element(xmlwriter, root, indent, nsmap=XML_NAMESPACES)
+            else:
+                self._write_block_xml(xmlwriter, block, root, indent, self._aside_nodes(block))
+
+    def _write_block_xml(self, xmlwriter, block, node, indent, trailing_nodes=()):
+        """
+        Write `block` for :meth:`_export_to_xmlfile`, setting its data on the new element `node`.
+
+        `trailing_nodes` are written as the last children of the element of the block.
+        """
+        nsmap = XML_NAMESPACES if node.getparent() is None else None
+        overrides = [name for name in ('add_xml_to_node', 'add_children_to_node')
+                     if getattr(type(block), name) is not getattr(XBlock, name)]
+        if overrides:
+            block.add_xml_to_node(node)
+            node.extend(trailing_nodes)
+            _write_xml_element(xmlwriter, node, indent, nsmap=nsmap)
+            return
+
+        # What XBlock.add_xml_to_node does, but for the children.
+        super(XBlock, block).add_xml_to_node(node)  # pylint: disable=bad-super-call
+        child_ids = list(block.children) if block.has_children else []
+        del block
+
+        def write_children(child_indent):
+            """Write the child blocks, a batch at a time, then `trailing_nodes`."""
+            # The element of each child is made in this one, as by add_block_as_child_node, then dropped.
+            holder = etree.Element("unknown_root", nsmap=XML_NAMESPACES)
+            for start in range(0, len(child_ids), CHILD_BATCH_SIZE):
+                for child in self.get_blocks(child_ids[start:start + CHILD_BATCH_SIZE]):
+                    _write_xml_indent(xmlwriter, child_indent)
+                    child_node = etree.SubElement(holder, "unknown")
+                    self._write_block_xml(xmlwriter, child, child_node, child_indent)
+                    holder.remove(child_node)
+            for trailing_node in trailing_nodes:
+                _write_xml_indent(xmlwriter, child_indent)
+                _write_xml_element(xmlwriter, trailing_node, child_indent)
+            return len(child_ids) + len(trailing_nodes)
+
+        _write_xml_element(
+            xmlwriter, node, indent, nsmap=nsmap, write_children=write_children if child_ids or trailing_nodes else None
+        )
 
     def add_block_as_child_node(self, block, node):
         """
@@ -842,17 +1887,20 @@ class Runtime(metaclass=ABCMeta):
         """
         return child.render(view_name or self._view_name, context)
 
-    def render_children(self, block, view_name=None, context=None):
+    def render_children(self, block, view_name=None, context=None, start=0, stop=None, type_filter=None):
         """Render a block's children, returning a list of results.
 
         Each child of `block` will be rendered, just as :func:`render_child` does.
+        To render a page of the children, pass `start`, `stop` and `type_filter`
+        as for :meth:`.XBlock.iter_children`; children outside the page aren't
+        instantiated. Either way, the children come from :meth:`.XBlock.iter_children`,
+        so they are cached on `block` and know it as their parent.
 
         Returns a list of values, each as provided by :func:`render`.
 
         """
         results = []
-        for child_id in block.children:
-            child = self.get_block(child_id)
+        for child in block.iter_children(start, stop, type_filter):
             result = self.render_child(child, view_name, context)
             results.append(result)
         return results
@@ -1105,74 +2153,45 @@ class Runtime(metaclass=ABCMeta):
     def query(self, block):
         """Query for data in the tree, starting from `block`.
 
-        Returns a Query object with methods for navigating the tree and
-        retrieving information.
+        Returns a :class:`.BlockQuery` with methods for navigating the tree and
+        retrieving information. It works on the :meth:`block_structure` of the
+        tree that contains `block`, so blocks are only instantiated to read
+        their fields.
 
         """
-        raise NotImplementedError("Querying is an experimental feature")
+        root_id = block.scope_ids.usage_id
+        parent = block.get_parent()
+        while parent is not None:
+            root_id = parent.scope_ids.usage_id
+            parent = parent.get_parent()
+        structure = self.block_structure(root_id)
+        return BlockQuery(self, structure, [structure.index(block.scope_ids.usage_id)])
 
-    def querypath(self, block, path):
-        """An XPath-like interface to `query`."""
+    def block_structure(self, root_usage_id):
+        """
+        Return the :class:`.BlockStructure` of the tree under `root_usage_id`.
 
-        class BadPath(Exception):
-            """Bad path exception thrown when path cannot be found."""
+        Structures are built the first time they are needed, and kept in
+        :attr:`block_structures` until :meth:`save_block` sees that a block in
+        them has other children.
+        Runtimes can put structures saved with :meth:`.BlockStructure.to_bytes`
+        there, or clear it when blocks change in other ways.
+        """
+        structure = self.block_structures.get(root_usage_id)
+        if structure is None:
+            structure = BlockStructure.from_runtime(self, root_usage_id)
+            self.block_structures[root_usage_id] = structure
+        return structure
 
+    def querypath(self, block, path):
+        """
+        An XPath-like interface to `query`.
+
+        A path starting with ``/`` or ``//`` starts from the root of the tree.
+        """
         results = self.query(block)
-        ROOT, SEP, WORD, FINAL = range(4)  # pylint: disable=C0103
-        state = ROOT
-        lexer = RegexLexer(
-            ("dotdot", r"\.\."),
-            ("dot", r"\."),
-            ("slashslash", r"//"),
-            ("slash", r"/"),
-            ("atword", r"@\w+"),
-            ("word", r"\w+"),
-            ("err", r"."),
-        )
-        for tokname, toktext in lexer.lex(path):
-            if state == FINAL:
-                # Shouldn't be any tokens after a last token.
-                raise BadPath()
-            if tokname == "dotdot":
-                # .. (parent)
-                if state == WORD:
-                    raise BadPath()
-                results = results.parent()
-                state = WORD
-            elif tokname == "dot":
-                # . (current node)
-                if state == WORD:
-                    raise BadPath()
-                state = WORD
-            elif tokname == "slashslash":
-                # // (descendants)
-                if state == SEP:
-                    raise BadPath()
-                if state == ROOT:
-                    raise NotImplementedError()
-                results = results.descendants()
-                state = SEP
-            elif tokname == "slash":
-                # / (here)
-                if state == SEP:
-                    raise BadPath()
-                if state == ROOT:
-                    raise NotImplementedError()
-                state = SEP
-            elif tokname == "atword":
-                # @xxx (attribute access)
-                if state != SEP:
-                    raise BadPath()
-                results = results.attr(toktext[1:])
-                state = FINAL
-            elif tokname == "word":
-                # xxx (tag selection)
-                if state != SEP:
-                    raise BadPath()
-                results = results.children().tagged(toktext)
-                state = WORD
-            else:
-                raise BadPath("Invalid thing: %r" % toktext)
+        for method, args in _compile_querypath(path):
+            results = getattr(results, method)(*args)
         return results
 
     def _family_id_to_superclass(self, family_id):
@@ -1311,6 +2330,414 @@ class RegexLexer:
             yield (name, match.group(name))
 
 
+def _parses_xml_by_default(block_class):
+    """Return whether `block_class` uses the default :meth:`.XBlock.parse_xml`."""
+    return block_class.parse_xml.__func__ is XBlock.parse_xml.__func__
+
+
+def _write_xml_indent(xmlwriter, indent):
+    """Start a new line at `indent` levels with `xmlwriter`, unless `indent` is None."""
+    if indent is not None:
+        xmlwriter.write('\n' + '  ' * indent)
+
+
+def _write_xml_element(xmlwriter, node, indent, nsmap=None, write_children=None):
+    """
+    Write the element `node`, but not its tail, with the ``etree.xmlfile`` writer `xmlwriter`.
+
+    Unlike ``xmlwriter.write(node)``, this doesn't declare again the namespaces
+    that the enclosing elements already declare. `nsmap` gives the namespaces
+    to declare on `node`.
+
+    With an `indent` level, the children of elements without text are indented
+    as ``pretty_print`` does. `write_children`, if given, is called with the
+    indent level of the children after the children of `node` are written, to
+    write more of them, and returns how many it wrote.
+    """
+    if not isinstance(node.tag, str):
+        # A comment or a processing instruction.
+        xmlwriter.write(node, with_tail=False)
+        return
+    empty = len(node) == 0 and node.text is None and write_children is None
+    if empty and nsmap is None and not any(name.startswith('{') for name in [node.tag, *node.attrib]):
+        # Written on its own, to get an empty-element tag.
+        xmlwriter.write(etree.Element(node.tag, node.attrib))
+        return
+
+    mixed = node.text is not None or any(child.tail is not None for child in node)
+    child_indent = None if indent is None or mixed else indent + 1
+    with xmlwriter.element(node.tag, dict(node.attrib), nsmap=nsmap):
+        if node.text:
+            xmlwriter.write(node.text)
+        for child in node:
+            _write_xml_indent(xmlwriter, child_indent)
+            _write_xml_element(xmlwriter, child, child_indent)
+            if child.tail:
+                xmlwriter.write(child.tail)
+        written = len(node)
+        if write_children is not None:
+            written += write_children(child_indent)
+        if written and child_indent is not None:
+            _write_xml_indent(xmlwriter, indent)
+
+
+class _StreamedBlock:
+    """
+    A block being read by :meth:`Runtime._usage_id_from_stream`, whose child blocks are created before it.
+    """
+    __slots__ = ('keys', 'block_class', 'child_ids')
+
+    def __init__(self, keys, block_class):
+        self.keys = keys
+        self.block_class = block_class
+        self.child_ids = []
+
+
+# The other elements read by Runtime._usage_id_from_stream: a block parsed with
+# its whole element, an aside, an element left for the parse_xml of its block,
+# and an element inside one of those.
+_STREAM_WHOLE = 'whole'
+_STREAM_ASIDE = 'aside'
+_STREAM_KEPT = 'kept'
+_STREAM_INNER = 'inner'
+
+
+def _check_parse_mode(streaming=False, processes=None, lazy=False):
+    """Raise ValueError if more than one of the ways of parsing of :meth:`Runtime.parse_xml_file` is asked for."""
+    if sum(map(bool, (streaming, processes, lazy))) > 1:
+        raise ValueError("Parsing can only be one of streaming, in worker processes or lazy")
+
+
+# The runtime of a worker process, made by _init_worker.
+_WORKER_RUNTIME = None
+
+
+def _init_worker(runtime_factory):
+    """Make the runtime used by _index_chunk in this worker process."""
+    global _WORKER_RUNTIME  # pylint: disable=global-statement
+    _WORKER_RUNTIME = runtime_factory()
+
+
+# The runtime factory of a worker process, set by _init_parse_worker.
+_WORKER_RUNTIME_FACTORY = None
+
+
+def _init_parse_worker(runtime_factory):
+    """Keep the factory of the runtimes made by _parse_subtree in this worker process."""
+    global _WORKER_RUNTIME_FACTORY  # pylint: disable=global-statement
+    _WORKER_RUNTIME_FACTORY = runtime_factory
+
+
+class _PlaceholderId:
+    """An id made by a :class:`_RecordingIdGenerator`, which stands for a real one."""
+    __slots__ = ('number',)
+
+    def __init__(self, number):
+        self.number = number
+
+    def __eq__(self, other):
+        return isinstance(other, _PlaceholderId) and other.number == self.number
+
+    def __hash__(self):
+        return hash((_PlaceholderId, self.number))
+
+    def __repr__(self):
+        return f"_PlaceholderId({self.number})"
+
+
+# The placeholder of the usage id of the parent of a subtree parsed by _parse_subtree.
+_PARENT_PLACEHOLDER = _PlaceholderId(-1)
+
+
+class _RecordingIdGenerator(IdGenerator):
+    """
+    An IdGenerator which makes placeholder ids, recording how it was called.
+
+    :attr:`calls` lists ``(method name, args, created ids)``.
+    """
+    def __init__(self):
+        self.calls = []
+        self._count = itertools.count()
+
+    def _record(self, method, args, created):
+        """Record a call, returning what it created."""
+        self.calls.append((method, args, created))
+        return created
+
+    def create_aside(self, definition_id, usage_id, aside_type):
+        created = (_PlaceholderId(next(self._count)), _PlaceholderId(next(self._count)))
+        return self._record('create_aside', (definition_id, usage_id, aside_type), created)
+
+    def create_usage(self, def_id):
+        return self._record('create_usage', (def_id,), _PlaceholderId(next(self._count)))
+
+    def create_definition(self, block_type, slug=None):
+        return self._record('create_definition', (block_type, slug), _PlaceholderId(next(self._count)))
+
+
+class _RecordingFieldData(KvsFieldData):
+    """
+    Field data kept in memory, which records the changes to the fields of blocks.
+
+    :attr:`changes` lists ``(is an aside, block type, definition id, usage id,
+    {saved field name: JSON value}, (deleted field names))``.
+    """
+    def __init__(self):
+        super().__init__(DictKeyValueStore())
+        self.changes = []
+
+    def _record(self, block, values, deleted):
+        """Record a change to the fields of `block`."""
+        keys = block.scope_ids
+        self.changes.append(
+            (isinstance(block, XBlockAside), keys.block_type, keys.def_id, keys.usage_id, values, deleted)
+        )
+
+    def set(self, block, name, value):
+        super().set(block, name, value)
+        self._record(block, {name: value}, ())
+
+    def set_many(self, block, update_dict):
+        super().set_many(block, update_dict)
+        self._record(block, update_dict, ())
+
+    def delete(self, block, name):
+        super().delete(block, name)
+        self._record(block, {}, (name,))
+
+
+def _replace_placeholders(value, ids):
+    """
+    Return the JSON value `value`, with the placeholder ids in it replaced by their value in `ids`.
+
+    Lists, tuples and dicts, including subclasses such as the lists of
+    :class:`~xblock.fields.ReferenceList` fields, are copied as lists, tuples
+    and dicts.
+    """
+    if isinstance(value, _PlaceholderId):
+        return ids[value]
+    if isinstance(value, list):
+        return [_replace_placeholders(item, ids) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_replace_placeholders(item, ids) for item in value)
+    if isinstance(value, dict):
+        return {_replace_placeholders(key, ids): _replace_placeholders(item, ids) for key, item in value.items()}
+    return value
+
+
+def _parse_subtree(xml):
+    """
+    Parse the XML of a block in a worker process, for :meth:`Runtime._replay_subtree`.
+
+    Returns the usage id of the block, and what the parse recorded with a
+    :class:`_RecordingIdGenerator` and a :class:`_RecordingFieldData`. Each
+    subtree is parsed by a runtime of its own, made by the runtime factory and
+    given those.
+    """
+    runtime = _WORKER_RUNTIME_FACTORY()
+    id_generator = runtime.id_generator = _RecordingIdGenerator()
+    field_data = runtime._services['field-data'] = _RecordingFieldData()  # pylint: disable=protected-access
+    root = etree.fromstring(xml, runtime.xml_parser)
+    usage_id = runtime._usage_id_from_node(root, _PARENT_PLACEHOLDER)  # pylint: disable=protected-access
+    return usage_id, id_generator.calls, field_data.changes
+
+
+def _index_chunk(usage_ids):
+    """Return ``(usage_id, index_dictionary)`` for each of `usage_ids`, in a worker process."""
+    return [
+        (block.scope_ids.usage_id, block.index_dictionary())
+        for block in _WORKER_RUNTIME.get_blocks(usage_ids)
+    ]
+
+
+class BadPath(Exception):
+    """Bad path exception thrown when path cannot be found."""
+
+
+_QUERYPATH_LEXER = RegexLexer(
+    ("dotdot", r"\.\."),
+    ("dot", r"\."),
+    ("slashslash", r"//"),
+    ("slash", r"/"),
+    ("atword", r"@\w+"),
+    ("word", r"\w+"),
+    ("err", r"."),
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_querypath(path):
+    """
+    Parse a path for :meth:`Runtime.querypath` into a tuple of (query method name, arguments) to apply in turn.
+    """
+    steps = []
+    ROOT, SEP, WORD, FINAL = range(4)  # pylint: disable=C0103
+    state = ROOT
+    for tokname, toktext in _QUERYPATH_LEXER.lex(path):
+        if state == FINAL:
+            # Shouldn't be any tokens after a last token.
+            raise BadPath()
+        if tokname == "dotdot":
+            # .. (parent)
+            if state == WORD:
+                raise BadPath()
+            steps.append(("parent", ()))
+            state = WORD
+        elif tokname == "dot":
+            # . (current node)
+            if state == WORD:
+                raise BadPath()
+            state = WORD
+        elif tokname == "slashslash":
+            # // (descendants)
+            if state == SEP:
+                raise BadPath()
+            if state == ROOT:
+                steps.append(("root", ()))
+            steps.append(("descendants", ()))
+            state = SEP
+        elif tokname == "slash":
+            # / (here, or the root of the tree at the start)
+            if state == SEP:
+                raise BadPath()
+            if state == ROOT:
+                steps.append(("root", ()))
+            state = SEP
+        elif tokname == "atword":
+            # @xxx (attribute access)
+            if state != SEP:
+                raise BadPath()
+            steps.append(("attr", (toktext[1:],)))
+            state = FINAL
+        elif tokname == "word":
+            # xxx (tag selection)
+            if state != SEP:
+                raise BadPath()
+            steps.extend([("children", ()), ("tagged", (toktext,))])
+            state = WORD
+        else:
+            raise BadPath("Invalid thing: %r" % toktext)
+    return tuple(steps)
+
+
+class FieldSizeStats(namedtuple('FieldSizeStats', 'block_type field_name saves total_bytes max_bytes max_usage_id')):
+    """
+    Serialized sizes seen by a :class:`FieldSizeService` for one field of a block type, or for whole
+    saves of a block type (when `field_name` is None).
+    """
+    __slots__ = ()
+
+
+class FieldSizeService:
+    """
+    An implementation of the runtime "field-size" service.
+
+    Blocks report the serialized size in bytes of the fields written by each
+    ``save()`` to this service, which keeps the largest and total sizes seen per
+    field and per save of each block type, and optionally limits them.
+
+    Limits are in bytes of JSON. `field_soft_limit` and `field_hard_limit` apply to
+    fields that don't declare their own ``soft_size_limit`` and ``hard_size_limit``
+    runtime options. `block_soft_limit` and `block_hard_limit` apply to the total
+    size of the fields written by one save. Going over a soft limit logs a warning,
+    while going over a hard limit raises :class:`~xblock.exceptions.FieldSizeLimitError`
+    and prevents the save.
+
+    Arguments:
+        scopes: if given, only account for fields of these scopes (e.g. ``[Scope.user_state]``).
+    """
+    def __init__(
+            self, scopes=None, field_soft_limit=None, field_hard_limit=None,
+            block_soft_limit=None, block_hard_limit=None,
+    ):
+        self.scopes = None if scopes is None else frozenset(scopes)
+        self.field_soft_limit = field_soft_limit
+        self.field_hard_limit = field_hard_limit
+        self.block_soft_limit = block_soft_limit
+        self.block_hard_limit = block_hard_limit
+        # Maps (block_type, field_name) to [saves, total_bytes, max_bytes, max_usage_id].
+        # A field_name of None holds the totals of whole saves.
+        self._stats = {}
+
+    def record_save(self, block, sizes):
+        """
+        Account for `block` saving fields of the given `sizes`, a dict of field names to sizes in bytes.
+
+        Raises :class:`~xblock.exceptions.FieldSizeLimitError` if a hard limit is exceeded,
+        in which case nothing is recorded.
+        """
+        all_fields = [block.fields[field_name] for field_name in sizes]
+        if self.scopes is not None:
+            sizes = {
+                field_name: size for field_name, size in sizes.items()
+                if block.fields[field_name].scope in self.scopes
+            }
+        if not sizes:
+            return
+
+        usage_id = block.scope_ids.usage_id
+        for field_name, size in sizes.items():
+            # Limits declared on the field itself have already been applied by the block.
+            runtime_options = block.fields[field_name].runtime_options
+            self._check_limit(
+                all_fields, f"Field {field_name} of {usage_id}", size,
+                None if 'soft_size_limit' in runtime_options else self.field_soft_limit,
+                None if 'hard_size_limit' in runtime_options else self.field_hard_limit,
+            )
+        block_size = sum(sizes.values())
+        self._check_limit(all_fields, f"Save of {usage_id}", block_size, self.block_soft_limit, self.block_hard_limit)
+
+        block_type = block.scope_ids.block_type
+        for field_name, size in sizes.items():
+            self._add(block_type, field_name, size, usage_id)
+        self._add(block_type, None, block_size, usage_id)
+
+    def _check_limit(self, fields, description, size, soft_limit, hard_limit):
+        """Warn about or refuse saving `fields` if `size` is over the given limits."""
+        if hard_limit is not None and size > hard_limit:
+            raise FieldSizeLimitError([], fields, f"{description} is {size} bytes, over its limit of {hard_limit}")
+        if soft_limit is not None and size > soft_limit:
+            log.warning("%s is %d bytes, over its soft limit of %d", description, size, soft_limit)
+
+    def _add(self, block_type, field_name, size, usage_id):
+        """Add one save of `size` bytes to the stats of `field_name` in `block_type`."""
+        stats = self._stats.setdefault((block_type, field_name), [0, 0, -1, None])
+        stats[0] += 1
+        stats[1] += size
+        if size > stats[2]:
+            stats[2] = size
+            stats[3] = usage_id
+
+    def largest_fields(self, limit=10, block_type=None):
+        """
+        Return the :class:`FieldSizeStats` of the `limit` fields with the largest saves, largest first.
+
+        Arguments:
+            block_type: if given, only report fields of this block type.
+        """
+        return self._largest(limit, block_type, fields=True)
+
+    def largest_blocks(self, limit=10):
+        """
+        Return the :class:`FieldSizeStats` of the `limit` block types with the largest saves, largest first.
+        """
+        return self._largest(limit, None, fields=False)
+
+    def _largest(self, limit, block_type, fields):
+        """Return the largest `limit` stats, either for fields or for whole saves."""
+        stats = [
+            FieldSizeStats(stats_block_type, field_name, *values)
+            for (stats_block_type, field_name), values in self._stats.items()
+            if (field_name is not None) == fields and block_type in (None, stats_block_type)
+        ]
+        stats.sort(key=lambda item: item.max_bytes, reverse=True)
+        return stats[:limit]
+
+    def reset(self):
+        """Forget all sizes seen so far."""
+        self._stats.clear()
+
+
 class NullI18nService:
     """
     A simple implementation of the runtime "i18n" service.
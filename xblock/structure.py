@@ -0,0 +1,319 @@
+"""
+A compact, reusable record of the parent/child graph of a tree of blocks.
+"""
+from array import array
+from collections import deque
+import json
+import struct
+import sys
+
+
+class BlockStructure:
+    """
+    The usage ids, block types and parent/child links of the blocks under a root.
+
+    Blocks are numbered in breadth-first order from the root, so that every
+    block comes after its parent. The graph is kept in arrays indexed by those
+    numbers: the block type of each block (as an index into `block_types`), the
+    index of its parent (-1 for the root), and the range of `child_index` which
+    lists the indexes of its children, from ``child_start[i]`` to
+    ``child_start[i + 1]``.
+
+    A block reachable through more than one parent is only numbered once, and
+    its parent is the first one found.
+
+    Build one with :meth:`from_runtime`, which instantiates each block once to
+    read its children, and save it for later requests or other processes with
+    :meth:`to_bytes` and :meth:`from_bytes`.
+    """
+    # The format of to_bytes(): a magic number, the length of a JSON header, the
+    # header, and the arrays as little-endian 32-bit ints.
+    MAGIC = b'XBS\x01'
+    TYPECODE = 'i'
+
+    def __init__(self, usage_ids, block_types, types, parents, child_start, child_index):
+        self.usage_ids = list(usage_ids)
+        self.block_types = list(block_types)
+        self.types = array(self.TYPECODE, types)
+        self.parents = array(self.TYPECODE, parents)
+        self.child_start = array(self.TYPECODE, child_start)
+        self.child_index = array(self.TYPECODE, child_index)
+        self._indexes = None
+
+    @classmethod
+    def from_runtime(cls, runtime, root_usage_id, batch_size=100):
+        """
+        Build the structure of the blocks under `root_usage_id`, reading them from `runtime`.
+
+        Blocks are instantiated `batch_size` at a time with
+        :meth:`.Runtime.get_blocks`, and dropped once their children are read.
+        """
+        usage_ids = [root_usage_id]
+        indexes = {root_usage_id: 0}
+        block_types = {}
+        types = []
+        parents = [-1]
+        child_start = []
+        child_index = []
+
+        position = 0
+        while position < len(usage_ids):
+            batch = usage_ids[position:position + batch_size]
+            for block in runtime.get_blocks(batch):
+                types.append(block_types.setdefault(block.scope_ids.block_type, len(block_types)))
+                child_start.append(len(child_index))
+                for child_id in (block.children if block.has_children else ()):
+                    if child_id not in indexes:
+                        indexes[child_id] = len(usage_ids)
+                        usage_ids.append(child_id)
+                        parents.append(position)
+                    child_index.append(indexes[child_id])
+                position += 1
+        child_start.append(len(child_index))
+
+        structure = cls(usage_ids, block_types, types, parents, child_start, child_index)
+        structure._indexes = indexes
+        return structure
+
+    # Serialization
+
+    def to_bytes(self, serialize_id=str):
+        """
+        Return the structure as bytes, for :meth:`from_bytes`.
+
+        `serialize_id` converts each usage id to a JSON-serializable value.
+        """
+        header = json.dumps({
+            'usage_ids': [serialize_id(usage_id) for usage_id in self.usage_ids],
+            'block_types': self.block_types,
+            'child_count': len(self.child_index),
+        }, separators=(',', ':')).encode('utf-8')
+        arrays = [self.types, self.parents, self.child_start, self.child_index]
+        if sys.byteorder != 'little':
+            arrays = [array(self.TYPECODE, values) for values in arrays]
+            for values in arrays:
+                values.byteswap()
+        return b''.join([self.MAGIC, struct.pack('<I', len(header)), header] + [values.tobytes() for values in arrays])
+
+    @classmethod
+    def from_bytes(cls, data, deserialize_id=None):
+        """
+        Return a structure from bytes returned by :meth:`to_bytes`.
+
+        `deserialize_id`, if given, converts each serialized usage id back to a usage id.
+
+        Raises:
+            ValueError: if `data` isn't a serialized structure.
+        """
+        data = memoryview(data)
+        magic_size = len(cls.MAGIC)
+        if bytes(data[:magic_size]) != cls.MAGIC:
+            raise ValueError("Not a serialized BlockStructure")
+        (header_size,) = struct.unpack_from('<I', data, magic_size)
+        offset = magic_size + 4
+        header = json.loads(bytes(data[offset:offset + header_size]))
+        offset += header_size
+
+        usage_ids = header['usage_ids']
+        if deserialize_id is not None:
+            usage_ids = [deserialize_id(usage_id) for usage_id in usage_ids]
+        itemsize = array(cls.TYPECODE).itemsize
+
+        def read_array(offset, count):
+            """Read an array of `count` ints at `offset`."""
+            end = offset + count * itemsize
+            if end > len(data):
+                raise ValueError("Truncated BlockStructure")
+            values = array(cls.TYPECODE, bytes(data[offset:end]))
+            if sys.byteorder != 'little':
+                values.byteswap()
+            return values, end
+
+        types, offset = read_array(offset, len(usage_ids))
+        parents, offset = read_array(offset, len(usage_ids))
+        child_start, offset = read_array(offset, len(usage_ids) + 1)
+        child_index, offset = read_array(offset, header['child_count'])
+        return cls(usage_ids, header['block_types'], types, parents, child_start, child_index)
+
+    # Lookups
+
+    def __len__(self):
+        return len(self.usage_ids)
+
+    def __contains__(self, usage_id):
+        return usage_id in self._index_of
+
+    @property
+    def root(self):
+        """The usage id of the root block."""
+        return self.usage_ids[0]
+
+    @property
+    def _index_of(self):
+        """A dict from usage id to block index, built on first use."""
+        if self._indexes is None:
+            self._indexes = {usage_id: index for index, usage_id in enumerate(self.usage_ids)}
+        return self._indexes
+
+    def index(self, usage_id):
+        """
+        Return the index of `usage_id`.
+
+        Raises:
+            KeyError: if `usage_id` isn't in the structure.
+        """
+        return self._index_of[usage_id]
+
+    def block_type(self, usage_id):
+        """Return the block type of `usage_id`."""
+        return self.block_types[self.types[self.index(usage_id)]]
+
+    def parent(self, usage_id):
+        """Return the usage id of the parent of `usage_id`, or None for the root."""
+        parent = self.parents[self.index(usage_id)]
+        return None if parent < 0 else self.usage_ids[parent]
+
+    def children(self, usage_id):
+        """Return the usage ids of the children of `usage_id`, in order."""
+        return [self.usage_ids[child] for child in self.child_indexes(self.index(usage_id))]
+
+    def child_indexes(self, index):
+        """Return the indexes of the children of block `index`."""
+        return self.child_index[self.child_start[index]:self.child_start[index + 1]]
+
+    # Traversals
+
+    def _pruned(self, index, prune):
+        """Return whether `prune` excludes block `index` (and what is under it)."""
+        return prune is not None and prune(self.usage_ids[index], self.block_types[self.types[index]])
+
+    def bfs(self, start=None, prune=None):
+        """
+        Yield the usage ids of `start` (the root by default) and the blocks under it, breadth first.
+
+        `prune`, if given, is called with the usage id and block type of each
+        block; a block for which it returns True is skipped with all the blocks
+        under it.
+        """
+        first = 0 if start is None else self.index(start)
+        if self._pruned(first, prune):
+            return
+        seen = {first}
+        queue = deque([first])
+        while queue:
+            index = queue.popleft()
+            yield self.usage_ids[index]
+            for child in self.child_indexes(index):
+                if child not in seen:
+                    seen.add(child)
+                    if not self._pruned(child, prune):
+                        queue.append(child)
+
+    def dfs(self, start=None, prune=None):
+        """
+        Yield the usage ids of `start` (the root by default) and the blocks under it, depth first (pre-order).
+
+        `prune` works as for :meth:`bfs`.
+        """
+        first = 0 if start is None else self.index(start)
+        if self._pruned(first, prune):
+            return
+        seen = {first}
+        stack = [first]
+        while stack:
+            index = stack.pop()
+            yield self.usage_ids[index]
+            for child in reversed(self.child_indexes(index)):
+                if child not in seen:
+                    seen.add(child)
+                    if not self._pruned(child, prune):
+                        stack.append(child)
+
+    def ancestors(self, usage_id, prune=None):
+        """
+        Yield the usage ids of the parent of `usage_id`, its parent, and so on up to the root.
+
+        `prune` works as for :meth:`bfs`: the first ancestor it returns True for
+        stops the walk, and isn't yielded.
+        """
+        index = self.parents[self.index(usage_id)]
+        while index >= 0 and not self._pruned(index, prune):
+            yield self.usage_ids[index]
+            index = self.parents[index]
+
+    def blocks_of_type(self, block_type):
+        """Return the usage ids of the blocks of `block_type`, in breadth-first order."""
+        try:
+            type_index = self.block_types.index(block_type)
+        except ValueError:
+            return []
+        return [usage_id for usage_id, index in zip(self.usage_ids, self.types) if index == type_index]
+
+
+class BlockQuery:
+    """
+    A selection of blocks in a :class:`BlockStructure`, for :meth:`.Runtime.query`.
+
+    Navigating (:meth:`parent`, :meth:`children`, :meth:`descendants`,
+    :meth:`tagged`) only uses the structure, and returns a new query. Blocks are
+    only instantiated, through `runtime`, by :meth:`blocks` and :meth:`attr`.
+    Iterating over a query yields the usage ids of its blocks.
+    """
+    def __init__(self, runtime, structure, indexes):
+        self.runtime = runtime
+        self.structure = structure
+        self.indexes = list(dict.fromkeys(indexes))
+
+    def _select(self, indexes):
+        """Return a query of the blocks at `indexes`."""
+        return BlockQuery(self.runtime, self.structure, indexes)
+
+    def __iter__(self):
+        usage_ids = self.structure.usage_ids
+        return (usage_ids[index] for index in self.indexes)
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def root(self):
+        """Select the root of the structure."""
+        return self._select([0])
+
+    def parent(self):
+        """Select the parents of the blocks."""
+        parents = self.structure.parents
+        return self._select(parents[index] for index in self.indexes if parents[index] >= 0)
+
+    def children(self):
+        """Select the children of the blocks."""
+        child_indexes = self.structure.child_indexes
+        return self._select(child for index in self.indexes for child in child_indexes(index))
+
+    def descendants(self):
+        """Select the blocks and every block under them, depth first (like XPath's ``//``)."""
+        child_indexes = self.structure.child_indexes
+        selected = {}
+        stack = list(reversed(self.indexes))
+        while stack:
+            index = stack.pop()
+            if index not in selected:
+                selected[index] = None
+                stack.extend(reversed(child_indexes(index)))
+        return self._select(selected)
+
+    def tagged(self, *block_types):
+        """Select the blocks of any of `block_types`."""
+        type_indexes = {
+            type_index for type_index, block_type in enumerate(self.structure.block_types)
+            if block_type in block_types
+        }
+        types = self.structure.types
+        return self._select(index for index in self.indexes if types[index] in type_indexes)
+
+    def blocks(self):
+        """Return the selected blocks, instantiated together."""
+        return self.runtime.get_blocks(list(self))
+
+    def attr(self, name):
+        """Return the values of the field `name` of the selected blocks that have it."""
+        return [getattr(block, name) for block in self.blocks() if name in block.fields]
@@ -0,0 +1,3 @@
+"""
+Benchmarks of XBlock internals, runnable as scripts (``python -m xblock.test.benchmarks.<name>``).
+"""
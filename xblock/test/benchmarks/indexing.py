@@ -0,0 +1,73 @@
+"""
+Benchmark of producing search index documents for a synthetic course with
+``Runtime.iter_index_dictionaries``, in this process and in a process pool.
+
+Run with ``python -m xblock.test.benchmarks.indexing [--blocks N] [--processes N] [--chunk-size N]``.
+"""
+import argparse
+import functools
+import time
+import tracemalloc
+
+from xblock.test.tools import make_course, make_course_runtime
+
+
+def run(blocks=20000, processes=0, chunk_size=100, fanout=20, trace_memory=False):
+    """
+    Time each indexing step once, returning a dict of step name to seconds.
+
+    With `trace_memory`, also return the peak memory allocated while indexing
+    in this process, in bytes, as ``peak_memory``.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    runtime, root_id = make_course(blocks, fanout)
+    timings['build'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    count = sum(1 for _ in runtime.iter_index_dictionaries(root_id, chunk_size=chunk_size))
+    timings['index'] = time.perf_counter() - start
+    assert count == blocks
+
+    if trace_memory:
+        # Traced separately, as tracing slows allocations down.
+        tracemalloc.start()
+        for _ in runtime.iter_index_dictionaries(root_id, chunk_size=chunk_size):
+            pass
+        timings['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    if processes:
+        start = time.perf_counter()
+        count = sum(1 for _ in runtime.iter_index_dictionaries(
+            root_id, chunk_size=chunk_size, processes=processes,
+            runtime_factory=functools.partial(make_course_runtime, blocks, fanout),
+        ))
+        timings['pool'] = time.perf_counter() - start
+        assert count == blocks
+
+    return timings
+
+
+def main(argv=None):
+    """
+    Run the benchmark from the command line, printing the time of each step.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=20000, help="number of blocks in the course")
+    parser.add_argument('--processes', type=int, default=0, help="number of worker processes to also index with")
+    parser.add_argument('--chunk-size', type=int, default=100, help="number of blocks indexed at a time")
+    args = parser.parse_args(argv)
+
+    timings = run(args.blocks, args.processes, args.chunk_size, trace_memory=True)
+    print(f"Indexing a course of {args.blocks} blocks, {args.chunk_size} at a time:")
+    for step, value in timings.items():
+        if step == 'peak_memory':
+            print(f"  {'peak memory':<12} {value / 2 ** 20:9.3f} MiB")
+        else:
+            print(f"  {step:<12} {value * 1000:9.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark of importing OLX for a very wide container: one parent with many
+children, followed by a membership test for each child in ``children``,
+importing it again with ``streaming=True``, and opening one child of a lazy
+import (``lazy=True``).
+
+Run with ``python -m xblock.test.benchmarks.olx_import [--children N] [--repeat N]``.
+"""
+import argparse
+import time
+
+from xblock.core import XBlock
+from xblock.runtime import DictKeyValueStore, KvsFieldData
+from xblock.test.tools import TestRuntime
+
+
+class BenchmarkContainer(XBlock):
+    """A container block."""
+    has_children = True
+
+
+class BenchmarkLeaf(XBlock):
+    """A childless block."""
+
+
+@XBlock.register_temp_plugin(BenchmarkContainer, 'benchmark_container')
+@XBlock.register_temp_plugin(BenchmarkLeaf, 'benchmark_leaf')
+def run(children=10000):
+    """
+    Time each import step once, returning a dict of step name to seconds.
+    """
+    timings = {}
+    runtime = TestRuntime(services={'field-data': KvsFieldData(DictKeyValueStore())})
+    olx = '<benchmark_container>' + '<benchmark_leaf/>' * children + '</benchmark_container>'
+
+    start = time.perf_counter()
+    parent = runtime.get_block(runtime.parse_xml_string(olx))
+    timings['import'] = time.perf_counter() - start
+
+    usage_ids = list(parent.children)
+    start = time.perf_counter()
+    missing = [usage_id for usage_id in usage_ids if usage_id not in parent.children]
+    timings['membership'] = time.perf_counter() - start
+    assert not missing
+
+    start = time.perf_counter()
+    runtime.parse_xml_string(olx, streaming=True)
+    timings['streamed import'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lazy_runtime = TestRuntime(services={'field-data': KvsFieldData(DictKeyValueStore())})
+    lazy_parent_id = lazy_runtime.parse_xml_string(olx, lazy=True)
+    lazy_runtime.get_block(lazy_runtime.get_block(lazy_parent_id).children[-1])
+    timings['lazy preview'] = time.perf_counter() - start
+
+    timings['total'] = sum(timings.values())
+    return timings
+
+
+def main(argv=None):
+    """
+    Run the benchmark from the command line, printing the best time of each step.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--children', type=int, default=10000, help="number of children of the container")
+    parser.add_argument('--repeat', type=int, default=5, help="number of runs to take the best of")
+    args = parser.parse_args(argv)
+
+    runs = [run(args.children) for _ in range(args.repeat)]
+    print(f"Importing a container with {args.children} children:")
+    for step in runs[0]:
+        best = min(timings[step] for timings in runs)
+        print(f"  {step:<16} {best * 1000:9.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark of runtime startup: defining XBlock classes, mixing them with
+runtime mixins, and reading their field tables.
+
+Run with ``python -m xblock.test.benchmarks.startup [--classes N] [--fields N] [--repeat N]``.
+"""
+import argparse
+import time
+
+from xblock.core import XBlock, XBlockMixin
+from xblock.fields import Integer, List, Scope, String
+from xblock.runtime import Mixologist
+
+
+class BenchmarkSettingsMixin(XBlockMixin):
+    """A runtime mixin adding settings fields, like those of edx-platform."""
+    display_name = String(scope=Scope.settings)
+    weight = Integer(scope=Scope.settings)
+    tags = List(scope=Scope.settings)
+
+
+class BenchmarkStateMixin(XBlockMixin):
+    """A runtime mixin adding a user-state field."""
+    attempts = Integer(scope=Scope.user_state)
+
+
+MIXINS = (BenchmarkSettingsMixin, BenchmarkStateMixin)
+SCOPES = (Scope.content, Scope.settings, Scope.user_state, Scope.preferences)
+
+
+def make_block_classes(count, fields_per_class):
+    """
+    Define `count` XBlock classes with `fields_per_class` fields each, across several scopes.
+    """
+    classes = []
+    for index in range(count):
+        attrs = {
+            f'field_{number}': String(scope=SCOPES[number % len(SCOPES)])
+            for number in range(fields_per_class)
+        }
+        base = classes[index - 1] if index % 10 else XBlock
+        classes.append(type(f'BenchmarkBlock{index}', (base,), attrs))
+    return classes
+
+
+def run(count=100, fields_per_class=10):
+    """
+    Time each startup step once, returning a dict of step name to seconds.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    classes = make_block_classes(count, fields_per_class)
+    timings['define'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mixologist = Mixologist(MIXINS)
+    mixed = [mixologist.mix(block_class) for block_class in classes]
+    timings['mix'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for block_class in mixed:
+        block_class.fields  # pylint: disable=pointless-statement
+    timings['fields'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for block_class in mixed:
+        block_class._get_field_serializer()  # pylint: disable=protected-access
+    timings['serializer'] = time.perf_counter() - start
+
+    timings['total'] = sum(timings.values())
+    return timings
+
+
+def main(argv=None):
+    """
+    Run the benchmark from the command line, printing the best time of each step.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--classes', type=int, default=100, help="number of block classes to define")
+    parser.add_argument('--fields', type=int, default=10, help="number of fields on each block class")
+    parser.add_argument('--repeat', type=int, default=5, help="number of runs to take the best of")
+    args = parser.parse_args(argv)
+
+    runs = [run(args.classes, args.fields) for _ in range(args.repeat)]
+    print(f"Loading and mixing {args.classes} block classes with {args.fields} fields each:")
+    for step in runs[0]:
+        best = min(timings[step] for timings in runs)
+        print(f"  {step:<12} {best * 1000:9.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,11 @@
 """
 Test XBlock Aside
 """
+from io import BytesIO
 from unittest import TestCase
 
+from lxml import etree
+
 from web_fragments.fragment import Fragment
 
 from xblock.core import XBlockAside, XBlock
@@ -10,7 +13,7 @@ from xblock.fields import ScopeIds, Scope, String
 from xblock.runtime import DictKeyValueStore, KvsFieldData
 from xblock.test.test_runtime import TestXBlock
 from xblock.test.tools import TestRuntime
-from xblock.test.test_parsing import Leaf, XmlTestMixin
+from xblock.test.test_parsing import Container, Leaf, XmlTestMixin
 
 
 class TestAside(XBlockAside):
@@ -161,6 +164,22 @@ class ParsingTest(AsideRuntimeSetup, XmlTestMixin):
         aside = self.runtime.get_aside_of_type(block, 'test_aside')
         self.assertEqual(aside.content, "my text!")
 
+    @XBlockAside.register_temp_plugin(TestAside, 'test_aside')
+    @XBlock.register_temp_plugin(Leaf)
+    @XBlock.register_temp_plugin(Container)
+    def test_streaming(self):
+        usage_id = self.runtime.parse_xml_string("""
+            <container>
+                <leaf/>
+                <test_aside xblock-family='xblock_asides.v1' data2='aside parsed'/>
+                <leaf/>
+            </container>
+        """, streaming=True)
+        block = self.runtime.get_block(usage_id)
+        assert len(block.children) == 2
+        aside = self.runtime.get_aside_of_type(block, 'test_aside')
+        self.assertEqual(aside.data2, "aside parsed")
+
     def _assert_xthing_equal(self, first, second):
         """
         A quasi-equality check for xblock and xblock aside. Checks type and fields. Ignores other id and
@@ -192,3 +211,20 @@ class ParsingTest(AsideRuntimeSetup, XmlTestMixin):
         self._test_roundrip_of(block)
         aside.data2 = 'user data'
         self._test_roundrip_of(block)
+
+    @XBlockAside.register_temp_plugin(TestAside, 'test_aside')
+    @XBlock.register_temp_plugin(Leaf)
+    def test_export_onto_root(self):
+        """
+        Asides are exported as children of the root element, which is the block's
+        """
+        block, aside = self.create_block()
+        aside.content = 'content of test aside'
+        aside.save()
+        for streaming in (False, True):
+            output = BytesIO()
+            self.runtime.export_to_xml(block, output, streaming=streaming)
+            root = etree.fromstring(output.getvalue())
+            self.assertEqual(root.tag, 'leaf')
+            self.assertEqual([child.tag for child in root], ['test_aside'], streaming)
+            self.assertEqual(root[0].text, 'content of test aside')
@@ -0,0 +1,24 @@
+"""
+Smoke tests of the benchmarks in xblock.test.benchmarks, run with small inputs.
+"""
+import unittest
+
+from xblock.test.benchmarks import indexing, olx_import, startup
+
+
+class TestBenchmarks(unittest.TestCase):
+    """
+    Check that each benchmark runs and reports its steps.
+    """
+
+    def test_olx_import_benchmark(self):
+        timings = olx_import.run(children=20)
+        assert set(timings) == {'import', 'membership', 'streamed import', 'lazy preview', 'total'}
+
+    def test_indexing_benchmark(self):
+        timings = indexing.run(blocks=30, chunk_size=7, fanout=4, trace_memory=True)
+        assert set(timings) == {'build', 'index', 'peak_memory'}
+
+    def test_startup_benchmark(self):
+        timings = startup.run(count=12, fields_per_class=3)
+        assert set(timings) == {'define', 'mix', 'fields', 'serializer', 'total'}
@@ -26,7 +26,7 @@ from xblock.exceptions import (
 )
 from xblock.fields import Dict, Float, Integer, List, Set, Field, Scope, ScopeIds, String
 from xblock.field_data import FieldData, DictFieldData
-from xblock.runtime import Runtime
+from xblock.runtime import Mixologist, Runtime
 
 from xblock.test.tools import (
     WarningTestMixin,
@@ -1261,6 +1261,109 @@ class TestGetExplicitlySetFieldsByScope(unittest.TestCase):
         assert 'content_field' not in block.get_explicitly_set_fields_by_scope(Scope.content)
 
 
+class TestFieldSerializer(unittest.TestCase):
+    """
+    Tests for the per-class serializer behind saving and exporting fields.
+    """
+
+    class AlwaysSet(String):
+        """A field type that considers itself set on every block."""
+        def is_set_on(self, xblock):
+            return True
+
+    class FieldBlock(XBlock):
+        """XBlock with fields across multiple scopes for testing."""
+        content_field = String(scope=Scope.content)
+        settings_field = String(scope=Scope.settings)
+        user_field = List(scope=Scope.user_state)
+
+    def _make_block(self, block_class, field_data_dict=None):
+        field_data = DictFieldData(field_data_dict or {})
+        runtime = TestRuntime(services={'field-data': field_data})
+        return block_class(runtime, scope_ids=Mock(spec=ScopeIds))
+
+    def test_compiled_once_per_class(self):
+        serializer = self.FieldBlock._get_field_serializer()
+        assert self.FieldBlock._get_field_serializer() is serializer
+        assert XBlock._get_field_serializer() is not serializer
+        assert serializer.fields_by_scope[Scope.user_state] == (self.FieldBlock.user_field,)
+
+    def test_field_data_looked_up_once(self):
+        block = self._make_block(self.FieldBlock, {'content_field': 'a', 'settings_field': 'b'})
+        with patch.object(block.runtime, 'service', wraps=block.runtime.service) as service:
+            assert block.get_explicitly_set_fields_by_scope(Scope.settings) == {'settings_field': 'b'}
+        # One lookup to check which fields are set, one to read the single set field.
+        assert service.call_count == 2
+
+    def test_save_uses_cached_values(self):
+        block = self._make_block(self.FieldBlock)
+        block.user_field.append(1)
+        block.content_field = 'new'
+        block.save()
+        assert block._field_data.get(block, 'user_field') == [1]
+        assert block._field_data.get(block, 'content_field') == 'new'
+        assert not block._get_fields_to_save()
+
+    def test_overridden_is_set_on(self):
+        class CustomBlock(XBlock):
+            """XBlock with a field that overrides is_set_on."""
+            custom = self.AlwaysSet(scope=Scope.content, default='x')
+
+        block = self._make_block(CustomBlock)
+        assert block.get_explicitly_set_fields_by_scope(Scope.content) == {'custom': 'x'}
+
+
+class TestFieldTables(unittest.TestCase):
+    """
+    Tests for the field tables built by ``_AutoNamedFieldsMetaclass``.
+    """
+
+    class Base(XBlock):
+        """Block whose fields are overridden below."""
+        first = String(scope=Scope.content)
+        second = Integer(scope=Scope.settings)
+
+    class Left(Base):
+        """Block which doesn't override anything."""
+        left = String(scope=Scope.settings)
+
+    class Right(Base):
+        """Block which overrides a base field."""
+        second = Integer(scope=Scope.user_state)
+
+    class PlainMixin:
+        """A mixin with a Field which doesn't use the metaclass."""
+        plain = List(scope=Scope.user_state)
+
+    def test_order_and_scopes(self):
+        # Fields of the bases first, then the class's own fields by name.
+        assert list(self.Right.fields) == ['name', 'parent', 'tags', 'first', 'second']
+        assert list(self.Left.fields) == ['name', 'parent', 'tags', 'first', 'second', 'left']
+        assert self.Right._fields_by_scope[Scope.user_state] == (self.Right.second,)
+        assert self.Base.second in self.Base._fields_by_scope[Scope.settings]
+        assert self.Base.second not in self.Right._fields_by_scope[Scope.settings]
+
+    def test_diamond_follows_mro(self):
+        class Diamond(self.Left, self.Right):
+            """Block inheriting the same field from two paths."""
+
+        assert Diamond.fields['second'] is self.Right.second
+        assert Diamond.fields['left'] is self.Left.left
+        assert Diamond.second is Diamond.fields['second']
+
+    def test_plain_mixin_fields_are_named(self):
+        class Mixed(self.PlainMixin, self.Base):
+            """Block with a plain mixin."""
+
+        assert Mixed.fields['plain'] is self.PlainMixin.plain
+        assert self.PlainMixin.plain.name == 'plain'
+
+    def test_mixologist(self):
+        mixed = Mixologist([self.PlainMixin]).mix(self.Left)
+        assert set(mixed.fields) == set(self.Left.fields) | {'plain'}
+        assert mixed._fields_by_scope[Scope.user_state] == (self.PlainMixin.plain,)
+
+
 class TestGetIconClass(unittest.TestCase):
     """
     Tests for ``XBlock.get_icon_class``.
@@ -41,9 +41,6 @@ class AttrAssertionMixin(TestCase):
 class TestScopedStorage(AttrAssertionMixin, TestCase):
     """Tests of the scoped storage capaility of Blocklikes."""
 
-    # pylint doesn't understand that @class_lazy fields is a dict.
-    # pylint: disable=unsubscriptable-object
-
     class ScopedStorageTester(Blocklike):
         """Toy class for scoped storage testing"""
 
@@ -231,9 +228,6 @@ class TestViews(TestCase):
 class TestXmlSerialization(TestCase):
     """ Tests for XML (de)serialization capability of Blocklikes """
 
-    # pylint doesn't understand that @class_lazy fields is a dict.
-    # pylint: disable=unsubscriptable-object
-
     class TestXBlock(XBlock):
         """ XBlock for XML export test """
         etree_node_tag = 'test_xblock'
@@ -292,6 +286,21 @@ class TestXmlSerialization(TestCase):
             else:
                 self.assertIsNotNone(node.get(key))
 
+    def test_attribute_order(self):
+        class UnorderedXBlock(XBlock):
+            """ XBlock whose fields aren't declared in alphabetical order """
+            etree_node_tag = 'unordered_xblock'
+
+            zulu = String()
+            alpha = String()
+
+        block = self._make_block(UnorderedXBlock)
+        block.zulu = block.alpha = block.tags = "x"
+        node = etree.Element(UnorderedXBlock.etree_node_tag)
+        block.add_xml_to_node(node)
+        # Fields are exported in the order of `fields`: the inherited ones, then the others by name.
+        self.assertEqual(list(node.keys()), ['xblock-family', 'tags', 'alpha', 'zulu'])
+
     def _assert_node_elements(self, node, expected_elements):
         """
         Checks XML node elements to match expected elements.
@@ -310,8 +319,8 @@ class TestXmlSerialization(TestCase):
         node = etree.Element(self.test_xblock_tag)
 
         # Precondition check: no fields are set.
-        for field_name in self.test_xblock.fields.keys():
-            self.assertFalse(self.test_xblock.fields[field_name].is_set_on(self.test_xblock))
+        for field in self.test_xblock.fields.values():
+            self.assertFalse(field.is_set_on(self.test_xblock))
 
         self.test_xblock.add_xml_to_node(node)
 
@@ -0,0 +1,98 @@
+"""
+Tests of xblock.export.
+"""
+import gzip
+import io
+import os
+import tempfile
+from contextlib import redirect_stdout
+from unittest import TestCase
+
+from xblock import export
+from xblock.export import export_blocks, import_callable, main, output_names
+from xblock.test.tools import make_course
+
+
+def make_runtime():
+    """Return the runtime of the course exported by these tests, in any process."""
+    return make_course(blocks=30, fanout=4)[0]
+
+
+class TestExportBlocks(TestCase):
+    """
+    Tests of export_blocks and its command line.
+    """
+    def setUp(self):
+        super().setUp()
+        self.runtime, self.root_id = make_course(blocks=30, fanout=4)
+        self.unit_id = self.runtime.get_block(self.root_id).children[1]
+        output_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(output_dir.cleanup)
+        self.output_dir = output_dir.name
+
+    def expected_xml(self, usage_id):
+        """Return the compact OLX of `usage_id`."""
+        output = io.BytesIO()
+        self.runtime.export_to_xml(self.runtime.get_block(usage_id), output, pretty_print=False, streaming=True)
+        return output.getvalue()
+
+    def check_results(self, results, trace_memory=False):
+        """Check the results of exporting the root and a unit."""
+        assert [result.usage_id for result in results] == [self.root_id, self.unit_id]
+        for result in results:
+            assert result.error is None
+            assert result.seconds > 0
+            if trace_memory:
+                assert result.peak_memory > 0
+            else:
+                assert result.peak_memory is None
+            assert result.size == os.path.getsize(result.path)
+            with gzip.open(result.path) as exported:
+                assert exported.read() == self.expected_xml(result.usage_id)
+
+    def test_in_this_process(self):
+        usage_ids = [self.root_id, self.unit_id]
+        self.check_results(list(export_blocks(usage_ids, self.output_dir, make_runtime, 0)))
+        # The runtime is local to the call.
+        assert export._EXPORT_RUNTIME is None  # pylint: disable=protected-access
+        results = list(export_blocks(usage_ids, self.output_dir, make_runtime, 0, trace_memory=True))
+        self.check_results(results, trace_memory=True)
+
+    def test_in_worker_processes(self):
+        usage_ids = [self.root_id, self.unit_id]
+        self.check_results(list(export_blocks(usage_ids, self.output_dir, make_runtime, 2)))
+        results = list(export_blocks(usage_ids, self.output_dir, make_runtime, 2, trace_memory=True))
+        self.check_results(results, trace_memory=True)
+
+    def test_failed_export(self):
+        results = list(export_blocks(['missing', self.unit_id], self.output_dir, make_runtime, 0))
+        assert results[0].error.startswith('NoSuchUsage')
+        assert results[0].size == 0
+        assert results[1].error is None
+        # Only the successful export leaves a file.
+        assert os.listdir(self.output_dir) == [os.path.basename(results[1].path)]
+
+    def test_output_names(self):
+        assert output_names(['block-v1:edX+Demo+2024', 'a/b', 'a?b', '']) == [
+            'block-v1_edX_Demo_2024.xml.gz', 'a_b.xml.gz', 'a_b-2.xml.gz', 'block.xml.gz'
+        ]
+
+    def test_import_callable(self):
+        assert import_callable('xblock.test.test_export:make_runtime') is make_runtime
+        with self.assertRaises(ValueError):
+            import_callable('xblock.test.test_export')
+
+    def test_command_line(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            status = main([
+                self.root_id, 'missing', '--runtime-factory', 'xblock.test.test_export:make_runtime',
+                '--output-dir', self.output_dir, '--processes', '0', '--block-types', 'unit', 'problem',
+                '--trace-memory',
+            ])
+        assert status == 1
+        lines = output.getvalue().splitlines()
+        assert lines[0].startswith(f"{self.root_id}: ")
+        assert 'peak memory' in lines[0]
+        assert lines[1].startswith('missing: failed')
+        assert lines[2].startswith('Exported 1 of 2 blocks')
@@ -5,7 +5,7 @@ from unittest.mock import Mock
 import pytest
 
 from xblock.core import XBlock
-from xblock.exceptions import InvalidScopeError
+from xblock.exceptions import InvalidScopeError, KeyValueMultiBlockSaveError
 from xblock.fields import Scope, String
 from xblock.field_data import SplitFieldData, ReadOnlyFieldData
 from xblock.test.tools import TestRuntime
@@ -77,6 +77,42 @@ class TestSplitFieldData:
         self.content.set_many.assert_called_once_with(self.block, {'content': 'new content'})
         self.settings.set_many.assert_called_once_with(self.block, {'settings': 'new settings'})
 
+    def test_patch_many(self):
+        patch = [{'op': 'replace', 'path': '', 'value': 'new content'}]
+        self.split.patch_many(
+            self.block, {'content': 'new content', 'settings': 'new settings'}, {'content': patch}
+        )
+        self.content.patch_many.assert_called_once_with(self.block, {'content': 'new content'}, {'content': patch})
+        self.settings.patch_many.assert_called_once_with(self.block, {'settings': 'new settings'}, {})
+
+    def test_supports_json_patch(self):
+        self.content.supports_json_patch = False
+        self.settings.supports_json_patch = False
+        assert not self.split_empty.supports_json_patch
+        self.settings.supports_json_patch = True
+        assert self.split_empty.supports_json_patch
+
+    def test_set_many_blocks(self):
+        other = TestingBlock(runtime=self.runtime, scope_ids=Mock())
+        self.split.set_many_blocks([
+            (self.block, {'content': 'new content', 'settings': 'new settings'}),
+            (other, {'content': 'other content'}),
+        ])
+        self.content.set_many_blocks.assert_called_once_with([
+            (self.block, {'content': 'new content'}), (other, {'content': 'other content'}),
+        ])
+        self.settings.set_many_blocks.assert_called_once_with([(self.block, {'settings': 'new settings'})])
+
+    def test_set_many_blocks_failure(self):
+        other = TestingBlock(runtime=self.runtime, scope_ids=Mock())
+        self.settings.set_many_blocks.side_effect = KeyValueMultiBlockSaveError({self.block: []})
+        with pytest.raises(KeyValueMultiBlockSaveError) as error:
+            self.split.set_many_blocks([
+                (self.block, {'content': 'new content', 'settings': 'new settings'}),
+                (other, {'content': 'other content'}),
+            ])
+        assert error.value.saved_field_names == {self.block: {'content'}}
+
     def test_invalid_scope(self):
         with pytest.raises(InvalidScopeError):
             self.split.get(self.block, 'user_state')
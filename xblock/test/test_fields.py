@@ -3,15 +3,23 @@ Tests for classes extending Field.
 """
 # pylint: disable=protected-access
 from contextlib import contextmanager
+import copy
 import datetime as dt
 import itertools
+import json
 import math
+import io
+import os
+import pickle
+import stat
+import tempfile
 import textwrap
 import unittest
 import warnings
 
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 import ddt
+import pytest
 from lxml import etree
 import pytz
 
@@ -19,8 +27,11 @@ from xblock.core import XBlock, Scope
 from xblock.field_data import DictFieldData
 from xblock.fields import (
     Any, Boolean, Dict, Field, Float, Integer, List, Set, String, XMLString, DateTime, Reference, ReferenceList,
-    ScopeIds, Sentinel, UNIQUE_ID, scope_key, Date, Timedelta, RelativeTime, ScoreField, ListScoreField
+    ScopeIds, Sentinel, UNIQUE_ID, scope_key, Date, Timedelta, RelativeTime, ScoreField, ListScoreField,
+    LazyJSONDict, LazyJSONList, configure_shadow_type_enforcement, shadow_type_enforcement_counts,
+    Blob, BlobRef, make_json_patch, apply_json_patch, IndexedList,
 )
+from xblock.reference.plugins import LocalBlobService
 from xblock.scorable import Score
 from xblock.test.tools import TestRuntime
 
@@ -665,6 +676,56 @@ class ReferenceListTest(FieldTest):
         self.assertJSONOrSetTypeError(True)
         self.assertJSONOrSetTypeError({})
 
+    def test_indexed_value(self):
+        class Parent(XBlock):
+            """Block with a reference list."""
+            refs = ReferenceList(scope=Scope.settings)
+
+        block = Parent(TestRuntime(services={'field-data': DictFieldData({'refs': ['a', 'b']})}), scope_ids=Mock())
+        assert isinstance(block.refs, IndexedList)
+        assert 'b' in block.refs
+        block.refs.append('c')
+        block.save()
+        assert block._field_data.get(block, 'refs') == ['a', 'b', 'c']
+        assert type(block._field_data.get(block, 'refs')) is list  # pylint: disable=unidiomatic-typecheck
+
+
+class IndexedListTest(unittest.TestCase):
+    """
+    Tests of the membership index of IndexedList.
+    """
+    def test_mutations(self):
+        values = IndexedList(['a', 'b'])
+        assert 'a' in values
+        values.append('c')
+        values.extend(['d'])
+        values += ['e']
+        assert all(value in values for value in 'abcde')
+        values.remove('a')
+        assert 'a' not in values
+        values[0] = 'z'
+        assert 'b' not in values and 'z' in values
+        del values[0]
+        values.insert(0, 'y')
+        assert values.pop(0) == 'y'
+        assert 'y' not in values
+        values.clear()
+        assert 'c' not in values and not values
+
+    def test_unhashable(self):
+        values = IndexedList([['a']])
+        assert ['a'] in values
+        values.append({'b': 1})
+        assert {'b': 1} in values
+        assert 'c' not in values
+
+    def test_copies(self):
+        values = IndexedList(['a'])
+        assert 'a' in values
+        for duplicate in (copy.deepcopy(values), pickle.loads(pickle.dumps(values))):
+            assert isinstance(duplicate, IndexedList)
+            assert duplicate == ['a'] and 'a' in duplicate
+
 
 class DictTest(FieldTest):
     """
@@ -871,7 +932,6 @@ def test_setting_the_same_value_marks_field_as_dirty():
     Check that setting field to the same value marks mutable fields as dirty.
     However, since the value hasn't changed, these fields won't be saved.
     """
-    # pylint: disable=unsubscriptable-object
     class FieldTester(XBlock):
         """Test block for set - get test."""
         non_mutable = String(scope=Scope.settings)
@@ -900,6 +960,281 @@ def test_setting_the_same_value_marks_field_as_dirty():
     assert not field_tester.fields['dict_field'].is_set_on(field_tester)
 
 
+@pytest.mark.parametrize('old, new', [
+    ({'a': 1, 'b': [1, 2]}, {'a': 1, 'b': [1, 2, 3]}),
+    ({'a': 1, 'b': [1, 2, 3]}, {'b': [1], 'c': {'d/e~f': None}}),
+    ([{'x': 1}, 2, 3], [{'x': 2, 'y': []}, True]),
+    ({'a': 1}, [1]),
+    ({'same': [1, {'deep': 2}]}, {'same': [1, {'deep': 2}]}),
+    ({'a': 1}, {'a': 1.0}),
+])
+def test_json_patch_round_trip(old, new):
+    json_patch = make_json_patch(old, new)
+    patched = apply_json_patch(copy.deepcopy(old), json_patch)
+    assert json.dumps(patched) == json.dumps(new)
+
+
+def test_json_patch_is_small():
+    old = {'log': [{'attempt': number} for number in range(100)]}
+    new = copy.deepcopy(old)
+    assert not make_json_patch(old, new)
+    new['log'].append({'attempt': 100})
+    assert make_json_patch(old, new) == [{'op': 'add', 'path': '/log/100', 'value': {'attempt': 100}}]
+
+
+@pytest.mark.parametrize('json_patch', [
+    [{'op': 'move', 'path': '/a', 'from': '/b'}],
+    [{'op': 'remove', 'path': '/missing'}],
+    [{'op': 'add', 'path': '/list/5', 'value': 1}],
+    [{'op': 'replace', 'path': '/list/x', 'value': 1}],
+    [{'op': 'remove', 'path': ''}],
+])
+def test_invalid_json_patch(json_patch):
+    with pytest.raises(ValueError):
+        apply_json_patch({'a': 1, 'list': [1]}, json_patch)
+
+
+class LazyFieldTest(unittest.TestCase):
+    """
+    Tests of fields declared with ``lazy=True``.
+    """
+
+    class LazyTester(XBlock):
+        """Test block with lazily decoded fields."""
+        __test__ = False
+        dict_field = Dict(scope=Scope.user_state, lazy=True)
+        list_field = List(scope=Scope.user_state, lazy=True)
+        scores = ListScoreField(scope=Scope.user_state, lazy=True)
+
+    def setUp(self):
+        super().setUp()
+        self.field_data = DictFieldData({
+            'dict_field': {'big': {'nested': [1, 2, {'deep': True}]}, 'small': 1},
+            'list_field': [{'a': 1}, [2, 3], 4],
+            'scores': [{'raw_earned': 1, 'raw_possible': 2}],
+        })
+        self.block = self.LazyTester(
+            TestRuntime(services={'field-data': self.field_data}), scope_ids=Mock(spec=ScopeIds)
+        )
+
+    def test_nested_containers_wrapped_on_access(self):
+        value = self.block.dict_field
+        assert isinstance(value, LazyJSONDict)
+        assert type(dict.__getitem__(value, 'big')) is dict  # pylint: disable=unidiomatic-typecheck
+        assert isinstance(value['big'], LazyJSONDict)
+        assert isinstance(value['big']['nested'], LazyJSONList)
+        assert isinstance(value['big']['nested'][2], LazyJSONDict)
+        assert value == {'big': {'nested': [1, 2, {'deep': True}]}, 'small': 1}
+        assert isinstance(self.block.list_field, LazyJSONList)
+        assert [{'a': 1}, [2, 3], 4] == list(self.block.list_field)
+
+    def test_reading_does_not_save(self):
+        assert self.block.dict_field['small'] == 1
+        assert self.block.list_field[1] == [2, 3]
+        assert not self.block._get_fields_to_save()
+
+    def test_nested_change_is_saved(self):
+        self.block.dict_field['big']['nested'][2]['deep'] = False
+        self.block.list_field[0]['b'] = 2
+        assert set(self.block._get_fields_to_save()) == {'dict_field', 'list_field'}
+        self.block.save()
+
+        stored = self.field_data.get(self.block, 'dict_field')
+        assert type(stored) is dict  # pylint: disable=unidiomatic-typecheck
+        assert stored == {'big': {'nested': [1, 2, {'deep': False}]}, 'small': 1}
+        assert self.field_data.get(self.block, 'list_field') == [{'a': 1, 'b': 2}, [2, 3], 4]
+        assert not self.block._get_fields_to_save()
+
+    def test_set_replaces_lazy_value(self):
+        self.block.dict_field = {'other': 1}
+        self.block.save()
+        assert self.field_data.get(self.block, 'dict_field') == {'other': 1}
+
+    def test_copies_are_plain(self):
+        value = self.block.dict_field
+        deep = copy.deepcopy(value)
+        assert type(deep) is dict  # pylint: disable=unidiomatic-typecheck
+        assert type(deep['big']) is dict  # pylint: disable=unidiomatic-typecheck
+        deep['big']['nested'].append(5)
+        assert not value.modified  # pylint: disable=no-member
+        assert pickle.loads(pickle.dumps(value)) == value
+
+    def test_views_of_nested_values_track_changes(self):
+        for item in self.block.dict_field.values():
+            if isinstance(item, dict):
+                item['added'] = True
+        assert self.block._get_fields_to_save() == ['dict_field']
+
+    def test_dict_copies_are_wrapped(self):
+        value = self.block.dict_field
+        for copied in (dict(value), {**value}, value.copy(), dict(value.items())):
+            assert isinstance(copied['big'], LazyJSONDict)
+            assert copied['big'] is value['big']
+        dict(value)['big']['added'] = True
+        assert self.block._get_fields_to_save() == ['dict_field']
+
+    def test_list_score_field_is_decoded_eagerly(self):
+        assert self.block.scores == [Score(1, 2)]
+
+
+class ShadowTypeEnforcementTest(unittest.TestCase):
+    """
+    Tests of `configure_shadow_type_enforcement`.
+    """
+
+    class IntegerTester(XBlock):
+        """Test block with an Integer field whose type isn't enforced."""
+        __test__ = False
+        number = Integer(scope=Scope.settings)
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(configure_shadow_type_enforcement)
+        self.addCleanup(shadow_type_enforcement_counts, reset=True)
+        runtime = TestRuntime(services={'field-data': DictFieldData({})})
+        self.block = self.IntegerTester(runtime, scope_ids=Mock(spec=ScopeIds))
+
+    def set_values(self, *values):
+        """Set the field to each of `values`, returning the warnings issued."""
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", DeprecationWarning)
+            for value in values:
+                self.block.number = value
+        return caught
+
+    def test_disabled(self):
+        configure_shadow_type_enforcement(enabled=False)
+        with patch.object(Integer, 'enforce_type') as enforce_type:
+            assert not self.set_values('abc', '12')
+        assert not enforce_type.called
+        assert self.block.number == '12'
+
+    def test_sampled(self):
+        configure_shadow_type_enforcement(sample_every=3)
+        caught = self.set_values(*(['abc'] * 6))
+        assert len(caught) == 2
+
+    def test_aggregated(self):
+        configure_shadow_type_enforcement(aggregate=True)
+        assert not self.set_values('abc', '12', 12)
+        assert shadow_type_enforcement_counts() == {
+            ('Integer', 'number'): {'checked': 3, 'failing': 1, 'modifying': 1},
+        }
+        shadow_type_enforcement_counts(reset=True)
+        assert not shadow_type_enforcement_counts()
+
+    def test_invalid_sample_rate(self):
+        with pytest.raises(ValueError):
+            configure_shadow_type_enforcement(sample_every=0)
+
+
+class BlobFieldTest(unittest.TestCase):
+    """
+    Tests of the `Blob` field with a `LocalBlobService`.
+    """
+
+    @XBlock.needs('blob')
+    class BlobTester(XBlock):
+        """Test block with a Blob field."""
+        __test__ = False
+        payload = Blob(scope=Scope.content)
+
+    def setUp(self):
+        super().setUp()
+        temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(temp_dir.cleanup)
+        self.store = LocalBlobService(temp_dir.name)
+        self.field_data = DictFieldData({})
+        self.block = self.make_block()
+
+    def make_block(self):
+        """Make a BlobTester using the shared field data and store."""
+        runtime = TestRuntime(services={'field-data': self.field_data, 'blob': self.store})
+        return self.BlobTester(runtime, scope_ids=Mock(spec=ScopeIds))
+
+    def test_only_digest_is_saved(self):
+        self.block.payload = b'\x00binary\xff' * 1000
+        self.block.save()
+        digest = self.field_data.get(self.block, 'payload')
+        assert digest.startswith('sha256:')
+        assert self.store.exists(digest)
+
+        value = self.make_block().payload
+        assert isinstance(value, BlobRef)
+        assert value.size == 8000
+        assert value.read() == b'\x00binary\xff' * 1000
+        assert value.buffer()[:7] == b'\x00binary'  # pylint: disable=no-member
+        assert value.buffer() is value.buffer()  # pylint: disable=no-member
+        value.close()
+
+    def test_written_on_save(self):
+        self.block.payload = b'unsaved'
+        assert self.block.payload.pending  # pylint: disable=no-member
+        assert self.block.payload.read() == b'unsaved'
+        assert self.block.payload.size == 7
+        assert not os.listdir(self.store.root)
+
+        self.block.payload = b'saved'
+        self.block.save()
+        digest = self.field_data.get(self.block, 'payload')
+        assert not self.block.payload.pending  # pylint: disable=no-member
+        assert os.listdir(self.store.root) == ['sha256']
+        assert stat.S_IMODE(os.stat(self.store.path(digest)).st_mode) == 0o644
+
+    def test_set_several_times_before_save(self):
+        for content in (b'first', b'second', b'third'):
+            self.block.payload = content
+        assert self.block.payload == BlobRef(None, content=b'third')
+        assert self.block.payload != BlobRef(None, content=b'second')
+        assert hash(self.block.payload) == hash(b'third')
+        assert self.blob_files() == []
+
+        self.block.save()
+        assert self.blob_files() == [self.store.path(self.field_data.get(self.block, 'payload'))]
+
+    def blob_files(self):
+        """Return the paths of the blobs written to the store."""
+        return [os.path.join(path, name) for path, _, names in os.walk(self.store.root) for name in names]
+
+    def test_text_and_files(self):
+        self.block.payload = 'caf\u00e9'
+        assert bytes(self.block.payload) == 'caf\u00e9'.encode('utf-8')
+        self.block.payload = io.BytesIO(b'from a file')
+        with self.block.payload.open() as blob_file:  # pylint: disable=no-member
+            assert blob_file.read() == b'from a file'
+
+    def test_content_addressed(self):
+        first = self.store.put(b'same')
+        second = self.store.put(io.BytesIO(b'same'))
+        assert first == second
+        assert first.digest != self.store.put(b'different').digest
+        assert not [name for name in os.listdir(self.store.root) if name.startswith('.tmp-')]
+
+    def test_empty_blob(self):
+        self.block.payload = b''
+        assert self.block.payload.size == 0
+        assert self.block.payload.buffer() == b''  # pylint: disable=no-member
+
+    def test_none(self):
+        assert self.block.payload is None
+        self.block.payload = b'data'
+        self.block.payload = None
+        self.block.save()
+        assert self.field_data.get(self.block, 'payload') is None
+        assert self.make_block().payload is None
+
+    def test_invalid_values(self):
+        field = self.BlobTester.payload
+        with pytest.raises(TypeError):
+            field.from_json('not a digest')
+        with pytest.raises(TypeError):
+            self.block.payload = 12
+        with pytest.raises(ValueError):
+            self.store.path('sha256:../../etc')
+        with pytest.raises(ValueError):
+            BlobRef('sha256:abc').read()
+
+
 class SentinelTest(unittest.TestCase):
     """
     Tests of :ref:`xblock.fields.Sentinel`.
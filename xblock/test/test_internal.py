@@ -1,7 +1,9 @@
 """Tests of the xblock.internal module."""
+import gc
+import threading
 from unittest import TestCase
 
-from xblock.internal import class_lazy
+from xblock.internal import BlockCache, XML_PARSER_OPTIONS, class_lazy, uses_default_methods, xml_parser
 
 
 class TestLazyClassProperty(TestCase):
@@ -22,3 +24,102 @@ class TestLazyClassProperty(TestCase):
         self.assertEqual({}, self.Base.isolated_dict)
         self.assertEqual({}, self.Derived.isolated_dict)
         self.assertIsNot(self.Base.isolated_dict, self.Derived.isolated_dict)
+
+
+class TestUsesDefaultMethods(TestCase):
+    """
+    Tests of uses_default_methods.
+    """
+    class Base:
+        """A class with methods to override."""
+        def first(self):
+            """A method."""
+
+        def second(self):
+            """Another method."""
+
+    class Derived(Base):
+        """A class overriding one of them."""
+        def second(self):
+            """An override."""
+
+    def test_overrides(self):
+        assert uses_default_methods(self.Base(), self.Base, 'first', 'second')
+        derived = self.Derived()
+        assert uses_default_methods(derived, self.Base, 'first')
+        assert not uses_default_methods(derived, self.Base, 'first', 'second')
+        derived.first = lambda: None
+        assert not uses_default_methods(derived, self.Base, 'first')
+
+
+class Block:
+    """A stand-in for a block, which can be weakly referenced."""
+
+
+class TestBlockCache(TestCase):
+    """
+    Tests of BlockCache.
+    """
+    def test_most_recent_are_kept(self):
+        cache = BlockCache(max_size=2)
+        for key in 'abc':
+            cache[key] = Block()
+        gc.collect()
+        assert 'a' not in cache
+        assert 'b' in cache and 'c' in cache
+        assert len(cache) == 2
+
+    def test_evicted_blocks_in_use(self):
+        cache = BlockCache(max_size=1)
+        block = Block()
+        cache['a'] = block
+        cache['b'] = Block()
+        assert cache['a'] is block
+        # Reusing 'a' evicted 'b', which nothing else kept alive.
+        assert cache.get('b') is None
+        assert cache.get('missing', 'default') == 'default'
+        with self.assertRaises(KeyError):
+            cache['missing']  # pylint: disable=pointless-statement
+
+    def test_unbounded(self):
+        cache = BlockCache()
+        for key in range(500):
+            cache[key] = Block()
+        gc.collect()
+        assert len(cache) == 500
+
+    def test_values_without_weakrefs(self):
+        cache = BlockCache(max_size=1)
+        cache['a'] = 1
+        assert cache['a'] == 1
+        cache['b'] = 2
+        assert 'a' not in cache
+
+    def test_pop_and_clear(self):
+        cache = BlockCache(max_size=1)
+        block = Block()
+        cache['a'] = block
+        assert cache.pop('a') is block
+        assert cache.pop('a', 'default') == 'default'
+        cache['a'] = block
+        cache.clear()
+        assert 'a' not in cache and not len(cache)  # pylint: disable=use-implicit-booleaness-not-len
+
+
+class TestXmlParser(TestCase):
+    """
+    Tests of xml_parser.
+    """
+    def test_parsers_are_shared(self):
+        assert xml_parser() is xml_parser(dict(XML_PARSER_OPTIONS))
+        options = {'huge_tree': True, 'no_network': True}
+        assert xml_parser(options) is xml_parser(dict(reversed(options.items())))
+        assert xml_parser({'remove_blank_text': True}) is not xml_parser()
+
+    def test_parser_per_thread(self):
+        parsers = []
+        thread = threading.Thread(target=lambda: parsers.extend([xml_parser(), xml_parser()]))
+        thread.start()
+        thread.join()
+        assert parsers[0] is parsers[1]
+        assert parsers[0] is not xml_parser()
@@ -1,8 +1,11 @@
 """
 Test XML parsing in XBlocks.
 """
+import gzip
 import io
+import mmap
 import re
+import tempfile
 import textwrap
 import unittest
 from unittest import mock
@@ -12,7 +15,9 @@ from lxml import etree
 
 from xblock.core import XBlock, XML_NAMESPACES
 from xblock.fields import Scope, String, Integer, Dict, List
-from xblock.test.tools import blocks_are_equivalent
+from xblock.plugin import PluginMissingError
+from xblock.runtime import DictKeyValueStore, KvsFieldData, _PlaceholderId, _replace_placeholders
+from xblock.test.tools import blocks_are_equivalent, TestRuntime
 from xblock.test.toy_runtime import ToyRuntime
 
 # XBlock classes to use in the tests.
@@ -46,6 +51,16 @@ class LeafWithOption(Leaf):
         xml_node=True)
 
 
+class ResettingLeaf(Leaf):
+    """A leaf which saves its fields as it is parsed, and then resets `data1`."""
+    @classmethod
+    def parse_xml(cls, node, runtime, keys):
+        block = super().parse_xml(node, runtime, keys)
+        block.save()
+        del block.data1
+        return block
+
+
 class Container(XBlock):
     """A thing with children."""
     has_children = True
@@ -160,6 +175,23 @@ class ParsingTest(XmlTest, unittest.TestCase):
         self.assertEqual(child2.data1, "child2")
         self.assertEqual(child2.parent, block.scope_ids.usage_id)
 
+    @XBlock.register_temp_plugin(Leaf)
+    @XBlock.register_temp_plugin(Container)
+    def test_children_attached_together(self):
+        with mock.patch.object(self.runtime, 'add_nodes_as_children', wraps=self.runtime.add_nodes_as_children) as add:
+            block = self.parse_xml_to_block("<container><leaf/><leaf/><container><leaf/></container></container>")
+        assert add.call_count == 2
+        assert [len(call.args[1]) for call in add.call_args_list] == [3, 1]
+        assert [child.scope_ids.block_type for child in block.get_children()] == ['leaf', 'leaf', 'container']
+        assert all(child_id in block.children for child_id in block.children)
+
+    @XBlock.register_temp_plugin(Leaf)
+    @XBlock.register_temp_plugin(Container)
+    def test_overridden_add_node_as_child(self):
+        with mock.patch.object(self.runtime, 'add_node_as_child') as add_node_as_child:
+            self.parse_xml_to_block("<container><leaf/><leaf/></container>")
+        assert add_node_as_child.call_count == 2
+
     @XBlock.register_temp_plugin(Leaf)
     @XBlock.register_temp_plugin(Container)
     def test_xml_with_comments(self):
@@ -213,6 +245,377 @@ class ParsingTest(XmlTest, unittest.TestCase):
         self.assertEqual(block.data1, '\u2603')
 
 
+def with_streaming_plugins(func):
+    """Run `func` with the block types used by StreamingParsingTest available."""
+    for block_class in (Leaf, LeafWithOption, Container, Specialized, CustomXml):
+        func = XBlock.register_temp_plugin(block_class)(func)
+    return func
+
+
+class StreamingParsingTest(unittest.TestCase):
+    """Tests of XML parsing with streaming=True."""
+    OLX = f"""\
+        <!-- A comment before the root -->
+        <container {get_namespace_attrs()}>
+            <leaf data1='first'>some text</leaf>
+            <!-- A comment between blocks -->
+            <container>
+                <leaf/>
+                <container><leaf data2='deep'/></container>
+                <leafwithoption><option:data3>{{"key": "value"}}</option:data3></leafwithoption>
+            </container>
+            <specialized><leaf/><leaf/><leaf/></specialized>
+            <customxml>A<!--B--><leaf/>C<leaf/><!--D-->E</customxml>
+            <leaf data2='last'/>
+        </container>
+        """
+
+    def parse(self, xml, streaming):
+        """Parse `xml` in a new runtime, returning the runtime, the root usage id and the stored data."""
+        store = DictKeyValueStore()
+        runtime = TestRuntime(services={'field-data': KvsFieldData(store)})
+        return runtime, runtime.parse_xml_string(xml, streaming=streaming), store.db_dict
+
+    @with_streaming_plugins
+    def test_same_blocks(self):
+        _, root_id, data = self.parse(self.OLX, streaming=False)
+        runtime, streamed_root_id, streamed_data = self.parse(self.OLX, streaming=True)
+        assert streamed_root_id == root_id
+        assert streamed_data == data
+
+        root = runtime.get_block(root_id)
+        assert [child.scope_ids.block_type for child in root.get_children()] == [
+            'leaf', 'container', 'specialized', 'customxml', 'leaf'
+        ]
+        specialized, custom = root.get_children()[2:4]
+        assert specialized.num_children == 3
+        assert custom.inner_xml == 'A<!--B--><leaf/>C<leaf/><!--D-->E'
+
+    @with_streaming_plugins
+    def test_bytes(self):
+        _, _, data = self.parse(self.OLX, streaming=False)
+        _, _, streamed_data = self.parse(self.OLX.encode('utf-8'), streaming=True)
+        assert streamed_data == data
+
+    @with_streaming_plugins
+    def test_elements_are_freed(self):
+        runtime = TestRuntime(services={'field-data': KvsFieldData(DictKeyValueStore())})
+        olx = '<container>' + '<container><leaf/><leaf/><leaf/></container>' * 10 + '</container>'
+        kept_siblings = []
+
+        def record_kept_siblings(node, parent_id):
+            # iterparse may have read ahead, but the elements before this one are gone.
+            kept_siblings.append(len(list(node.itersiblings(preceding=True))))
+            kept_siblings.append(len(list(node.getparent().itersiblings(preceding=True))))
+            return usage_id_from_node(node, parent_id)
+
+        usage_id_from_node = runtime._usage_id_from_node  # pylint: disable=protected-access
+        with mock.patch.object(runtime, '_usage_id_from_node', side_effect=record_kept_siblings):
+            root = runtime.get_block(runtime.parse_xml_string(olx, streaming=True))
+        assert kept_siblings == [0] * 60
+        assert len(root.children) == 10
+        assert all(len(child.children) == 3 for child in root.get_children())
+
+    @with_streaming_plugins
+    def test_overridden_add_node_as_child(self):
+        runtime = TestRuntime(services={'field-data': KvsFieldData(DictKeyValueStore())})
+        with mock.patch.object(runtime, 'add_node_as_child') as add_node_as_child:
+            runtime.parse_xml_string("<container><leaf/><leaf/></container>", streaming=True)
+        assert add_node_as_child.call_count == 2
+
+    @with_streaming_plugins
+    def test_invalid_xml(self):
+        runtime = TestRuntime(services={'field-data': KvsFieldData(DictKeyValueStore())})
+        with self.assertRaises(etree.XMLSyntaxError):
+            runtime.parse_xml_string("<container><leaf/><leaf>", streaming=True)
+
+
+class ParserConfigurationTest(unittest.TestCase):
+    """Tests of the lxml parser the runtime parses XML with."""
+    def make_runtime(self, runtime_class=TestRuntime):
+        """Return a new runtime, and the dict its field data is stored in."""
+        store = DictKeyValueStore()
+        return runtime_class(services={'field-data': KvsFieldData(store)}), store.db_dict
+
+    @with_streaming_plugins
+    def test_ways_of_parsing(self):
+        olx = StreamingParsingTest.OLX
+        runtime, data = self.make_runtime()
+        runtime.parse_xml_string(olx)
+        with tempfile.TemporaryFile() as olx_file:
+            olx_file.write(olx.encode('utf-8'))
+            for threshold, mapped in [(None, False), (0, True)]:
+                olx_file.seek(0)
+                runtime, mapped_data = self.make_runtime()
+                if threshold is not None:
+                    runtime.XML_MMAP_THRESHOLD = threshold
+                with mock.patch('mmap.mmap', wraps=mmap.mmap) as mmap_file:
+                    runtime.parse_xml_file(olx_file)
+                assert mmap_file.called == mapped
+                assert mapped_data == data
+        with tempfile.TemporaryDirectory() as directory:
+            path = f'{directory}/olx.xml.gz'
+            with gzip.open(path, 'wb') as gzip_file:
+                gzip_file.write(olx.encode('utf-8'))
+            # The compressed file is over the threshold, but only its decompressed bytes are XML.
+            with gzip.open(path) as gzip_file:
+                runtime, gzip_data = self.make_runtime()
+                runtime.XML_MMAP_THRESHOLD = 0
+                with mock.patch('mmap.mmap', wraps=mmap.mmap) as mmap_file:
+                    runtime.parse_xml_file(gzip_file)
+                assert not mmap_file.called
+                assert gzip_data == data
+        for xml in (olx.encode('utf-8'), olx):
+            runtime, string_data = self.make_runtime()
+            runtime.parse_xml_string(xml)
+            assert string_data == data
+
+    @with_streaming_plugins
+    def test_entities_not_resolved(self):
+        olx = '<!DOCTYPE container [<!ENTITY e "expanded">]><container>&e;<leaf>&e;</leaf>&e;</container>'
+        for streaming in (False, True):
+            runtime, data = self.make_runtime()
+            root = runtime.get_block(runtime.parse_xml_string(olx, streaming=streaming))
+            assert len(root.children) == 1
+            assert 'expanded' not in repr(data)
+
+    @with_streaming_plugins
+    def test_parser_options(self):
+        class BlankTextRuntime(TestRuntime):  # pylint: disable=abstract-method
+            """A runtime which drops whitespace between elements."""
+            xml_parser_options = dict(TestRuntime.xml_parser_options, remove_blank_text=True)
+
+        olx = "<customxml>\n  <leaf/>\n  <leaf/>\n</customxml>"
+        for streaming in (False, True):
+            runtime, _ = self.make_runtime(BlankTextRuntime)
+            assert runtime.xml_parser is BlankTextRuntime().xml_parser
+            assert runtime.xml_parser is not TestRuntime().xml_parser
+            block = runtime.get_block(runtime.parse_xml_string(olx, streaming=streaming))
+            assert block.inner_xml == '<leaf/><leaf/>'
+
+
+class LazyParsingTest(unittest.TestCase):
+    """Tests of XML parsing with lazy=True."""
+    OLX = StreamingParsingTest.OLX.replace("<customxml>A<!--B--><leaf/>C<leaf/><!--D-->E</customxml>", "")
+
+    def make_runtime(self, runtime_class=TestRuntime):
+        """Return a new runtime, and the dict its field data is stored in."""
+        store = DictKeyValueStore()
+        return runtime_class(services={'field-data': KvsFieldData(store)}), store.db_dict
+
+    @staticmethod
+    def parsed_ids(data):
+        """Return the usage or definition ids of the blocks with data in `data`."""
+        return {key.block_scope_id for key in data}
+
+    @with_streaming_plugins
+    def test_same_blocks(self):
+        runtime, data = self.make_runtime()
+        root_id = runtime.parse_xml_string(self.OLX)
+        lazy_runtime, lazy_data = self.make_runtime()
+        assert lazy_runtime.parse_xml_string(self.OLX.encode('utf-8'), lazy=True) == root_id
+        assert not lazy_data
+
+        root = lazy_runtime.get_block(root_id)
+        assert self.parsed_ids(lazy_data) == {root_id}
+        assert root.children == runtime.get_block(root_id).children
+        lazy_runtime.parse_lazy_blocks()
+        assert lazy_data == data
+        assert not lazy_runtime._lazy_blocks  # pylint: disable=protected-access
+
+    @with_streaming_plugins
+    def test_blocks_parsed_on_first_get(self):
+        runtime, data = self.make_runtime()
+        root_id = runtime.parse_xml_string(StreamingParsingTest.OLX)
+        lazy_runtime, lazy_data = self.make_runtime()
+        lazy_runtime.parse_xml_string(StreamingParsingTest.OLX, lazy=True)
+
+        # A block deep in the tree, before its ancestors.
+        container = runtime.get_block(runtime.get_block(root_id).children[1])
+        deep_id = runtime.get_block(container.children[1]).children[0]
+        deep = lazy_runtime.get_block(deep_id)
+        assert deep.data2 == 'deep'
+        assert self.parsed_ids(lazy_data) == {deep_id}
+        assert deep.parent == container.children[1]
+
+        # The ids under the customxml are made when it is parsed, so the last leaf's id comes before them.
+        custom_id = runtime.get_block(root_id).children[3]
+        blocks = lazy_runtime.get_blocks([root_id, custom_id])
+        assert blocks[0].children[:4] == runtime.get_block(root_id).children[:4]
+        assert blocks[1].inner_xml == 'A<!--B--><leaf/>C<leaf/><!--D-->E'
+        assert lazy_runtime.get_block(blocks[1].children[0]).scope_ids.block_type == 'leaf'
+        # The blocks under the customxml were parsed with it, with ids made then.
+        assert len(self.parsed_ids(lazy_data)) == 6
+        lazy_runtime.parse_lazy_blocks()
+        assert len(self.parsed_ids(lazy_data)) == len(self.parsed_ids(data))
+
+    @with_streaming_plugins
+    def test_failed_parse_is_retried(self):
+        runtime, data = self.make_runtime()
+        root_id = runtime.parse_xml_string("<container><leaf/></container>", lazy=True)
+        block_from_node = runtime._block_from_node  # pylint: disable=protected-access
+        with mock.patch.object(runtime, '_block_from_node', side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                runtime.get_block(root_id)
+        assert not data
+        with mock.patch.object(runtime, '_block_from_node', wraps=block_from_node) as parse:
+            assert len(runtime.get_block(root_id).children) == 1
+        assert parse.call_count == 1
+
+    @with_streaming_plugins
+    def test_overridden_add_node_as_child(self):
+        runtime, data = self.make_runtime()
+        with mock.patch.object(runtime, 'add_node_as_child', wraps=runtime.add_node_as_child) as add_node_as_child:
+            root_id = runtime.parse_xml_string("<container><leaf/><leaf/></container>", lazy=True)
+            assert not data
+            root = runtime.get_block(root_id)
+        assert add_node_as_child.call_count == 2
+        assert len(root.children) == 2
+        assert self.parsed_ids(data) == {root_id, *root.children}
+
+    @with_streaming_plugins
+    def test_errors(self):
+        runtime, _ = self.make_runtime()
+        with self.assertRaises(ValueError):
+            runtime.parse_xml_string("<container/>", streaming=True, lazy=True)
+        with self.assertRaises(ValueError):
+            runtime.parse_xml_file(io.BytesIO(b"<container/>"), streaming=True, lazy=True)
+        with self.assertRaises(PluginMissingError):
+            runtime.parse_xml_string("<container><unknown/></container>", lazy=True)
+
+
+class PoolParsingRuntime(TestRuntime):  # pylint: disable=abstract-method
+    """A runtime which loads the block types of these tests without installed plugins, e.g. in worker processes."""
+    BLOCK_CLASSES = {
+        'leaf': Leaf, 'leafwithoption': LeafWithOption, 'container': Container,
+        'specialized': Specialized, 'customxml': CustomXml, 'resettingleaf': ResettingLeaf,
+    }
+
+    def load_block_type(self, block_type):
+        if block_type not in self.BLOCK_CLASSES:
+            raise PluginMissingError(block_type)
+        return self.BLOCK_CLASSES[block_type]
+
+
+def make_pool_parsing_runtime():
+    """Return a runtime for the worker processes of PoolParsingTest."""
+    return PoolParsingRuntime(services={'field-data': KvsFieldData(DictKeyValueStore())})
+
+
+class PoolParsingTest(unittest.TestCase):
+    """Tests of XML parsing in worker processes."""
+    def parse(self, xml, **kwargs):
+        """Parse `xml` in a new runtime, returning the root usage id, the stored data and the replayed subtrees."""
+        store = DictKeyValueStore()
+        runtime = PoolParsingRuntime(services={'field-data': KvsFieldData(store)})
+        replay_subtree = runtime._replay_subtree  # pylint: disable=protected-access
+        with mock.patch.object(runtime, '_replay_subtree', wraps=replay_subtree) as replay:
+            usage_id = runtime.parse_xml_file(io.BytesIO(xml), **kwargs)
+        return usage_id, store.db_dict, replay.call_count
+
+    def test_same_blocks(self):
+        xml = StreamingParsingTest.OLX.encode('utf-8')
+        root_id, data, _ = self.parse(xml)
+        for split_depth, subtrees in [(1, 5), (2, 3), (3, 1)]:
+            pool_root_id, pool_data, replayed = self.parse(
+                xml, processes=2, runtime_factory=make_pool_parsing_runtime, split_depth=split_depth
+            )
+            assert replayed == subtrees
+            assert pool_root_id == root_id
+            assert list(pool_data.items()) == list(data.items())
+
+    def test_replayed_changes(self):
+        xml = b'<container><resettingleaf data1="a" data2="b"/><leaf data1="c"/></container>'
+        with mock.patch.object(PoolParsingRuntime, 'save_block', autospec=True) as save_block:
+            root_id, data, _ = self.parse(xml)
+            saved = [call.args[1].scope_ids.usage_id for call in save_block.call_args_list]
+            save_block.reset_mock()
+            pool_root_id, pool_data, replayed = self.parse(
+                xml, processes=2, runtime_factory=make_pool_parsing_runtime
+            )
+            pool_saved = [call.args[1].scope_ids.usage_id for call in save_block.call_args_list]
+        assert replayed == 2
+        assert pool_root_id == root_id
+        assert list(pool_data.items()) == list(data.items())
+        # The replayed blocks are saved with save(), which calls save_block.
+        assert pool_saved == saved
+        # The resetting leaf deleted its data1 in the worker.
+        assert [value for key, value in pool_data.items() if key.field_name == 'data1'] == ['c']
+
+    def test_replace_placeholders(self):
+        placeholder = _PlaceholderId(0)
+        value = {'ids': (placeholder, [placeholder]), 'other': 'text'}
+        assert _replace_placeholders(value, {placeholder: 'real'}) == {'ids': ('real', ['real']), 'other': 'text'}
+
+    def test_lazy_blocks_parsed_first(self):
+        runtime = make_pool_parsing_runtime()
+        lazy_root_id = runtime.parse_xml_string('<container><leaf data1="lazy"/></container>', lazy=True)
+        runtime.parse_xml_file(
+            io.BytesIO(b'<container><leaf/><leaf/></container>'), processes=2, runtime_factory=make_pool_parsing_runtime
+        )
+        assert not runtime._lazy_blocks  # pylint: disable=protected-access
+        lazy_root = runtime.get_block(lazy_root_id)
+        assert runtime.get_block(lazy_root.children[0]).data1 == 'lazy'
+
+    def test_errors(self):
+        pool = {'processes': 2, 'runtime_factory': make_pool_parsing_runtime}
+        with self.assertRaises(PluginMissingError):
+            self.parse(b'<container><leaf/><unknown/></container>', **pool)
+        with self.assertRaises(ValueError):
+            self.parse(b'<container/>', processes=2)
+        with self.assertRaises(ValueError):
+            self.parse(b'<container/>', streaming=True, **pool)
+
+
+class StreamingExportTest(unittest.TestCase):
+    """Tests of XML export with streaming=True."""
+    @with_streaming_plugins
+    def setUp(self):
+        super().setUp()
+        self.runtime = TestRuntime(services={'field-data': KvsFieldData(DictKeyValueStore())})
+        self.block = self.runtime.get_block(self.runtime.parse_xml_string(StreamingParsingTest.OLX))
+
+    def export(self, block, **kwargs):
+        """Export `block`, returning the XML."""
+        output = io.BytesIO()
+        self.runtime.export_to_xml(block, output, **kwargs)
+        return output.getvalue()
+
+    @with_streaming_plugins
+    def test_same_xml(self):
+        for pretty_print in (True, False):
+            xml = self.export(self.block, pretty_print=pretty_print)
+            streamed_xml = self.export(self.block, pretty_print=pretty_print, streaming=True)
+            assert streamed_xml.startswith(b"<?xml version='1.0' encoding='UTF-8'?>\n<container ")
+            # Canonical XML puts namespace declarations in order, and writes empty elements with an end tag.
+            assert etree.tostring(etree.fromstring(streamed_xml), method='c14n') == \
+                etree.tostring(etree.fromstring(xml), method='c14n')
+
+    @with_streaming_plugins
+    def test_compact(self):
+        xml = self.export(self.block, pretty_print=False, streaming=True)
+        assert b'\n  <' not in xml
+        assert b'<leaf xblock-family="xblock.v1" data2="deep"/></container>' in xml
+        assert b'<customxml>A<!--B--><leaf/>C<leaf/><!--D-->E</customxml>' in xml
+
+    @with_streaming_plugins
+    def test_children_are_loaded_in_batches(self):
+        olx = '<container>' + '<leaf/>' * 250 + '</container>'
+        block = self.runtime.get_block(self.runtime.parse_xml_string(olx))
+        with mock.patch.object(self.runtime, 'get_blocks', wraps=self.runtime.get_blocks) as get_blocks:
+            xml = self.export(block, streaming=True)
+        assert [len(call.args[0]) for call in get_blocks.call_args_list] == [100, 100, 50]
+        assert xml.count(b'<leaf ') == 250
+
+    @with_streaming_plugins
+    def test_overridden_add_block_as_child_node(self):
+        with mock.patch.object(
+            self.runtime, 'add_block_as_child_node', wraps=self.runtime.add_block_as_child_node
+        ) as add_block_as_child_node:
+            self.export(self.block, streaming=True)
+        assert add_block_as_child_node.call_count == 9
+
+
 @ddt.ddt
 class ExportTest(XmlTest, unittest.TestCase):
     """Tests of the XML export facility."""
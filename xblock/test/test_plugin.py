@@ -86,6 +86,17 @@ def test_plugin_override_ambiguous():
         XBlock.load_class("overridden_block")
 
 
+@XBlock.register_temp_plugin(AmbiguousBlock1, "bad_block")
+@XBlock.register_temp_plugin(AmbiguousBlock2, "bad_block")
+@XBlock.register_temp_plugin(UnambiguousBlock, "Good_Block")
+def test_available_identifiers():
+    with patch.object(XBlock, '_load_class_entry_point') as load:
+        identifiers = XBlock.available_identifiers()
+    assert {"bad_block", "good_block"} <= set(identifiers)
+    assert identifiers == sorted(set(identifiers))
+    assert not load.called
+
+
 def test_nosuch_plugin():
     # We can provide a default class to return for missing plugins.
     cls = XBlock.load_class("nosuch_block", default=UnambiguousBlock)
@@ -1,7 +1,10 @@
 """Tests the features of xblock/runtime"""
 # pylint: disable=protected-access
 
-from datetime import datetime
+import functools
+import gc
+import weakref
+from datetime import datetime, timezone
 from unittest import TestCase
 
 from unittest.mock import Mock, patch
@@ -9,8 +12,12 @@ import pytest
 
 from web_fragments.fragment import Fragment
 
-from xblock.core import XBlock, XBlockMixin
+from xblock.core import CHILD_CACHE_SIZE, XBlock, XBlockAside, XBlockMixin, XBlockProxy
 from xblock.exceptions import (
+    FieldSizeLimitError,
+    KeyValueMultiSaveError,
+    XBlockMultiSaveError,
+    XBlockSaveError,
     NoSuchDefinition,
     NoSuchHandlerError,
     NoSuchServiceError,
@@ -18,18 +25,27 @@ from xblock.exceptions import (
     NoSuchViewError,
     FieldDataDeprecationWarning,
 )
-from xblock.fields import BlockScope, Scope, String, ScopeIds, List, UserScope, Integer
+from xblock.fields import (
+    BlockScope, Boolean, DateTime, Dict, Float, Scope, String, ScopeIds, List, UserScope, Integer, Set,
+    apply_json_patch,
+)
 from xblock.runtime import (
     DictKeyValueStore,
+    FieldSizeService,
+    FieldSizeStats,
     IdReader,
+    IndexedKeyValueStore,
     KeyValueStore,
     KvsFieldData,
+    MemoryIdManager,
     Mixologist,
     ObjectAggregator,
+    BadPath,
+    _compile_querypath,
 )
 from xblock.field_data import DictFieldData, FieldData
 
-from xblock.test.tools import unabc, WarningTestMixin, TestRuntime
+from xblock.test.tools import unabc, WarningTestMixin, TestRuntime, make_course, make_course_runtime
 
 
 class TestMixin:
@@ -191,6 +207,119 @@ def test_querypath_parsing():
     assert mrun.mock_query.mock_calls == expected.mock_calls
 
 
+class QueryChapter(XBlock):
+    """A block with children, for querying."""
+    has_children = True
+
+
+class QueryProblem(XBlock):
+    """A childless block with a weight, for querying."""
+    weight = Integer(scope=Scope.settings)
+
+
+class TestQuery(TestCase):
+    """
+    Tests of Runtime.query and querypath over a real tree.
+    """
+    def setUp(self):
+        super().setUp()
+        self.id_manager = MemoryIdManager()
+        self.runtime = TestRuntime(self.id_manager, services={'field-data': KvsFieldData(DictKeyValueStore())})
+        self.root_id = self.make('chapter')
+        self.chapter_ids = [self.make('chapter', self.root_id) for _ in range(3)]
+        self.problem_ids = [
+            self.make('problem', chapter_id, weight=number)
+            for number, chapter_id in enumerate(self.chapter_ids * 2)
+        ]
+        self.chapter = self.get(self.chapter_ids[1])
+
+    @XBlock.register_temp_plugin(QueryChapter, 'chapter')
+    @XBlock.register_temp_plugin(QueryProblem, 'problem')
+    def get(self, usage_id):
+        """Return the block of `usage_id`."""
+        return self.runtime.get_block(usage_id)
+
+    @XBlock.register_temp_plugin(QueryChapter, 'chapter')
+    @XBlock.register_temp_plugin(QueryProblem, 'problem')
+    def make(self, block_type, parent_id=None, **fields):
+        """Create a block under `parent_id`, returning its usage id."""
+        usage_id = self.id_manager.create_usage(self.id_manager.create_definition(block_type))
+        block = self.runtime.get_block(usage_id)
+        block.parent = parent_id
+        for name, value in fields.items():
+            setattr(block, name, value)
+        block.save()
+        if parent_id is not None:
+            parent = self.runtime.get_block(parent_id)
+            parent.children.append(usage_id)
+            parent.save()
+        return usage_id
+
+    @XBlock.register_temp_plugin(QueryChapter, 'chapter')
+    @XBlock.register_temp_plugin(QueryProblem, 'problem')
+    def querypath(self, block, path):
+        """Run `path` from `block`, returning the result and the types of the blocks constructed."""
+        with patch.object(self.runtime, 'construct_xblock', wraps=self.runtime.construct_xblock) as construct:
+            results = self.runtime.querypath(block, path)
+            if not isinstance(results, list):
+                results = list(results)
+        return results, [call.args[0] for call in construct.call_args_list]
+
+    def test_navigation(self):
+        results, _ = self.querypath(self.chapter, '.')
+        assert results == [self.chapter_ids[1]]
+        results, _ = self.querypath(self.chapter, '..')
+        assert results == [self.root_id]
+        results, _ = self.querypath(self.chapter, './problem')
+        assert results == self.problem_ids[1::3]
+        results, _ = self.querypath(self.chapter, '..//problem')
+        assert sorted(results) == sorted(self.problem_ids)
+        results, _ = self.querypath(self.chapter, '../chapter')
+        assert results == self.chapter_ids
+        results, _ = self.querypath(self.chapter, '/chapter')
+        assert results == self.chapter_ids
+        results, _ = self.querypath(self.get(self.problem_ids[0]), '//problem')
+        assert sorted(results) == sorted(self.problem_ids)
+
+    def test_attributes(self):
+        results, constructed = self.querypath(self.chapter, '..//problem/@weight')
+        assert sorted(results) == list(range(6))
+        # Beyond building the tree's structure, only the problems are instantiated.
+        assert constructed.count('problem') == 6 + 6
+        assert constructed.count('chapter') == 4 + 1
+
+        results, constructed = self.querypath(self.chapter, '..//problem/@weight')
+        assert constructed == ['problem'] * 6
+        results, _ = self.querypath(self.chapter, '..//@weight')
+        assert sorted(results) == list(range(6))
+        results, _ = self.querypath(self.chapter, '//problem/@weight')
+        assert sorted(results) == list(range(6))
+
+    def test_structure_follows_saved_children(self):
+        results, _ = self.querypath(self.chapter, '//problem')
+        assert len(results) == 6
+        new_id = self.make('problem', self.chapter_ids[0])
+        results, _ = self.querypath(self.chapter, '//problem')
+        assert sorted(results) == sorted(self.problem_ids + [new_id])
+
+        # Saving other fields keeps the structure.
+        structure = self.runtime.block_structure(self.root_id)
+        self.chapter.name = 'renamed'
+        self.chapter.save()
+        assert self.runtime.block_structure(self.root_id) is structure
+
+    def test_cached_paths(self):
+        self.querypath(self.chapter, './problem')
+        hits = _compile_querypath.cache_info().hits
+        self.querypath(self.chapter, './problem')
+        assert _compile_querypath.cache_info().hits == hits + 1
+
+    def test_bad_paths(self):
+        for path in ('.problem', '///problem', '.@weight/problem', './problem/@weight/@weight', './!'):
+            with self.assertRaises(BadPath):
+                self.querypath(self.chapter, path)
+
+
 def test_runtime_handle():
     # Test a simple handler and a fallback handler
 
@@ -461,7 +590,7 @@ class TestMixologist:
         assert FieldTester is self.mixologist.mix(FieldTester).unmixed_class
 
     def test_mixin_fields(self):
-        assert FirstMixin.fields['field'] is FirstMixin.field  # pylint: disable=unsubscriptable-object
+        assert FirstMixin.fields['field'] is FirstMixin.field
 
     def test_mixed_fields(self):
         mixed = self.mixologist.mix(FieldTester)
@@ -657,6 +786,364 @@ class TestRuntimeGetBlock(TestCase):
             self.runtime.get_block(self.usage_id)
 
 
+class TestRuntimeGetBlocks(TestCase):
+    """
+    Test the get_blocks default method on Runtime.
+    """
+    def setUp(self):
+        super().setUp()
+        patcher = patch.object(TestRuntime, 'construct_xblock')
+        self.construct_block = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.id_reader = Mock(IdReader)
+        self.id_reader.get_definition_ids.return_value = ['d1', 'd2']
+        self.id_reader.get_block_types.return_value = ['t1', 't2']
+        self.runtime = TestRuntime(self.id_reader, services={'field-data': Mock(FieldData)})
+
+    def test_batched_lookups(self):
+        parent = Mock()
+        blocks = self.runtime.get_blocks(iter(['u1', 'u2']), for_parent=parent)
+
+        self.id_reader.get_definition_ids.assert_called_once_with(['u1', 'u2'])
+        self.id_reader.get_block_types.assert_called_once_with(['d1', 'd2'])
+        assert not self.id_reader.get_definition_id.called
+        assert self.construct_block.call_args_list == [
+            ((block_type, ScopeIds(None, block_type, def_id, usage_id)), {'for_parent': parent})
+            for block_type, def_id, usage_id in [('t1', 'd1', 'u1'), ('t2', 'd2', 'u2')]
+        ]
+        assert len(blocks) == 2
+
+    def test_missing_definition(self):
+        self.id_reader.get_block_types.side_effect = NoSuchDefinition
+        with self.assertRaises(NoSuchUsage):
+            self.runtime.get_blocks(['u1', 'u2'])
+
+    def test_overridden_get_block(self):
+        self.runtime.get_block = Mock()
+        self.runtime.get_blocks(['u1', 'u2'])
+        assert self.runtime.get_block.call_count == 2
+        assert not self.id_reader.get_definition_ids.called
+
+    def test_id_reader_fallbacks(self):
+        id_manager = MemoryIdManager()
+        def_ids = [id_manager.create_definition(block_type) for block_type in ('a', 'b')]
+        usage_ids = [id_manager.create_usage(def_id) for def_id in def_ids]
+        assert id_manager.get_definition_ids(usage_ids) == def_ids
+        assert id_manager.get_block_types(def_ids) == ['a', 'b']
+
+
+class BatchParent(XBlock):
+    """A block whose children are loaded in bulk."""
+    has_children = True
+
+
+@XBlock.register_temp_plugin(BatchParent, 'batch_parent')
+@XBlock.register_temp_plugin(TestXBlock, 'batch_child')
+def test_get_children_in_bulk():
+    id_manager = MemoryIdManager()
+    runtime = TestRuntime(id_manager, services={'field-data': DictFieldData({})})
+    parent = runtime.get_block(id_manager.create_usage(id_manager.create_definition('batch_parent')))
+    parent.children = [id_manager.create_usage(id_manager.create_definition('batch_child')) for _ in range(3)]
+    cached = parent.get_child(parent.children[0])
+
+    with patch.object(runtime, 'get_blocks', wraps=runtime.get_blocks) as get_blocks:
+        children = parent.get_children()
+        assert parent.get_children(lambda usage_id: usage_id == parent.children[2]) == children[2:]
+    get_blocks.assert_called_once_with(parent.children[1:], for_parent=parent)
+    assert children[0] is cached
+    assert [child.scope_ids.usage_id for child in children] == parent.children
+    assert all(child._cached_parent() is parent for child in children)  # pylint: disable=protected-access
+
+
+@XBlock.register_temp_plugin(BatchParent, 'batch_parent')
+@XBlock.register_temp_plugin(TestXBlock, 'batch_child')
+def test_get_children_lazily():
+    id_manager = MemoryIdManager()
+    runtime = TestRuntime(id_manager, services={'field-data': DictFieldData({})})
+    parent = runtime.get_block(id_manager.create_usage(id_manager.create_definition('batch_parent')))
+    parent.children = [id_manager.create_usage(id_manager.create_definition('batch_child')) for _ in range(3)]
+    cached = parent.get_child(parent.children[0])
+
+    with patch.object(runtime, 'construct_xblock', wraps=runtime.construct_xblock) as construct_xblock:
+        children = parent.get_children(lazy=True)
+        assert children[0] is cached
+        proxy = children[1]
+        assert isinstance(proxy, XBlockProxy)
+        assert (proxy.usage_id, proxy.block_type) == (parent.children[1], 'batch_child')
+        assert proxy.def_id == id_manager.get_definition_id(parent.children[1])
+        assert not proxy.is_loaded
+        assert not construct_xblock.called
+
+        proxy.settings = 'changed'
+        assert proxy.is_loaded
+        assert construct_xblock.call_count == 1
+        assert proxy.load() is parent.get_child(parent.children[1])
+        assert proxy.load().settings == 'changed'
+        assert proxy.scope_ids.usage_id == parent.children[1]
+        assert construct_xblock.call_count == 1
+
+    children = parent.get_children(lazy=True)
+    assert children[1] is proxy.load()
+    assert not children[2].is_loaded
+
+
+@XBlock.register_temp_plugin(BatchParent, 'batch_parent')
+@XBlock.register_temp_plugin(TestXBlock, 'batch_child')
+def test_child_proxies_behave_like_blocks():
+    id_manager = MemoryIdManager()
+    runtime = TestRuntime(id_manager, services={'field-data': DictFieldData({})})
+    parent = runtime.get_block(id_manager.create_usage(id_manager.create_definition('batch_parent')))
+    parent.children = [id_manager.create_usage(id_manager.create_definition('batch_child')) for _ in range(2)]
+
+    first, second = parent.get_children(lazy=True)
+    assert type(first) is XBlockProxy  # pylint: disable=unidiomatic-typecheck
+    assert isinstance(first, XBlock)
+    assert first.is_loaded
+    block = parent.get_child(parent.children[0])
+    assert first == block and block == first
+    assert first != second
+    assert hash(first) == hash(block)
+    assert repr(first) == repr(block)
+    assert first in {block}
+
+    class OverridingRuntime(TestRuntime):  # pylint: disable=abstract-method
+        """A runtime which finds its blocks its own way."""
+        def get_block(self, usage_id, for_parent=None):
+            return super().get_block(usage_id, for_parent=for_parent)
+
+    runtime = OverridingRuntime(id_manager, services={'field-data': DictFieldData({})})
+    parent = runtime.get_block(parent.scope_ids.usage_id)
+    parent.children = [second.usage_id]
+    assert type(parent.get_children(lazy=True)[0]) is not XBlockProxy  # pylint: disable=unidiomatic-typecheck
+
+
+class TreeNode(XBlock):
+    """A block in a large tree."""
+    has_children = True
+
+
+@XBlock.register_temp_plugin(TreeNode, 'tree_node')
+def test_walking_a_tree_frees_it():
+    id_manager = MemoryIdManager()
+    runtime = TestRuntime(id_manager, services={'field-data': KvsFieldData(DictKeyValueStore())})
+
+    def make_tree(depth, parent_id=None):
+        usage_id = id_manager.create_usage(id_manager.create_definition('tree_node'))
+        block = runtime.get_block(usage_id)
+        block.parent = parent_id
+        block.children = [make_tree(depth - 1, usage_id) for _ in range(6)] if depth else []
+        block.save()
+        return usage_id
+
+    root_id = make_tree(3)
+    walked = []
+
+    def walk(block):
+        walked.append(weakref.ref(block))
+        for child in block.get_children():
+            assert child.get_parent() is block
+            walk(child)
+
+    # Without reference cycles between parents and children, the tree is freed
+    # as soon as it is dropped, without waiting for the cyclic garbage collector.
+    gc.collect()
+    gc.disable()
+    try:
+        root = runtime.get_block(root_id)
+        walk(root)
+        assert len(walked) == 259
+        del root
+        assert not [ref for ref in walked if ref() is not None]
+    finally:
+        gc.enable()
+
+
+@XBlock.register_temp_plugin(TreeNode, 'tree_node')
+def test_child_cache_is_bounded():
+    id_manager = MemoryIdManager()
+    runtime = TestRuntime(id_manager, services={'field-data': KvsFieldData(DictKeyValueStore())})
+    parent = runtime.get_block(id_manager.create_usage(id_manager.create_definition('tree_node')))
+    parent.children = [id_manager.create_usage(id_manager.create_definition('tree_node')) for _ in range(250)]
+
+    children = parent.get_children()
+    assert parent.get_children() == children
+    child_refs = [weakref.ref(child) for child in children]
+    del children
+    gc.collect()
+    alive = [ref() for ref in child_refs if ref() is not None]
+    assert len(alive) == CHILD_CACHE_SIZE
+    assert all(parent.get_child(child.scope_ids.usage_id) is child for child in alive)
+
+
+class TestIdentityMap(TestCase):
+    """
+    Tests of the optional identity map of Runtime.
+    """
+    def make_runtime(self, identity_map_size=10):
+        """Return a runtime with an identity map of `identity_map_size`, and a parent with three children."""
+        id_manager = MemoryIdManager()
+        runtime = TestRuntime(
+            id_manager, services={'field-data': KvsFieldData(DictKeyValueStore())},
+            identity_map_size=identity_map_size,
+        )
+        parent_id = id_manager.create_usage(id_manager.create_definition('tree_node'))
+        with patch.object(runtime, 'identity_map', None):
+            parent = runtime.get_block(parent_id)
+            parent.children = [id_manager.create_usage(id_manager.create_definition('tree_node')) for _ in range(3)]
+            parent.save()
+            for child in runtime.get_blocks(parent.children):
+                child.parent = parent_id
+                child.save()
+        return runtime, parent_id
+
+    @XBlock.register_temp_plugin(TreeNode, 'tree_node')
+    def test_disabled_by_default(self):
+        runtime, parent_id = self.make_runtime(0)
+        assert runtime.identity_map is None
+        assert runtime.get_block(parent_id) is not runtime.get_block(parent_id)
+        runtime.clear_identity_map()
+
+    @XBlock.register_temp_plugin(TreeNode, 'tree_node')
+    def test_same_instance(self):
+        runtime, parent_id = self.make_runtime()
+        parent = runtime.get_block(parent_id)
+        assert runtime.get_block(parent_id) is parent
+
+        parent.name = 'changed'
+        children = runtime.get_blocks(parent.children + parent.children[:1])
+        assert children[0] is children[3]
+        assert [child.get_parent() for child in children] == [parent] * 4
+        assert runtime.get_block(parent_id).name == 'changed'
+
+    @XBlock.register_temp_plugin(TreeNode, 'tree_node')
+    def test_parent_of_shared_block(self):
+        runtime, parent_id = self.make_runtime()
+        parent = runtime.get_block(parent_id)
+        child = runtime.get_block(parent.children[0])
+        assert child._cached_parent() is None  # pylint: disable=protected-access
+        assert parent.get_child(parent.children[0]) is child
+        assert child._cached_parent() is parent  # pylint: disable=protected-access
+
+        other_parent = runtime.get_block(parent.children[1])
+        assert runtime.get_blocks([child.scope_ids.usage_id], for_parent=other_parent) == [child]
+        assert child._cached_parent() is other_parent  # pylint: disable=protected-access
+
+    @XBlock.register_temp_plugin(TreeNode, 'tree_node')
+    def test_keyed_by_user(self):
+        runtime, parent_id = self.make_runtime()
+        runtime.user_id = 'alice'
+        parent = runtime.get_block(parent_id)
+        runtime.user_id = 'bob'
+        assert runtime.get_block(parent_id) is not parent
+        runtime.user_id = 'alice'
+        assert runtime.get_block(parent_id) is parent
+
+    @XBlock.register_temp_plugin(TreeNode, 'tree_node')
+    def test_kept_without_references(self):
+        runtime, parent_id = self.make_runtime()
+        block_ref = weakref.ref(runtime.get_block(parent_id))
+        gc.collect()
+        # The first instance was dropped by the caller, but the map keeps it alive.
+        assert block_ref() is not None
+        assert runtime.get_block(parent_id) is block_ref()
+
+    @XBlock.register_temp_plugin(TreeNode, 'tree_node')
+    def test_eviction_and_clear(self):
+        runtime, parent_id = self.make_runtime(1)
+        parent = runtime.get_block(parent_id)
+        children_ids = parent.children
+        runtime.get_block(children_ids[0])
+        runtime.get_block(children_ids[1])
+        gc.collect()
+        assert (children_ids[0], None) not in runtime.identity_map
+        assert runtime.get_block(parent_id) is parent
+
+        runtime.clear_identity_map()
+        assert not len(runtime.identity_map)  # pylint: disable=use-implicit-booleaness-not-len
+        assert runtime.get_block(parent_id) is not parent
+
+
+def with_child_plugins(func):
+    """Run `func` with the block types used by TestIterChildren available."""
+    func = XBlock.register_temp_plugin(BatchParent, 'batch_parent')(func)
+    func = XBlock.register_temp_plugin(TestXBlock, 'batch_child')(func)
+    return XBlock.register_temp_plugin(TestXBlockNoFallback, 'other_child')(func)
+
+
+class TestIterChildren(TestCase):
+    """
+    Tests of windowed access to a block's children.
+    """
+    @with_child_plugins
+    def setUp(self):
+        super().setUp()
+        self.id_manager = MemoryIdManager()
+        self.runtime = TestRuntime(self.id_manager, services={'field-data': DictFieldData({})})
+        self.parent = self.runtime.get_block(self.id_manager.create_usage(
+            self.id_manager.create_definition('batch_parent')
+        ))
+        # Alternate the types of the children: batch_child, other_child, batch_child...
+        self.parent.children = [
+            self.id_manager.create_usage(self.id_manager.create_definition(('batch_child', 'other_child')[i % 2]))
+            for i in range(10)
+        ]
+
+    @with_child_plugins
+    def iter_children(self, *args, **kwargs):
+        """Iterate over the parent's children, returning their ids and the ids of those constructed."""
+        with patch('xblock.core.CHILD_BATCH_SIZE', 3), \
+                patch.object(self.runtime, 'construct_xblock', wraps=self.runtime.construct_xblock) as construct:
+            ids = [child.scope_ids.usage_id for child in self.parent.iter_children(*args, **kwargs)]
+        constructed = [call.args[1].usage_id for call in construct.call_args_list]
+        return ids, constructed
+
+    def test_window(self):
+        ids, constructed = self.iter_children(2, 7)
+        assert ids == self.parent.children[2:7]
+        assert constructed == ids
+
+    def test_whole_list(self):
+        ids, _ = self.iter_children()
+        assert ids == self.parent.children
+
+    def test_type_filter(self):
+        ids, constructed = self.iter_children(1, 3, type_filter='other_child')
+        assert ids == self.parent.children[3:7:2]
+        assert constructed == ids
+        ids, _ = self.iter_children(type_filter=['batch_child', 'other_child'])
+        assert ids == self.parent.children
+
+    @with_child_plugins
+    def test_cached_children(self):
+        cached = self.parent.get_child(self.parent.children[4])
+        children = list(self.parent.iter_children(4, 6))
+        assert children[0] is cached
+        assert children[1] is self.parent.get_child(self.parent.children[5])
+
+    def test_negative_indices(self):
+        with self.assertRaises(ValueError):
+            self.parent.iter_children(-2)
+
+    @with_child_plugins
+    def test_render_page(self):
+        with patch.object(self.runtime, 'render_child') as render_child:
+            results = self.runtime.render_children(self.parent, 'student_view', start=8)
+        assert len(results) == 2
+        assert [call.args[0].scope_ids.usage_id for call in render_child.call_args_list] == self.parent.children[8:]
+
+    @with_child_plugins
+    def test_render_children_with_and_without_page(self):
+        cached = self.parent.get_child(self.parent.children[8])
+        for window in ({}, {'start': 8}):
+            with patch.object(self.runtime, 'render_child') as render_child:
+                self.runtime.render_children(self.parent, 'student_view', **window)
+            children = [call.args[0] for call in render_child.call_args_list]
+            assert cached in children
+            assert all(child._cached_parent() is self.parent for child in children)  # pylint: disable=protected-access
+            assert children[-1] is self.parent.get_child(self.parent.children[9])
+
+
 class TestRuntimeDeprecation(WarningTestMixin, TestCase):
     """
     Tests to make sure that deprecated Runtime apis stay usable,
@@ -698,3 +1185,468 @@ def test_runtime_css_class_extensions():
     block = TestXBlock(runtime, scope_ids=Mock(spec=ScopeIds))
     fragment = runtime.render(block, 'student_view', ["inner html"])
     assert 'test-extra-class' in fragment.content
+
+
+class SizedBlock(XBlock):
+    """
+    A block with user state fields whose sizes are accounted for.
+    """
+    small = Dict(scope=Scope.user_state)
+    limited = List(scope=Scope.user_state, soft_size_limit=5, hard_size_limit=100)
+    settings = String(scope=Scope.settings)
+
+
+class TestFieldSizeService(TestCase):
+    """
+    Tests of the field-size service.
+    """
+    def setUp(self):
+        super().setUp()
+        self.service = None
+
+    def make_block(self, block_type='sized', usage_id='u1', **service_kwargs):
+        """Make a SizedBlock reporting to a new FieldSizeService (or the one already made)."""
+        if self.service is None:
+            self.service = FieldSizeService(**service_kwargs)
+        runtime = TestRuntime(
+            Mock(spec=IdReader),
+            services={'field-data': DictFieldData({}), 'field-size': self.service},
+        )
+        return SizedBlock(runtime, scope_ids=ScopeIds('user', block_type, 'd1', usage_id))
+
+    def test_sizes_are_recorded(self):
+        block = self.make_block()
+        block.small = {'a': 'bcd'}
+        block.settings = 'xyz'
+        block.save()
+        other = self.make_block(usage_id='u2')
+        other.small = {'a': 'b'}
+        other.save()
+
+        largest = self.service.largest_fields()
+        assert [(stats.field_name, stats.saves, stats.max_bytes) for stats in largest] == [
+            ('small', 2, 11), ('settings', 1, 5),
+        ]
+        assert largest[0].total_bytes == 11 + 9
+        assert largest[0].max_usage_id == 'u1'
+        assert self.service.largest_blocks() == [FieldSizeStats('sized', None, 2, 25, 16, 'u1')]
+        assert not self.service.largest_fields(block_type='other')
+
+        self.service.reset()
+        assert not self.service.largest_fields()
+
+    def test_scopes(self):
+        block = self.make_block(scopes=[Scope.user_state])
+        block.small = {}
+        block.settings = 'xyz'
+        block.save()
+        assert [stats.field_name for stats in self.service.largest_fields()] == ['small']
+
+    def test_field_hard_limit(self):
+        block = self.make_block(field_hard_limit=10)
+        block.small = {'a': 'bcdefghijk'}
+        block.settings = 'xyz'
+        with pytest.raises(FieldSizeLimitError) as error:
+            block.save()
+        assert not error.value.saved_fields
+        assert set(error.value.dirty_fields) == {SizedBlock.small, SizedBlock.settings}
+        assert not block._field_data.has(block, 'settings')
+        assert not self.service.largest_fields()
+
+    def test_block_limits(self):
+        block = self.make_block(block_soft_limit=5, block_hard_limit=20)
+        block.small = {'a': 'b'}
+        with self.assertLogs('xblock.runtime', 'WARNING'):
+            block.save()
+        block.small = {'a': 'bcdefghijklmnopqrstuvwxyz'}
+        with pytest.raises(FieldSizeLimitError):
+            block.save()
+
+    def test_limits_declared_on_field(self):
+        block = self.make_block(field_hard_limit=1)
+        block.limited = [1, 2, 3]
+        with self.assertLogs('root', 'WARNING') as logs:
+            block.save()
+        assert 'soft limit' in logs.output[0]
+        block.limited = list(range(100))
+        with pytest.raises(FieldSizeLimitError):
+            block.save()
+
+
+def test_field_limits_without_service():
+    runtime = TestRuntime(Mock(spec=IdReader), services={'field-data': DictFieldData({})})
+    block = SizedBlock(runtime, scope_ids=Mock(spec=ScopeIds))
+    block.limited = list(range(100))
+    with pytest.raises(FieldSizeLimitError):
+        block.save()
+    block.limited = [1]
+    block.save()
+    assert block._field_data.get(block, 'limited') == [1]
+
+
+class WarmUpAside(XBlockAside):
+    """An aside for testing Runtime.warm_up."""
+    note = String(scope=Scope.settings)
+
+    @XBlockAside.aside_for('student_view')
+    def student_view_aside(self, block, context=None):  # pylint: disable=unused-argument
+        """Add nothing to the student view."""
+        return Fragment()
+
+
+class TestWarmUp(TestCase):
+    """
+    Tests of `Runtime.warm_up`.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.runtime = TestRuntime(services={'field-data': DictFieldData({})}, mixins=[TestMixin])
+
+    @XBlock.register_temp_plugin(TestXBlock, 'warm')
+    @XBlockAside.register_temp_plugin(WarmUpAside, 'warm_aside', group='xblock_asides.v1')
+    def test_warm_up_all(self):
+        timings = self.runtime.warm_up()
+        assert 'warm' in timings[XBlock.entry_point]
+        assert 'warm_aside' in timings[XBlockAside.entry_point]
+        assert all(seconds >= 0 for seconds in timings[XBlock.entry_point].values())
+
+        mixed = self.runtime.mixologist.mix(TestXBlock)
+        assert '_compiled_field_serializer' in mixed.__dict__
+        assert 'mixin_content' in mixed.fields
+        assert '_compiled_field_serializer' in WarmUpAside.__dict__
+
+    @XBlock.register_temp_plugin(TestXBlock, 'warm')
+    def test_warm_up_selected_types(self):
+        with patch('xblock.runtime.log') as mock_log:
+            timings = self.runtime.warm_up(block_types=['warm', 'missing'], aside_types=[])
+        assert list(timings[XBlock.entry_point]) == ['warm']
+        assert not timings[XBlockAside.entry_point]
+        assert mock_log.warning.call_count == 1
+
+
+class PatchingKeyValueStore(DictKeyValueStore):
+    """A DictKeyValueStore which applies JSON patches, recording what it was given."""
+    supports_json_patch = True
+
+    def __init__(self, storage=None):
+        super().__init__(storage)
+        self.patched = {}
+        self.written = {}
+
+    def set_many(self, update_dict):
+        self.written.update(update_dict)
+        super().set_many(update_dict)
+
+    def patch_many(self, update_dict, patch_dict):
+        whole = {key: value for key, value in update_dict.items() if key not in patch_dict or not self.has(key)}
+        for key, json_patch in patch_dict.items():
+            if key not in whole:
+                self.patched[key] = json_patch
+                self.db_dict[key] = apply_json_patch(self.db_dict[key], json_patch)
+        self.set_many(whole)
+
+
+class PatchedBlock(XBlock):
+    """A block with large mutable fields."""
+    log = List(scope=Scope.user_state)
+    state = Dict(scope=Scope.user_state)
+    seen = Set(scope=Scope.user_state)
+    lazy_log = List(scope=Scope.user_state, lazy=True)
+
+
+class TestJsonPatchSaves(TestCase):
+    """
+    Tests of saving fields as JSON patches to a KeyValueStore which supports them.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.kvs = PatchingKeyValueStore()
+        self.field_data = KvsFieldData(self.kvs)
+        self.runtime = TestRuntime(services={'field-data': self.field_data})
+        self.block = self.load_block()
+        for name in ('log', 'lazy_log'):
+            setattr(self.block, name, [{'attempt': number} for number in range(50)])
+        self.block.state = {'answers': {str(number): number for number in range(50)}}
+        self.block.seen = set(range(50))
+        self.block.save()
+        self.kvs.written.clear()
+        self.block = self.load_block()
+
+    def load_block(self):
+        """Load the block from the key value store."""
+        return self.runtime.construct_xblock_from_class(PatchedBlock, ScopeIds('user', 'patched', 'd0', 'u0'))
+
+    def stored(self, name):
+        """Return the stored value of the field `name`."""
+        return self.field_data.get(self.block, name)
+
+    def test_appended_item_is_patched(self):
+        self.block.log.append({'attempt': 50})
+        self.block.state['answers']['1'] = 'changed'
+        self.block.save()
+
+        assert not self.kvs.written
+        patches = {key.field_name: json_patch for key, json_patch in self.kvs.patched.items()}
+        assert patches == {
+            'log': [{'op': 'add', 'path': '/50', 'value': {'attempt': 50}}],
+            'state': [{'op': 'replace', 'path': '/answers/1', 'value': 'changed'}],
+        }
+        assert self.stored('log')[-1] == {'attempt': 50}
+        assert self.stored('state')['answers']['1'] == 'changed'
+        assert self.load_block().log == self.block.log
+
+    def test_whole_values_written(self):
+        self.block.log = [1]
+        self.block.seen.add(50)
+        self.block.lazy_log.append(50)
+        self.block.state['answers'] = {}
+        self.block.save()
+
+        assert not self.kvs.patched
+        assert {key.field_name for key in self.kvs.written} == {'log', 'seen', 'lazy_log', 'state'}
+        assert self.stored('log') == [1]
+        assert self.stored('state') == {'answers': {}}
+
+    def test_unsupported_store_gets_whole_values(self):
+        self.kvs.supports_json_patch = False
+        self.block.log.append({'attempt': 50})
+        self.block.save()
+        assert not self.kvs.patched
+        assert self.stored('log')[-1] == {'attempt': 50}
+
+
+class CountingKeyValueStore(DictKeyValueStore):
+    """A DictKeyValueStore which counts calls to set_many, and can fail to save some keys."""
+
+    def __init__(self, storage=None):
+        super().__init__(storage)
+        self.set_many_calls = 0
+        self.failing_keys = set()
+
+    def set_many(self, update_dict):
+        self.set_many_calls += 1
+        saved = {key: value for key, value in update_dict.items() if key not in self.failing_keys}
+        super().set_many(saved)
+        if len(saved) < len(update_dict):
+            raise KeyValueMultiSaveError(list(saved))
+
+
+class BatchedBlock(XBlock):
+    """A block to save in batches."""
+    answer = String(scope=Scope.user_state)
+    attempts = Integer(scope=Scope.user_state)
+    limited = String(scope=Scope.user_state, hard_size_limit=10)
+
+
+class TestSaveBlocks(TestCase):
+    """
+    Tests of `Runtime.save_blocks`.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.kvs = CountingKeyValueStore()
+        self.runtime = TestRuntime(services={'field-data': KvsFieldData(self.kvs)})
+        self.blocks = [
+            self.runtime.construct_xblock_from_class(BatchedBlock, ScopeIds('user', 'batched', f'd{n}', f'u{n}'))
+            for n in range(3)
+        ]
+        for number, block in enumerate(self.blocks):
+            block.answer = f'answer {number}'
+            block.attempts = number
+
+    def stored(self, block, name):
+        """Return the stored value of the field `name` of `block`."""
+        return block._field_data.get(block, name)
+
+    def test_one_write(self):
+        with patch.object(self.runtime, 'save_block') as save_block:
+            self.runtime.save_blocks(self.blocks + [
+                self.runtime.construct_xblock_from_class(BatchedBlock, ScopeIds('user', 'batched', 'd', 'clean')),
+            ])
+        assert self.kvs.set_many_calls == 1
+        assert [self.stored(block, 'answer') for block in self.blocks] == ['answer 0', 'answer 1', 'answer 2']
+        assert not any(block._get_fields_to_save() for block in self.blocks)
+        assert [call[0][0] for call in save_block.call_args_list] == self.blocks
+
+    def test_separate_field_data(self):
+        other_data = DictFieldData({})
+        other = BatchedBlock(self.runtime, field_data=other_data, scope_ids=Mock(spec=ScopeIds))
+        other.answer = 'other'
+        self.runtime.save_blocks(iter(self.blocks + [other]))
+        assert self.kvs.set_many_calls == 1
+        assert other_data.get(other, 'answer') == 'other'
+
+    def test_partial_failure(self):
+        failing = self.blocks[1]
+        self.kvs.failing_keys.add(failing._field_data._key(failing, 'answer'))
+        self.blocks[2].limited = 'far too long for the limit'
+
+        with pytest.raises(XBlockMultiSaveError) as error:
+            self.runtime.save_blocks(self.blocks)
+
+        errors = error.value.errors
+        assert set(errors) == {failing, self.blocks[2]}
+        assert errors[failing].saved_fields == [BatchedBlock.attempts]
+        assert errors[failing].dirty_fields == [BatchedBlock.answer]
+        assert failing._get_fields_to_save() == ['answer']
+        assert self.stored(failing, 'attempts') == 1
+        assert isinstance(errors[self.blocks[2]], FieldSizeLimitError)
+        assert not self.blocks[2]._field_data.has(self.blocks[2], 'answer')
+        assert self.stored(self.blocks[0], 'answer') == 'answer 0'
+        assert not self.blocks[0]._get_fields_to_save()
+
+    def test_default_field_data_implementation(self):
+        failing = self.blocks[1]
+
+        class FlakyFieldData(DictFieldData):
+            """Field data which saves the blocks one at a time, and fails to save some of `failing`."""
+            def set_many(self, block, update_dict):
+                if block is failing:
+                    super().set_many(block, {'attempts': update_dict['attempts']})
+                    raise KeyValueMultiSaveError(['attempts'])
+                super().set_many(block, update_dict)
+
+        field_data = FlakyFieldData({})
+        for block in self.blocks:
+            block._field_data = field_data
+        with pytest.raises(XBlockMultiSaveError) as error:
+            self.runtime.save_blocks(self.blocks)
+        assert list(error.value.errors) == [failing]
+        assert error.value.errors[failing].saved_fields == [BatchedBlock.attempts]
+        assert not self.blocks[2]._get_fields_to_save()
+
+
+class IndexedBlock(XBlock):
+    """A block with indexed fields."""
+    graded = Boolean(scope=Scope.settings, indexed=True)
+    due = DateTime(scope=Scope.settings, indexed=True)
+    weight = Float(scope=Scope.content, indexed=True)
+    display_name = String(scope=Scope.settings)
+
+
+class TestIndexedKeyValueStore(TestCase):
+    """
+    Tests of the secondary indexes of IndexedKeyValueStore.
+    """
+    def setUp(self):
+        super().setUp()
+        self.storage = CountingKeyValueStore()
+        self.kvs = IndexedKeyValueStore(self.storage, IndexedKeyValueStore.indexed_fields([IndexedBlock]))
+        self.id_manager = MemoryIdManager()
+        self.runtime = TestRuntime(self.id_manager, services={'field-data': KvsFieldData(self.kvs)})
+        self.blocks = [self.make_block(number) for number in range(4)]
+
+    def make_block(self, number):
+        """Create and save a block with values depending on `number`."""
+        usage_id = self.id_manager.create_usage(self.id_manager.create_definition('indexed'))
+        block = self.runtime.construct_xblock_from_class(
+            IndexedBlock, ScopeIds('user', 'indexed', self.id_manager.get_definition_id(usage_id), usage_id)
+        )
+        block.graded = number % 2 == 0
+        block.due = datetime(2026, 1, 1 + number, tzinfo=timezone.utc)
+        block.weight = float(number)
+        block.display_name = f'Block {number}'
+        block.save()
+        return block
+
+    def usage_ids(self, *numbers):
+        """Return the usage ids of the blocks numbered `numbers`."""
+        return [self.blocks[number].scope_ids.usage_id for number in numbers]
+
+    def test_indexed_fields(self):
+        fields = IndexedKeyValueStore.indexed_fields([IndexedBlock])
+        assert {field.name for field in fields} == {'graded', 'due', 'weight'}
+
+    def test_find(self):
+        assert self.kvs.find('graded', True) == self.usage_ids(0, 2)
+        assert self.kvs.find('graded', False) == self.usage_ids(1, 3)
+        assert self.kvs.find('weight', 1.0) == [self.blocks[1].scope_ids.def_id]
+        assert not self.kvs.find('weight', 7.0)
+        with pytest.raises(KeyError):
+            self.kvs.find('display_name', 'Block 1')
+
+    def test_find_range(self):
+        def due(day):
+            return IndexedBlock.due.to_json(datetime(2026, 1, day, tzinfo=timezone.utc))
+
+        assert self.kvs.find_range('due', high=due(3)) == self.usage_ids(0, 1)
+        assert self.kvs.find_range('due', low=due(2), high=due(3), include_high=True) == self.usage_ids(1, 2)
+        assert self.kvs.find_range('weight', low=2) == [block.scope_ids.def_id for block in self.blocks[2:]]
+        assert not self.kvs.find_range('weight', low='a')
+        with pytest.raises(ValueError):
+            self.kvs.find_range('weight')
+
+    def test_updates(self):
+        self.blocks[1].graded = True
+        self.blocks[1].save()
+        assert self.kvs.find('graded', True) == self.usage_ids(0, 2, 1)
+        del self.blocks[0].graded
+        assert self.kvs.find('graded', True) == self.usage_ids(2, 1)
+        self.blocks[3].weight = 0.5
+        self.blocks[3].save()
+        assert self.kvs.find_range('weight', high=1) == [
+            self.blocks[0].scope_ids.def_id, self.blocks[3].scope_ids.def_id
+        ]
+
+    def test_failed_writes(self):
+        block = self.blocks[1]
+        self.storage.failing_keys.add(self.kvs_key(block, 'graded'))
+        block.graded = True
+        block.weight = 10.0
+        with pytest.raises(XBlockSaveError):
+            block.save()
+        assert self.kvs.find('graded', True) == self.usage_ids(0, 2)
+        assert self.kvs.find('weight', 10.0) == [block.scope_ids.def_id]
+
+    def test_existing_items(self):
+        kvs = IndexedKeyValueStore(self.storage, IndexedBlock.fields.values(), items=self.storage.db_dict.items())
+        assert kvs.find('graded', True) == self.usage_ids(0, 2)
+
+    def kvs_key(self, block, field_name):
+        """Return the KeyValueStore key of `field_name` of `block`."""
+        return KvsFieldData(self.kvs)._key(block, field_name)
+
+
+class TestIndexDictionaries(TestCase):
+    """
+    Tests of Runtime.iter_index_dictionaries.
+    """
+    def setUp(self):
+        super().setUp()
+        self.runtime, self.root_id = make_course(blocks=30, fanout=4)
+
+    def test_breadth_first(self):
+        expected = list(self.runtime.block_structure(self.root_id).bfs())
+        for chunk_size in (1, 7, 100):
+            indexed = list(self.runtime.iter_index_dictionaries(self.root_id, chunk_size=chunk_size))
+            assert [usage_id for usage_id, _ in indexed] == expected
+        assert indexed[0][1] == self.runtime.get_block(self.root_id).index_dictionary()
+
+    def test_blocks_are_not_kept(self):
+        with patch.object(self.runtime, 'get_blocks', wraps=self.runtime.get_blocks) as get_blocks:
+            assert len(list(self.runtime.iter_index_dictionaries(self.root_id, chunk_size=7))) == 30
+        assert [len(call.args[0]) for call in get_blocks.call_args_list] == [1, 4, 7, 7, 7, 4]
+
+    def test_processes_need_a_runtime_factory(self):
+        with pytest.raises(ValueError):
+            list(self.runtime.iter_index_dictionaries(self.root_id, processes=2))
+
+    def test_processes(self):
+        indexed = list(self.runtime.iter_index_dictionaries(
+            self.root_id, chunk_size=4, processes=2,
+            runtime_factory=functools.partial(make_course_runtime, 30, 4),
+        ))
+        assert indexed == list(self.runtime.iter_index_dictionaries(self.root_id))
+
+    def test_processes_after_lazy_parse(self):
+        with patch.object(self.runtime, 'parse_lazy_blocks') as parse_lazy_blocks:
+            indexed = list(self.runtime.iter_index_dictionaries(
+                self.root_id, chunk_size=10, processes=2,
+                runtime_factory=functools.partial(make_course_runtime, 30, 4),
+            ))
+        # Every block is saved where the workers can read it before they start.
+        parse_lazy_blocks.assert_called_once_with()
+        assert len(indexed) == 30
@@ -0,0 +1,156 @@
+"""
+Tests of xblock.structure.
+"""
+from unittest import TestCase
+
+from xblock.core import XBlock
+from xblock.runtime import DictKeyValueStore, KvsFieldData, MemoryIdManager
+from xblock.structure import BlockQuery, BlockStructure
+from xblock.test.tools import TestRuntime
+
+
+class Chapter(XBlock):
+    """A block with children."""
+    has_children = True
+
+
+class Problem(XBlock):
+    """A block without children."""
+
+
+def with_structure_plugins(func):
+    """Run `func` with the block types used by these tests available."""
+    func = XBlock.register_temp_plugin(Chapter, 'chapter')(func)
+    return XBlock.register_temp_plugin(Problem, 'problem')(func)
+
+
+class TestBlockStructure(TestCase):
+    """
+    Tests of BlockStructure.
+    """
+    @with_structure_plugins
+    def setUp(self):
+        super().setUp()
+        self.id_manager = MemoryIdManager()
+        self.runtime = TestRuntime(self.id_manager, services={'field-data': KvsFieldData(DictKeyValueStore())})
+        # course
+        # +- chapter_a
+        # |  +- problem_1
+        # |  +- chapter_b
+        # |     +- problem_2
+        # +- problem_3
+        self.ids = {}
+        self.root = self.make('course', 'chapter', [
+            self.make('chapter_a', 'chapter', [
+                self.make('problem_1', 'problem'),
+                self.make('chapter_b', 'chapter', [self.make('problem_2', 'problem')]),
+            ]),
+            self.make('problem_3', 'problem'),
+        ])
+        self.structure = self.build()
+
+    def make(self, name, block_type, children=None):
+        """Create a block, returning its usage id."""
+        usage_id = self.id_manager.create_usage(self.id_manager.create_definition(block_type))
+        self.ids[name] = usage_id
+        block = self.runtime.get_block(usage_id)
+        if children is not None:
+            block.children = children
+        block.save()
+        return usage_id
+
+    def build(self):
+        """Build the structure of the tree."""
+        return BlockStructure.from_runtime(self.runtime, self.root, batch_size=2)
+
+    def names(self, usage_ids):
+        """Return the names of `usage_ids`."""
+        names = {usage_id: name for name, usage_id in self.ids.items()}
+        return [names[usage_id] for usage_id in usage_ids]
+
+    def test_arrays(self):
+        structure = self.structure
+        assert self.names(structure.usage_ids) == [
+            'course', 'chapter_a', 'problem_3', 'problem_1', 'chapter_b', 'problem_2'
+        ]
+        assert list(structure.parents) == [-1, 0, 0, 1, 1, 4]
+        assert list(structure.child_start) == [0, 2, 4, 4, 4, 5, 5]
+        assert list(structure.child_index) == [1, 2, 3, 4, 5]
+        assert structure.block_types == ['chapter', 'problem']
+        assert list(structure.types) == [0, 0, 1, 1, 0, 1]
+
+    def test_lookups(self):
+        structure = self.structure
+        assert len(structure) == 6
+        assert structure.root == self.root
+        assert self.ids['problem_2'] in structure
+        assert 'missing' not in structure
+        assert self.names(structure.children(self.ids['chapter_a'])) == ['problem_1', 'chapter_b']
+        assert structure.parent(self.ids['problem_2']) == self.ids['chapter_b']
+        assert structure.parent(self.root) is None
+        assert structure.block_type(self.ids['problem_1']) == 'problem'
+        assert self.names(structure.blocks_of_type('problem')) == ['problem_3', 'problem_1', 'problem_2']
+        assert not structure.blocks_of_type('video')
+        with self.assertRaises(KeyError):
+            structure.index('missing')
+
+    def test_traversals(self):
+        structure = self.structure
+        assert self.names(structure.bfs()) == self.names(structure.usage_ids)
+        assert self.names(structure.dfs()) == [
+            'course', 'chapter_a', 'problem_1', 'chapter_b', 'problem_2', 'problem_3'
+        ]
+        assert self.names(structure.dfs(self.ids['chapter_b'])) == ['chapter_b', 'problem_2']
+        assert self.names(structure.ancestors(self.ids['problem_2'])) == ['chapter_b', 'chapter_a', 'course']
+
+    def test_pruning(self):
+        structure = self.structure
+
+        def skip_chapter_b(usage_id, block_type):
+            return usage_id == self.ids['chapter_b'] and block_type == 'chapter'
+
+        assert self.names(structure.bfs(prune=skip_chapter_b)) == ['course', 'chapter_a', 'problem_3', 'problem_1']
+        assert self.names(structure.dfs(prune=skip_chapter_b)) == ['course', 'chapter_a', 'problem_1', 'problem_3']
+        assert not list(structure.dfs(self.ids['chapter_b'], prune=skip_chapter_b))
+        assert self.names(structure.ancestors(
+            self.ids['problem_2'], prune=lambda usage_id, _: usage_id == self.ids['chapter_a']
+        )) == ['chapter_b']
+
+    def test_serialization(self):
+        data = self.structure.to_bytes()
+        assert isinstance(data, bytes)
+        copied = BlockStructure.from_bytes(data)
+        for name in ('usage_ids', 'block_types', 'types', 'parents', 'child_start', 'child_index'):
+            assert getattr(copied, name) == getattr(self.structure, name)
+        assert self.names(copied.dfs()) == self.names(self.structure.dfs())
+
+        copied = BlockStructure.from_bytes(self.structure.to_bytes(serialize_id=str.upper), deserialize_id=str.lower)
+        assert copied.usage_ids == self.structure.usage_ids
+
+    def test_invalid_bytes(self):
+        with self.assertRaises(ValueError):
+            BlockStructure.from_bytes(b'not a structure')
+        with self.assertRaises(ValueError):
+            BlockStructure.from_bytes(self.structure.to_bytes()[:-4])
+
+    @with_structure_plugins
+    def test_shared_child(self):
+        chapter_b = self.runtime.get_block(self.ids['chapter_b'])
+        chapter_b.children = [self.ids['problem_2'], self.ids['problem_3']]
+        chapter_b.save()
+        structure = self.build()
+        assert len(structure) == 6
+        assert structure.parent(self.ids['problem_3']) == self.root
+        assert self.names(structure.children(self.ids['chapter_b'])) == ['problem_2', 'problem_3']
+        assert self.names(structure.dfs()) == [
+            'course', 'chapter_a', 'problem_1', 'chapter_b', 'problem_2', 'problem_3'
+        ]
+
+    def test_query(self):
+        structure = self.structure
+        query = BlockQuery(None, structure, [structure.index(self.ids['chapter_a'])])
+        assert self.names(query.descendants()) == ['chapter_a', 'problem_1', 'chapter_b', 'problem_2']
+        assert self.names(query.descendants().tagged('problem')) == ['problem_1', 'problem_2']
+        assert self.names(query.children().parent()) == ['chapter_a']
+        assert self.names(query.parent().parent()) == []
+        assert len(query.parent().children()) == 2
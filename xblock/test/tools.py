@@ -5,7 +5,9 @@ from contextlib import contextmanager
 from functools import partial
 import warnings
 
-from xblock.runtime import Runtime, MemoryIdManager
+from xblock.core import XBlock
+from xblock.fields import Scope, String
+from xblock.runtime import DictKeyValueStore, KvsFieldData, Runtime, MemoryIdManager
 
 
 def blocks_are_equivalent(block1, block2):
@@ -131,3 +133,67 @@ class TestRuntime(Runtime):
 
     def resource_url(self, *args, **kwargs):
         raise NotImplementedError
+
+
+class CourseUnit(XBlock):
+    """A container block of the courses made by :func:`make_course`."""
+    has_children = True
+    display_name = String(scope=Scope.settings, default="Unit")
+
+
+class CourseProblem(XBlock):
+    """A childless block of the courses made by :func:`make_course`."""
+    display_name = String(scope=Scope.settings, default="Problem")
+    data = String(scope=Scope.content)
+
+
+class CourseRuntime(TestRuntime):  # pylint: disable=abstract-method
+    """A runtime which loads the block types of :func:`make_course` without installed plugins."""
+    __test__ = False
+    BLOCK_CLASSES = {'unit': CourseUnit, 'problem': CourseProblem}
+
+    def load_block_type(self, block_type):
+        return self.BLOCK_CLASSES[block_type]
+
+
+def make_course(blocks=20000, fanout=20):
+    """
+    Return a runtime holding a course of `blocks` blocks, and the usage id of its root.
+
+    Units have `fanout` children each; the last level is made of problems. The
+    same arguments always give the same usage ids.
+    """
+    id_manager = MemoryIdManager()
+    runtime = CourseRuntime(id_manager, services={'field-data': KvsFieldData(DictKeyValueStore())})
+
+    def create(block_type):
+        return id_manager.create_usage(id_manager.create_definition(block_type))
+
+    root_id = create('unit')
+    level = [root_id]
+    count = 1
+    while count < blocks:
+        parents, level = level, []
+        remaining = blocks - count
+        leaves = remaining <= len(parents) * fanout
+        for parent_id in parents:
+            children = [create('problem' if leaves else 'unit') for _ in range(min(fanout, remaining))]
+            remaining -= len(children)
+            count += len(children)
+            level.extend(children)
+            parent = runtime.get_block(parent_id)
+            parent.display_name = f"Unit {parent_id}"
+            parent.children = children
+            parent.save()
+            if not remaining:
+                break
+    for usage_id in level:
+        block = runtime.get_block(usage_id)
+        block.display_name = f"Problem {usage_id}"
+        block.save()
+    return runtime, root_id
+
+
+def make_course_runtime(blocks, fanout):
+    """Return the runtime of :func:`make_course`, as the runtime factory of worker processes."""
+    return make_course(blocks, fanout)[0]
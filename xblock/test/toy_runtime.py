@@ -94,8 +94,6 @@ class ToyRuntime(Runtime):
     `self.runtime`.
 
     """
-    # pylint: disable=abstract-method
-
     def __init__(self, user_id=None):
         super().__init__(ID_MANAGER, ID_MANAGER, services={'field-data': KvsFieldData(TOYRUNTIME_KVS)})
         self.user_id = user_id